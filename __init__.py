@@ -1,15 +1,142 @@
-"""Öffentliche Paket-Exports für sequenzanalyse."""
+"""Öffentliche Paket-Exports für sequenzanalyse.
 
-from .analyse import SequenzAnalyse, SequenzAnalyseErgebnis, analyse
-from .config import SequenzAnalyseConfig
-from .utils import analyse_als_json_speichern, txt_sequenzierung, remove_responses_meta
+Die Untermodule werden erst beim ersten Zugriff auf einen Export geladen, so
+dass ``import sequenzanalyse`` weder ``openai`` noch die Pydantic-Modelle
+importiert.
+"""
+
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .analyse import AnalyseEreignis, SequenzAnalyse, SequenzAnalyseErgebnis, analyse
+    from .async_analyse import AsyncSequenzAnalyse, analyse_async
+    from .batch import BatchSequenzAnalyse, LokalerBatchClient, batch_analyse
+    from .cache import AntwortCache, SQLiteCache
+    from .config import SequenzAnalyseConfig, StufenConfig
+    from .metriken import AufrufMetrik, metriken_zusammenfassen
+    from .korpus import KorpusErgebnis, KorpusJob, korpus_analyse, korpus_analyse_async
+    from .neuberechnung import Neuberechnung, hypothesen_diff
+    from .planung import Plan, Planer, Preis, Prognose
+    from .resilienz import RateLimiter
+    from .sequenzierung import ManifestEintrag, Sequenzierung, korpus_sequenzieren, manifest_jobs, manifest_laden, sequenzen_lesen
+    from .trace_index import TraceIndex
+    from .traces import TraceLeser, TraceSchreiber, trace_expandieren, trace_kompaktieren, trace_laden, trace_speichern
+    from .utils import analyse_als_json_speichern, txt_sequenzierung, remove_responses_meta
+
+_EXPORTE = {
+    "AnalyseEreignis": "analyse",
+    "SequenzAnalyse": "analyse",
+    "SequenzAnalyseErgebnis": "analyse",
+    "analyse": "analyse",
+    "AsyncSequenzAnalyse": "async_analyse",
+    "analyse_async": "async_analyse",
+    "BatchSequenzAnalyse": "batch",
+    "LokalerBatchClient": "batch",
+    "batch_analyse": "batch",
+    "AntwortCache": "cache",
+    "SQLiteCache": "cache",
+    "SequenzAnalyseConfig": "config",
+    "StufenConfig": "config",
+    "AufrufMetrik": "metriken",
+    "metriken_zusammenfassen": "metriken",
+    "KorpusErgebnis": "korpus",
+    "KorpusJob": "korpus",
+    "korpus_analyse": "korpus",
+    "korpus_analyse_async": "korpus",
+    "Neuberechnung": "neuberechnung",
+    "hypothesen_diff": "neuberechnung",
+    "Plan": "planung",
+    "Planer": "planung",
+    "Preis": "planung",
+    "Prognose": "planung",
+    "RateLimiter": "resilienz",
+    "ManifestEintrag": "sequenzierung",
+    "Sequenzierung": "sequenzierung",
+    "korpus_sequenzieren": "sequenzierung",
+    "manifest_jobs": "sequenzierung",
+    "manifest_laden": "sequenzierung",
+    "sequenzen_lesen": "sequenzierung",
+    "TraceIndex": "trace_index",
+    "TraceLeser": "traces",
+    "TraceSchreiber": "traces",
+    "trace_expandieren": "traces",
+    "trace_kompaktieren": "traces",
+    "trace_laden": "traces",
+    "trace_speichern": "traces",
+    "analyse_als_json_speichern": "utils",
+    "txt_sequenzierung": "utils",
+    "remove_responses_meta": "utils",
+}
 
 __all__ = [
     "SequenzAnalyse",
+    "AsyncSequenzAnalyse",
+    "BatchSequenzAnalyse",
+    "LokalerBatchClient",
     "SequenzAnalyseErgebnis",
+    "AnalyseEreignis",
     "SequenzAnalyseConfig",
+    "StufenConfig",
+    "KorpusJob",
+    "KorpusErgebnis",
+    "RateLimiter",
+    "Neuberechnung",
+    "Planer",
+    "Plan",
+    "Prognose",
+    "Preis",
+    "AufrufMetrik",
+    "AntwortCache",
+    "SQLiteCache",
+    "TraceSchreiber",
+    "TraceLeser",
+    "TraceIndex",
+    "Sequenzierung",
+    "ManifestEintrag",
     "analyse",
+    "analyse_async",
+    "korpus_analyse",
+    "korpus_analyse_async",
+    "batch_analyse",
     "analyse_als_json_speichern",
     "txt_sequenzierung",
+    "sequenzen_lesen",
+    "korpus_sequenzieren",
+    "manifest_laden",
+    "manifest_jobs",
     "remove_responses_meta",
+    "metriken_zusammenfassen",
+    "hypothesen_diff",
+    "trace_speichern",
+    "trace_laden",
+    "trace_kompaktieren",
+    "trace_expandieren",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    modul = _EXPORTE.get(name)
+    if modul is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    wert = getattr(importlib.import_module(f".{modul}", __name__), name)
+    globals()[name] = wert
+    return wert
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
+
+
+class _Paket(types.ModuleType):
+    def __setattr__(self, name: str, wert: Any) -> None:
+        # Das Importsystem hängt geladene Untermodule als Attribut an das Paket;
+        # ``sequenzanalyse.analyse`` soll aber die gleichnamige Funktion bleiben.
+        if isinstance(wert, types.ModuleType) and _EXPORTE.get(name) == name:
+            wert = getattr(wert, name)
+        super().__setattr__(name, wert)
+
+
+sys.modules[__name__].__class__ = _Paket
@@ -2,21 +2,43 @@
 
 from __future__ import annotations
 
+import copy
+import difflib
+import hashlib
 import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass, asdict
-from typing import Any, Dict, List, Optional
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Literal, Optional, Tuple, Union
 
-from openai import OpenAI
 import importlib.resources as pkg_resources
 
-from .config import SequenzAnalyseConfig
+from .cache import AntwortCache, cache_schlüssel
+from .clients import geteilter_client
+from .checkpoint import RundenCheckpoint
+from .config import SequenzAnalyseConfig, StufenConfig
+from .metriken import MetrikCallback, metrik_aus_meta, metriken_zusammenfassen
 from .models import Beispielsituationen, KontextfreieLesarten
 from .models import KonfrontationMitKontext
 from .models import KonfrontationMitKontextErsteRunde
 from .models import KonfrontationMitKontextLetzteRunde
+from .models import Kontextzusammenfassung
+from .neuberechnung import fingerabdruck, hypothesen_diff, neuberechnung_planen
+from .resilienz import LatenzStatistik, eingabe_tokens_schätzen, ist_eskalierbar, ist_reparierbar, ist_wiederholbar, wartezeit
+from .traces import TraceSchreiber, trace_expandieren, trace_laden
+from .utils import tokens_schätzen
 
 from pprint import pprint
 
+if TYPE_CHECKING:
+    from openai import OpenAI
+
 
 def _load_prompt_text(filename: str, encoding: str = "utf-8") -> str:
     """Lädt eine Prompt-Datei aus dem eingebetteten _prompts-Verzeichnis."""
@@ -46,32 +68,118 @@ class _PromptSet:
     prompt3_konfrontation_ausgabe_mitte: str
     prompt3_konfrontation_ausgabe_ende: str
 
+    prompt3_kontextzusammenfassung: str
+
+    @cached_property
+    def konfrontation(self) -> Dict[str, Tuple[Tuple[str, ...], int]]:
+        """Fertige Entwicklerprompts für Schritt 3 je Rundentyp ("anfang", "mitte", "ende").
+
+        Jede Variante ist an ``[RUNDE]`` geteilt, der einzigen Stelle, die sich
+        von Runde zu Runde ändert, und trägt eine Tokenschätzung.
+        """
+        varianten = {}
+        for typ in ("anfang", "mitte", "ende"):
+            eingabe = (
+                self.prompt3_konfrontation_eingabe_anfang if typ == "anfang"
+                else self.prompt3_konfrontation_eingabe_mitte_ende
+            )
+            teile = tuple(
+                teil.replace("[RUNDEUNDZIEL]", getattr(self, f"prompt3_konfrontation_rundeundziel_{typ}"))
+                .replace("[EINGABE]", eingabe)
+                .replace("[AUFGABE]", getattr(self, f"prompt3_konfrontation_aufgabe_{typ}"))
+                .replace("[AUSGABE]", getattr(self, f"prompt3_konfrontation_ausgabe_{typ}"))
+                for teil in self.prompt3_konfrontation_template.split("[RUNDE]")
+            )
+            varianten[typ] = (teile, tokens_schätzen("".join(teile)))
+        return varianten
+
+    def konfrontation_prompt(self, typ: str, runde: str) -> str:
+        """Setzt die Rundenangabe in die vorbereitete Variante ein."""
+        return runde.join(self.konfrontation[typ][0]).strip()
+
+
+_PROMPT_DATEIEN: Dict[str, str] = {
+    "prompt1_beispielsituationen": "_Schritt-1--Beispielsituationen.txt",
+    "prompt2_lesarten": "_Schritt-2--Lesarten.txt",
+    "prompt3_konfrontation_template": "_Schritt-3--Konfrontation--TEMPLATE.txt",
+    "prompt3_konfrontation_rundeundziel_anfang": "_Schritt-3--Konfrontation--RUNDEUNDZIEL--ANFANG.txt",
+    "prompt3_konfrontation_rundeundziel_mitte": "_Schritt-3--Konfrontation--RUNDEUNDZIEL--MITTE.txt",
+    "prompt3_konfrontation_rundeundziel_ende": "_Schritt-3--Konfrontation--RUNDEUNDZIEL--ENDE.txt",
+    "prompt3_konfrontation_eingabe_anfang": "_Schritt-3--Konfrontation--EINGABE--ANFANG.txt",
+    "prompt3_konfrontation_eingabe_mitte_ende": "_Schritt-3--Konfrontation--EINGABE--MITTE-ENDE.txt",
+    "prompt3_konfrontation_aufgabe_anfang": "_Schritt-3--Konfrontation--AUFGABE--ANFANG.txt",
+    "prompt3_konfrontation_aufgabe_mitte": "_Schritt-3--Konfrontation--AUFGABE--MITTE.txt",
+    "prompt3_konfrontation_aufgabe_ende": "_Schritt-3--Konfrontation--AUFGABE--ENDE.txt",
+    "prompt3_konfrontation_ausgabe_anfang": "_Schritt-3--Konfrontation--AUSGABE--ANFANG.txt",
+    "prompt3_konfrontation_ausgabe_mitte": "_Schritt-3--Konfrontation--AUSGABE--MITTE.txt",
+    "prompt3_konfrontation_ausgabe_ende": "_Schritt-3--Konfrontation--AUSGABE--ENDE.txt",
+    "prompt3_kontextzusammenfassung": "_Schritt-3--Kontextzusammenfassung.txt",
+}
+
+_prompt_lock = threading.Lock()
+_prompt_cache: Optional[Tuple[Tuple[Any, ...], _PromptSet]] = None
+
+
+def _prompt_stand() -> Tuple[Any, ...]:
+    """Änderungszeit und Größe aller Prompt-Dateien (None, wo nicht ermittelbar)."""
+    base = pkg_resources.files("sequenzanalyse").joinpath("_prompts")
+    stand = []
+    for datei in _PROMPT_DATEIEN.values():
+        try:
+            stat = Path(str(base.joinpath(datei))).stat()
+            stand.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stand.append(None)
+    return tuple(stand)
+
 
 def _load_default_prompts() -> _PromptSet:
-    """Erzeugt den standardisierten Satz an Prompt-Texten."""
-    return _PromptSet(
-        prompt1_beispielsituationen=_load_prompt_text("_Schritt-1--Beispielsituationen.txt"),
-        prompt2_lesarten=_load_prompt_text("_Schritt-2--Lesarten.txt"),
-        prompt3_konfrontation_template=_load_prompt_text("_Schritt-3--Konfrontation--TEMPLATE.txt"),
-
-        prompt3_konfrontation_rundeundziel_anfang=_load_prompt_text("_Schritt-3--Konfrontation--RUNDEUNDZIEL--ANFANG.txt"),
-        prompt3_konfrontation_rundeundziel_mitte=_load_prompt_text("_Schritt-3--Konfrontation--RUNDEUNDZIEL--MITTE.txt"),
-        prompt3_konfrontation_rundeundziel_ende=_load_prompt_text("_Schritt-3--Konfrontation--RUNDEUNDZIEL--ENDE.txt"),
-
-        prompt3_konfrontation_eingabe_anfang=_load_prompt_text("_Schritt-3--Konfrontation--EINGABE--ANFANG.txt"),
-        prompt3_konfrontation_eingabe_mitte_ende=_load_prompt_text("_Schritt-3--Konfrontation--EINGABE--MITTE-ENDE.txt"),
-
-        prompt3_konfrontation_aufgabe_anfang=_load_prompt_text("_Schritt-3--Konfrontation--AUFGABE--ANFANG.txt"),
-        prompt3_konfrontation_aufgabe_mitte=_load_prompt_text("_Schritt-3--Konfrontation--AUFGABE--MITTE.txt"),
-        prompt3_konfrontation_aufgabe_ende=_load_prompt_text("_Schritt-3--Konfrontation--AUFGABE--ENDE.txt"),
-
-        prompt3_konfrontation_ausgabe_anfang=_load_prompt_text("_Schritt-3--Konfrontation--AUSGABE--ANFANG.txt"),
-        prompt3_konfrontation_ausgabe_mitte=_load_prompt_text("_Schritt-3--Konfrontation--AUSGABE--MITTE.txt"),
-        prompt3_konfrontation_ausgabe_ende=_load_prompt_text("_Schritt-3--Konfrontation--AUSGABE--ENDE.txt"),
-    )
-
-def _extract_result_and_meta(response: Any) -> tuple[Any, Dict[str, Any]]:
-    """Extrahiert Ergebnisdaten und Metadaten aus einer Responses-API-Antwort."""
+    """Liefert den standardisierten Satz an Prompt-Texten.
+
+    Die Texte werden einmal je Prozess gelesen und nur neu geladen, wenn sich
+    eine der Dateien geändert hat.
+    """
+    global _prompt_cache
+    stand = _prompt_stand()
+    with _prompt_lock:
+        if _prompt_cache is None or _prompt_cache[0] != stand:
+            prompts = _PromptSet(**{feld: _load_prompt_text(datei) for feld, datei in _PROMPT_DATEIEN.items()})
+            _prompt_cache = (stand, prompts)
+        return _prompt_cache[1]
+
+# Anregungen für die Stichproben in Schritt 1, damit sich die Situationen unterscheiden
+_LEBENSBEREICHE = (
+    "Familie und Freundeskreis",
+    "Arbeit und Beruf",
+    "Behörden, Ärzte und andere Institutionen",
+    "Schule, Ausbildung und Studium",
+    "Freizeit, Vereine und Öffentlichkeit",
+    "Schriftliche und digitale Kommunikation",
+)
+
+
+def _normalisieren(text: str) -> str:
+    """Kleinschreibung, NFC, ohne Satzzeichen und mit einfachem Leerraum."""
+    text = unicodedata.normalize("NFC", text).casefold()
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def _ähnlichkeit(a: str, b: str) -> float:
+    """difflib-Quote zweier Texte auf Wortebene."""
+    return difflib.SequenceMatcher(None, a.split(), b.split(), autojunk=False).ratio()
+
+
+def _json_kompakt(daten: Any) -> str:
+    """Kodiert Nutzereingaben als kompaktes JSON (ohne Leerraum und Unicode-Escapes)."""
+    return json.dumps(daten, ensure_ascii=False, separators=(",", ":"))
+
+
+def _extract_result_and_meta(response: Any, schema: Any = None) -> tuple[Any, Dict[str, Any]]:
+    """Extrahiert Ergebnisdaten und Metadaten aus einer Responses-API-Antwort.
+
+    Ohne ``output_parsed`` wird ``output_text`` gegen ``schema`` validiert,
+    sofern angegeben.
+    """
     # Meta robust extrahieren
     if hasattr(response, "to_dict") and callable(getattr(response, "to_dict")):
         meta = response.to_dict()
@@ -98,6 +206,8 @@ def _extract_result_and_meta(response: Any) -> tuple[Any, Dict[str, Any]]:
     # Fallback: output_text als JSON
     text = getattr(response, "output_text", None)
     if text:
+        if hasattr(schema, "model_validate_json"):
+            return schema.model_validate_json(text).model_dump(), meta
         return json.loads(text), meta
 
     raise ValueError("Response enthält weder output_parsed noch output_text.")
@@ -108,138 +218,681 @@ class SequenzAnalyseErgebnis:
     """Container für das Ergebnis einer Sequenzanalyse."""
     data: Dict[str, Any]
 
+    def metriken(self) -> Dict[str, Any]:
+        """Fasst Laufzeiten und Tokens je Schritt, je Runde und insgesamt zusammen."""
+        return metriken_zusammenfassen(self.data)
+
+    def hypothesen_diff(self, vorher: Union["SequenzAnalyseErgebnis", Dict[str, Any]]) -> Dict[str, Any]:
+        """Vergleicht die Fallstrukturhypothesen mit denen einer früheren Analyse."""
+        vorher = vorher.data if isinstance(vorher, SequenzAnalyseErgebnis) else vorher
+        return hypothesen_diff(trace_expandieren(vorher), self.data)
 
-class SequenzAnalyse:
-    """Führt die Sequenzanalyse für eine Liste von Sequenzen aus."""
+
+@dataclass
+class AnalyseEreignis:
+    """Zwischenstand einer laufenden Analyse für die Iterator-API.
+
+    ``art`` ist "stufe" (Ergebnis eines einzelnen Schritts), "runde" (``daten``
+    ist der fertige Rundeneintrag) oder "ende" (``daten`` ist das vollständige
+    ``SequenzAnalyseErgebnis``).
+    """
+    art: Literal["stufe", "runde", "ende"]
+    runde: Optional[int]
+    daten: Any
+    stufe: Optional[int] = None
+    meta: Optional[Dict[str, Any]] = None
+
+
+class _SequenzAnalyseBasis:
+    """Gemeinsame Prompt- und Trace-Logik der synchronen und asynchronen Analyse."""
 
     def __init__(
         self,
-        client: Optional[OpenAI] = None,
         config: Optional[SequenzAnalyseConfig] = None,
         verbose: bool = True,
         verbose_outputs: bool = False,
+        cache: Optional[AntwortCache] = None,
+        metrik_callback: Optional[MetrikCallback] = None,
     ) -> None:
-        self.client = client or OpenAI()
         self.config = config or SequenzAnalyseConfig()
         self.verbose = verbose
         self.verbose_outputs = verbose_outputs
+        self.cache = cache
+        self.metrik_callback = metrik_callback
         self._prompts = _load_default_prompts()
+        # Normalisierte Sequenz -> (Future/Task der Schritte 1 und 2, Runde, Lauf), in LRU-Reihenfolge
+        self._kontextfrei_memo: "OrderedDict[str, Tuple[Any, int, object]]" = OrderedDict()
+        self._latenzen = LatenzStatistik()
+        self._client: Any = None
+
+    # Ohne eigenen Client wird der geteilte Client des Prozesses erst beim
+    # ersten Aufruf geholt (und damit erst dann ``openai`` importiert).
+    _geteilter_client = staticmethod(geteilter_client)
+
+    @property
+    def client(self) -> Any:
+        return self._client if self._client is not None else self._geteilter_client()
+
+    @client.setter
+    def client(self, client: Any) -> None:
+        self._client = client
 
-    def _common_parse_args(self) -> Dict[str, Any]:
-        """Bündelt Standardparameter für API-Aufrufe."""
+    def _stufen_config(self, stufe: Union[int, str, None]) -> Optional[StufenConfig]:
+        """Liefert die Überschreibungen für einen Schritt, falls konfiguriert."""
         return {
-            "model": self.config.model,
-            "max_output_tokens": self.config.max_output_tokens,
-            "reasoning": {"effort": self.config.reasoning_effort, "summary": self.config.reasoning_summary},
+            1: self.config.stage1,
+            2: self.config.stage2,
+            3: self.config.stage3,
+            "zusammenfassung": self.config.summary,
+        }.get(stufe)
+
+    def _common_parse_args(self, stufe: Union[int, str, None] = None) -> Dict[str, Any]:
+        """Bündelt Standardparameter für API-Aufrufe, ggf. mit den Werten des Schritts."""
+        stufen_config = self._stufen_config(stufe) or StufenConfig()
+
+        def wert(feld: str) -> Any:
+            eigener = getattr(stufen_config, feld)
+            return eigener if eigener is not None else getattr(self.config, feld)
+
+        args = {
+            "model": wert("model"),
+            "max_output_tokens": wert("max_output_tokens"),
+            "reasoning": {"effort": wert("reasoning_effort"), "summary": self.config.reasoning_summary},
             "store": self.config.store,
-            "temperature": self.config.temperature,
+            "temperature": wert("temperature"),
             "tool_choice": self.config.tool_choice,
         }
+        timeout = stufen_config.timeout if stufen_config.timeout is not None else self.config.request_timeout
+        if timeout is not None:
+            args["timeout"] = timeout
+        return args
+
+    def _eskalation(self, anfrage: Dict[str, Any], stufe: Union[int, str], exc: BaseException) -> Optional[Dict[str, Any]]:
+        """Anfrage an das Eskalationsmodell des Schritts, wenn der Fehler dafür in Frage kommt."""
+        stufen_config = self._stufen_config(stufe)
+        if stufen_config is None or stufen_config.escalation_model is None or not ist_eskalierbar(exc):
+            return None
+        if anfrage.get("model") == stufen_config.escalation_model:
+            return None
+        reasoning = dict(anfrage.get("reasoning") or {})
+        if stufen_config.escalation_reasoning_effort is not None:
+            reasoning["effort"] = stufen_config.escalation_reasoning_effort
+        eskalation = {**anfrage, "model": stufen_config.escalation_model, "reasoning": reasoning}
+        eskalation.pop("timeout", None)
+        if self.config.request_timeout is not None:
+            eskalation["timeout"] = self.config.request_timeout
+        return eskalation
+
+    def _reparatur(self, anfrage: Dict[str, Any], exc: BaseException) -> Dict[str, Any]:
+        """Wiederholt eine Anfrage mit dem Validierungsfehler als Hinweis an das Modell."""
+        hinweis = (
+            f"Deine vorige Antwort war ungültig ({type(exc).__name__}: {str(exc)[:1000]}). "
+            "Antworte erneut, vollständig und exakt gemäß dem vorgegebenen JSON-Schema."
+        )
+        reparatur = {**anfrage, "input": [*anfrage["input"], {"role": "user", "content": hinweis}]}
+        if type(exc).__name__ == "LengthFinishReasonError" and anfrage.get("max_output_tokens"):
+            reparatur["max_output_tokens"] = 2 * anfrage["max_output_tokens"]
+        return reparatur
+
+    def _nach_fehler(
+        self,
+        anfrage: Dict[str, Any],
+        stufe: Union[int, str],
+        exc: BaseException,
+        verlauf: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """Liefert eine geänderte Anfrage für einen sofortigen neuen Versuch oder None.
+
+        Zuerst wird auf das Eskalationsmodell des Schritts ausgewichen, danach
+        bis zu ``schema_repair_retries`` Mal repariert. Was geschah, landet in
+        ``verlauf`` und später in den Metadaten der Antwort.
+        """
+        if "eskaliert" not in verlauf:
+            eskalation = self._eskalation(anfrage, stufe, exc)
+            if eskalation is not None:
+                verlauf["eskaliert"] = {"von": anfrage["model"], "grund": type(exc).__name__}
+                return eskalation
+        reparaturen = verlauf.get("repariert", {}).get("versuche", 0)
+        if ist_reparierbar(exc) and reparaturen < self.config.schema_repair_retries:
+            verlauf["repariert"] = {"versuche": reparaturen + 1, "grund": type(exc).__name__}
+            return self._reparatur(anfrage, exc)
+        return None
 
-    def analyse(self, sequenzen: List[str], äußerer_kontext: str) -> SequenzAnalyseErgebnis:
-        """Analysiert Sequenzen gegen einen äußeren Kontext und sammelt Ergebnisse."""
+    def _hedge_frist(self, stufe: Union[int, str]) -> Optional[float]:
+        """Sekunden, nach denen eine zweite Anfrage startet; None ohne Hedging."""
+        if not self.config.hedge_requests:
+            return None
+        frist = self._latenzen.quantil(stufe, self.config.hedge_quantile, self.config.hedge_min_samples)
+        return frist if frist is not None else self.config.hedge_delay
+
+    def _analyse_beginnen(
+        self,
+        sequenzen: List[str],
+        äußerer_kontext: str,
+        checkpoint: Optional[Union[Path, str]] = None,
+        resume: bool = False,
+    ) -> Tuple[Dict[str, Any], Optional[RundenCheckpoint]]:
+        """Legt den Trace einer neuen Analyse an oder lädt ihn aus einem Checkpoint."""
         laufende_analyse: Dict[str, Any] = {
             "meta": {
                 "config": asdict(self.config),
+                "abhängigkeiten": self._abhängigkeiten(),
             },
             "sequenzen": sequenzen,
             "äußerer_kontext": äußerer_kontext,
             "runden": [],
         }
 
-        letzte_runde = len(sequenzen)
+        if self.verbose:
+            print("=== Sequenzanalyze ===\n======================")
+            print("\nÄußerer Kontext:")
+            pprint(äußerer_kontext)
+            print("\nSequenzen:")
+            pprint(sequenzen)
+            print(f"\nRunden: {len(sequenzen)}")
 
-        print("=== Sequenzanalyze ===\n======================")
-        print("\nÄußerer Kontext:")
-        pprint(äußerer_kontext)
-        print("\nSequenzen:")
-        pprint(sequenzen)
-        print(f"\nRunden: {len(sequenzen)}")
-
-        for runde, neue_sequenz in enumerate(sequenzen, 1):
-            if self.verbose:
-                print(f"\n\n=== Runde {runde} ===")
-                print("\nNeue Sequenz:")
-                pprint(neue_sequenz)
-
-            bisheriges_protokoll = " ".join(sequenzen[: runde - 1])
-
-            ergebnisse_dieser_runde: Dict[str, Any] = {
-                "runde": runde,
-                "bisheriges_protokoll": bisheriges_protokoll,
-                "neue_sequenz": neue_sequenz,
-                "ergebnisse": [],
-                "responses_meta": [],
-            }
+        if checkpoint is None:
+            return laufende_analyse, None
 
-            situationenerzählungen, meta1 = self._schritt1(neue_sequenz)
-            ergebnisse_dieser_runde["ergebnisse"].append(situationenerzählungen)
-            ergebnisse_dieser_runde["responses_meta"].append(meta1)
+        checkpoint = RundenCheckpoint(checkpoint)
+        if not checkpoint.existiert():
+            checkpoint.beginnen({k: v for k, v in laufende_analyse.items() if k != "runden"})
+            return laufende_analyse, checkpoint
 
-            kontextfreie_lesarten, meta2 = self._schritt2(situationenerzählungen)
-            ergebnisse_dieser_runde["ergebnisse"].append(kontextfreie_lesarten)
-            ergebnisse_dieser_runde["responses_meta"].append(meta2)
+        if not resume:
+            raise FileExistsError(
+                f"Checkpoint {checkpoint.path} existiert bereits; mit resume=True wird die Analyse fortgesetzt."
+            )
+        kopf, runden = checkpoint.laden()
+        if kopf.get("sequenzen") != sequenzen or kopf.get("äußerer_kontext") != äußerer_kontext:
+            raise ValueError(f"Checkpoint {checkpoint.path} gehört zu einem anderen Protokoll.")
+        checkpoint.kürzen()
 
-            konfrontation_mit_kontext, meta3 = self._schritt3(
-                runde=runde,
-                letzte_runde=letzte_runde,
-                neue_sequenz=neue_sequenz,
-                bisheriges_protokoll=bisheriges_protokoll,
-                äußerer_kontext=äußerer_kontext,
-                laufende_analyse=laufende_analyse,
-                kontextfreie_lesarten=kontextfreie_lesarten,
+        laufende_analyse["runden"] = runden
+        laufende_analyse["meta"]["fortgesetzt_ab_runde"] = len(runden) + 1
+        if self.verbose:
+            print(f"\nFortsetzung ab Runde {len(runden) + 1} (Checkpoint: {checkpoint.path})")
+
+        return laufende_analyse, checkpoint
+
+    def _abhängigkeiten(self) -> Dict[str, str]:
+        """Fingerabdrücke der Prompts und Einstellungen, von denen die Schritte abhängen.
+
+        "kontextfrei" deckt Schritt 1 und 2 ab, "anfang", "mitte" und "ende"
+        Schritt 3 je Rundentyp, "zusammenfassung" die Kontextzusammenfassung.
+        """
+        def args(stufe: Union[int, str]) -> Dict[str, Any]:
+            return {k: v for k, v in self._common_parse_args(stufe).items() if k != "timeout"}
+
+        config, prompts = self.config, self._prompts
+        stichproben: Tuple[Any, ...] = (config.stage1_samples,)
+        if config.stage1_samples > 1:
+            stichproben += (config.stage1_situations_per_sample, config.stage1_duplicate_similarity)
+        innen: Dict[str, Any] = {"strategie": config.inner_context}
+        if config.inner_context != "full":
+            innen["fenster"] = config.inner_context_window
+        if config.inner_context == "summary":
+            innen["intervall"] = config.inner_context_summary_interval
+        return {
+            "kontextfrei": fingerabdruck(
+                prompts.prompt1_beispielsituationen, prompts.prompt2_lesarten, args(1), args(2), stichproben
+            ),
+            "zusammenfassung": fingerabdruck(prompts.prompt3_kontextzusammenfassung, args("zusammenfassung"), innen),
+            **{
+                typ: fingerabdruck(teile, args(3), config.stage3_layout, innen)
+                for typ, (teile, _) in prompts.konfrontation.items()
+            },
+        }
+
+    def _neuberechnung_beginnen(
+        self,
+        laufende_analyse: Dict[str, Any],
+        vorher: Union[SequenzAnalyseErgebnis, Dict[str, Any], Path, str],
+        checkpoint: Optional[RundenCheckpoint],
+    ) -> Tuple[Dict[str, Any], Dict[int, Tuple[Tuple[Any, Dict[str, Any]], Tuple[Any, Dict[str, Any]]]]]:
+        """Übernimmt aus ``vorher`` die Runden vor der Abhängigkeitsgrenze.
+
+        Liefert die frühere Analyse und die wiederverwendbaren Ergebnisse der
+        Schritte 1 und 2 je neu zu berechnender Runde. Übernommene Runden
+        tragen ``übernommen`` und keine Metriken, so dass ``metriken()`` nur
+        die Aufrufe der Neuberechnung zählt.
+        """
+        if isinstance(vorher, SequenzAnalyseErgebnis):
+            vorher = vorher.data
+        elif isinstance(vorher, (str, Path)):
+            vorher = trace_laden(vorher)
+        vorher = trace_expandieren(vorher)
+        plan = neuberechnung_planen(
+            vorher, laufende_analyse["sequenzen"], laufende_analyse["äußerer_kontext"],
+            laufende_analyse["meta"]["abhängigkeiten"],
+        )
+        alte_runden = {r["runde"]: r for r in vorher["runden"]}
+
+        for runde in range(1, plan.ab_runde):
+            kopie = {**copy.deepcopy(alte_runden[runde]), "metriken": [], "übernommen": True}
+            laufende_analyse["runden"].append(kopie)
+            if checkpoint is not None:
+                checkpoint.runde_schreiben(kopie)
+
+        übernommen = {}
+        for runde, alte in plan.kontextfrei_übernommen.items():
+            alt = copy.deepcopy(alte_runden[alte])
+            meta1, meta2 = (alt.get("responses_meta") or [{}, {}])[:2]
+            übernommen[runde] = self._wiederverwenden(
+                ((alt["ergebnisse"][0], meta1), (alt["ergebnisse"][1], meta2)), {"von_runde": alte}, "übernommen"
             )
-            ergebnisse_dieser_runde["ergebnisse"].append(konfrontation_mit_kontext)
-            ergebnisse_dieser_runde["responses_meta"].append(meta3)
 
-            laufende_analyse["runden"].append(ergebnisse_dieser_runde)
+        laufende_analyse["meta"]["neuberechnung"] = asdict(plan)
+        if self.verbose:
+            print(
+                f"\nNeuberechnung ab Runde {plan.ab_runde} ({'; '.join(plan.gründe) or 'keine Änderungen'}), "
+                f"Schritte 1 und 2 übernommen für {len(übernommen)} Runden"
+            )
+        return vorher, übernommen
 
+    def _trace_beginnen(
+        self,
+        laufende_analyse: Dict[str, Any],
+        trace: Optional[Union[Path, str, TraceSchreiber]],
+    ) -> Optional[TraceSchreiber]:
+        """Öffnet den zeilenweise geschriebenen Trace und übernimmt bereits fertige Runden."""
+        if trace is None:
+            return None
+        if not isinstance(trace, TraceSchreiber):
+            trace = TraceSchreiber(trace)
+        trace.beginnen({k: v for k, v in laufende_analyse.items() if k != "runden"})
+        for runde in laufende_analyse["runden"]:
+            trace.runde_schreiben(runde)
+        return trace
+
+    def _runde_beginnen(self, runde: int, sequenzen: List[str]) -> Dict[str, Any]:
+        """Legt den Trace-Eintrag einer Runde an."""
+        neue_sequenz = sequenzen[runde - 1]
         if self.verbose:
-            print(f"\n\n=== ENDE ===")
+            print(f"\n\n=== Runde {runde} ===")
+            print("\nNeue Sequenz:")
+            pprint(neue_sequenz)
+
+        return {
+            "runde": runde,
+            "bisheriges_protokoll": " ".join(sequenzen[: runde - 1]),
+            "neue_sequenz": neue_sequenz,
+            "ergebnisse": [],
+            "responses_meta": [],
+        }
+
+    def _runde_abschließen(
+        self,
+        laufende_analyse: Dict[str, Any],
+        ergebnisse_dieser_runde: Dict[str, Any],
+        checkpoint: Optional[RundenCheckpoint],
+        trace: Optional[TraceSchreiber] = None,
+    ) -> None:
+        """Hängt eine fertige Runde an den Trace und sichert sie ggf. im Checkpoint.
+
+        Die Aufrufmetriken wandern dabei aus den Antwort-Metadaten nach
+        ``metriken``, damit sie auch ohne ``responses_meta`` erhalten bleiben.
+        """
+        metas = list(ergebnisse_dieser_runde["responses_meta"])
+        zusammenfassung_meta = ergebnisse_dieser_runde.get("innerer_kontext", {}).get("meta")
+        if zusammenfassung_meta is not None:
+            metas.insert(2, zusammenfassung_meta)
+        if metas:
+            metas[1:1] = metas[0].get("stichproben", [])
+        metas.extend(ergebnisse_dieser_runde.get("spekulation", {}).get("metas", []))
+        ergebnisse_dieser_runde["metriken"] = [meta.pop("metrik") for meta in metas if "metrik" in meta]
+
+        laufende_analyse["runden"].append(ergebnisse_dieser_runde)
+        if checkpoint is not None:
+            checkpoint.runde_schreiben(ergebnisse_dieser_runde)
+        if trace is not None:
+            trace.runde_schreiben(ergebnisse_dieser_runde)
 
-        return SequenzAnalyseErgebnis(data=laufende_analyse)
+    def _metrik_erfassen(
+        self,
+        antwort: Tuple[Any, Dict[str, Any]],
+        stufe: Union[int, str],
+        runde: Optional[int],
+        dauer: float,
+        gewartet: float,
+        retries: int,
+        cache_hit: bool,
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Legt die Metrik eines Aufrufs in dessen Metadaten ab und meldet sie dem Callback."""
+        result, meta = antwort
+        metrik = metrik_aus_meta(meta, stufe, runde, dauer, gewartet, retries, cache_hit)
+        meta["metrik"] = asdict(metrik)
+        if self.metrik_callback is not None:
+            self.metrik_callback(metrik)
+        return result, meta
+
+    def _antwort_auswerten(self, response: Any, schema: Any = None) -> Tuple[Any, Dict[str, Any]]:
+        """Extrahiert Ergebnis und Metadaten und gibt das Ergebnis ggf. aus."""
+        result, meta = _extract_result_and_meta(response, schema)
+        usage = meta.get("usage") or {}
+        if usage:
+            meta["cached_tokens"] = (usage.get("input_tokens_details") or {}).get("cached_tokens", 0)
+        if self.verbose and self.verbose_outputs:
+            pprint(result)
+
+        return result, meta
+
+    def _cache_lesen(self, anfrage: Dict[str, Any], stufe: Union[int, str]) -> Tuple[Optional[str], Optional[Tuple[Any, Dict[str, Any]]]]:
+        """Liefert Cache-Schlüssel und ggf. Treffer; nur Schritt 1 und 2 sind cachebar."""
+        if self.cache is None or stufe not in (1, 2):
+            return None, None
+        # Maßgeblich ist die Temperatur der Anfrage, die ``StufenConfig`` je Schritt überschreiben kann.
+        if (anfrage.get("temperature") or 0) > 0 and not self.config.cache_sampled_outputs:
+            return None, None
+
+        schlüssel = cache_schlüssel(anfrage)
+        treffer = self.cache.get(schlüssel)
+        if treffer is not None and self.verbose and self.verbose_outputs:
+            pprint(treffer[0])
+        return schlüssel, treffer
+
+    def _cache_schreiben(self, schlüssel: Optional[str], result: Any, meta: Dict[str, Any]) -> None:
+        """Legt eine frische Antwort im Cache ab und vermerkt den Fehlgriff."""
+        if schlüssel is None:
+            return
+        self.cache.set(schlüssel, result, meta)
+        meta["cache"] = {"hit": False, "key": schlüssel}
+
+    def _zusammenfassung_stand(self, laufende_analyse: Dict[str, Any]) -> Tuple[str, int]:
+        """Liefert die jüngste Zusammenfassung des inneren Kontexts und bis wohin sie reicht."""
+        for r in reversed(laufende_analyse["runden"]):
+            info = r.get("innerer_kontext", {})
+            if "zusammenfassung" in info:
+                return info["zusammenfassung"], info["zusammengefasst_bis"]
+        return "", 0
+
+    def _zusammenfassung_anfrage(
+        self,
+        runde: int,
+        sequenzen: List[str],
+        laufende_analyse: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """Baut die Anfrage zum Fortschreiben der Zusammenfassung, falls sie fällig ist.
+
+        Fällig ist sie, sobald ``inner_context_summary_interval`` Sequenzen aus
+        dem Fenster herausgewachsen sind, die noch nicht zusammengefasst wurden.
+        """
+        if self.config.inner_context != "summary":
+            return None
+
+        zusammenfassung, bis = self._zusammenfassung_stand(laufende_analyse)
+        fenster = self.config.inner_context_window
+        if runde - 1 - bis < fenster + self.config.inner_context_summary_interval:
+            return None
 
-    def _schritt1(self, neue_sequenz: str) -> Dict[str, Any]:
-        """Erstellt kontextfreie Beispielsituationen zur neuen Sequenz."""
+        if self.verbose:
+            print(f"\nZusammenfassung des inneren Kontexts bis Sequenz {runde - 1 - fenster}")
+
+        eingabe = {
+            "bisherige_zusammenfassung": zusammenfassung,
+            "neue_sequenzen": sequenzen[bis: runde - 1 - fenster],
+        }
+        return {
+            "input": [
+                {"role": "developer", "content": self._prompts.prompt3_kontextzusammenfassung},
+                {"role": "user", "content": _json_kompakt(eingabe)},
+            ],
+            "text_format": Kontextzusammenfassung,
+            **self._common_parse_args("zusammenfassung"),
+        }
+
+    def _innerer_kontext(
+        self,
+        runde: int,
+        sequenzen: List[str],
+        laufende_analyse: Dict[str, Any],
+        ergebnisse_dieser_runde: Dict[str, Any],
+        neue_zusammenfassung: Optional[Tuple[Any, Dict[str, Any]]] = None,
+    ) -> str:
+        """Bildet den inneren Kontext für Schritt 3 gemäß ``config.inner_context``.
+
+        Außer bei "full" wird in der Runde unter ``innerer_kontext`` vermerkt,
+        wie der Kontext gebildet wurde und wie viele Tokens er gegenüber dem
+        vollen Protokoll spart.
+        """
+        bisheriges_protokoll = ergebnisse_dieser_runde["bisheriges_protokoll"]
+        strategie = self.config.inner_context
+        if strategie == "full":
+            return bisheriges_protokoll
+
+        info: Dict[str, Any] = {"strategie": strategie}
+        if strategie == "window":
+            ab = max(0, runde - 1 - self.config.inner_context_window)
+            text = " ".join(sequenzen[ab: runde - 1])
+            if ab:
+                text = f"[Sequenzen 1–{ab} ausgelassen]\n\n[Sequenzen {ab + 1}–{runde - 1} im Wortlaut] {text}"
+            info["wörtlich_ab"] = ab + 1
+        else:
+            zusammenfassung, bis = self._zusammenfassung_stand(laufende_analyse)
+            if neue_zusammenfassung is not None:
+                result, meta = neue_zusammenfassung
+                zusammenfassung = result["zusammenfassung"]
+                bis = runde - 1 - self.config.inner_context_window
+                info["zusammenfassung"] = zusammenfassung
+                info["meta"] = meta
+            text = " ".join(sequenzen[bis: runde - 1])
+            if bis:
+                text = (
+                    f"[Zusammenfassung der Sequenzen 1–{bis}] {zusammenfassung}\n\n"
+                    f"[Sequenzen {bis + 1}–{runde - 1} im Wortlaut] {text}"
+                )
+            info["zusammengefasst_bis"] = bis
+
+        info["tokens"] = tokens_schätzen(text)
+        info["tokens_voll"] = tokens_schätzen(bisheriges_protokoll)
+        ergebnisse_dieser_runde["innerer_kontext"] = info
+        return text
+
+    def _dedup_schlüssel(self, sequenz: str) -> Optional[str]:
+        """Normalisierte Form einer Sequenz für die Deduplizierung; None, wenn abgeschaltet."""
+        if not self.config.deduplicate_sequences:
+            return None
+        text = unicodedata.normalize("NFC", sequenz)
+        if self.config.speaker_tag_pattern:
+            text = re.sub(self.config.speaker_tag_pattern, "", text, count=1)
+        return " ".join(text.split())
+
+    def _memo_suchen(self, sequenz: str, lauf: object) -> Tuple[Optional[str], Optional[Any], Optional[Dict[str, Any]]]:
+        """Liefert Schlüssel sowie ggf. Future/Task und Herkunft eines früheren Aufrufs."""
+        schlüssel = self._dedup_schlüssel(sequenz)
+        eintrag = self._kontextfrei_memo.get(schlüssel) if schlüssel is not None else None
+        if eintrag is None:
+            return schlüssel, None, None
+        self._kontextfrei_memo.move_to_end(schlüssel)
+        future, von_runde, von_lauf = eintrag
+        herkunft: Dict[str, Any] = {"von_runde": von_runde}
+        if von_lauf is not lauf:
+            herkunft["anderes_protokoll"] = True
+        return schlüssel, future, herkunft
+
+    def _memo_merken(self, schlüssel: str, future: Any, runde: int, lauf: object) -> None:
+        """Legt Schritt 1 und 2 einer Sequenz im Memo ab und verdrängt ggf. die ältesten Einträge."""
+        self._kontextfrei_memo[schlüssel] = (future, runde, lauf)
+        self._kontextfrei_memo.move_to_end(schlüssel)
+        if self.config.dedup_memo_size is not None:
+            while len(self._kontextfrei_memo) > self.config.dedup_memo_size:
+                self._kontextfrei_memo.popitem(last=False)
+
+    @staticmethod
+    def _wiederverwenden(
+        ergebnis: Tuple[Tuple[Any, Dict[str, Any]], Tuple[Any, Dict[str, Any]]],
+        herkunft: Dict[str, Any],
+        art: str = "dedupliziert",
+    ) -> Tuple[Tuple[Any, Dict[str, Any]], Tuple[Any, Dict[str, Any]]]:
+        """Übernimmt die Ergebnisse der Schritte 1 und 2 ohne eigene Aufrufmetrik.
+
+        Die Herkunft steht in den Metadaten unter ``art`` ("dedupliziert" oder
+        "übernommen" bei einer Neuberechnung).
+        """
+        def ohne_metrik(meta: Dict[str, Any]) -> Dict[str, Any]:
+            kopie = {k: v for k, v in meta.items() if k != "metrik"}
+            if "stichproben" in kopie:
+                kopie["stichproben"] = [ohne_metrik(m) for m in kopie["stichproben"]]
+            return kopie
+
+        (s1, meta1), (s2, meta2) = ergebnis
+        return tuple(
+            (result, {**ohne_metrik(meta), art: herkunft})
+            for result, meta in ((s1, meta1), (s2, meta2))
+        )
+
+    def _spekulation_aktiv(self) -> bool:
+        """Spekulation setzt einen inneren Kontext voraus, der nicht von Schritt 3 abhängt."""
+        if self.config.speculative_stage3 and self.config.inner_context == "summary":
+            raise ValueError('speculative_stage3 ist mit inner_context="summary" nicht kombinierbar.')
+        return self.config.speculative_stage3
+
+    def _entwurf_anfrage(self, anfrage: Dict[str, Any]) -> Dict[str, Any]:
+        """Günstigere Variante einer Schritt-3-Anfrage für den spekulativen Entwurf."""
+        return {
+            **anfrage,
+            "model": self.config.speculative_model or self.config.model,
+            "reasoning": {**anfrage["reasoning"], "effort": self.config.speculative_reasoning_effort},
+        }
+
+    @staticmethod
+    def _hypothese(ergebnis: Dict[str, Any]) -> str:
+        """Fallstrukturhypothese, die Schritt 3 an die nächste Runde weitergibt."""
+        return ergebnis.get("erste_fallstrukturhypothese") or ergebnis.get("neue_fallstrukturhypothese") or ""
+
+    def _spekulative_anfrage(
+        self,
+        runde: int,
+        letzte_runde: int,
+        sequenzen: List[str],
+        äußerer_kontext: str,
+        entwurf: Dict[str, Any],
+        kontextfreie_lesarten: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Baut die Schritt-3-Anfrage für ``runde`` auf Basis des Entwurfs der Vorrunde."""
+        vorläufig = {"sequenzen": sequenzen, "runden": [None] * (runde - 2) + [{"ergebnisse": [None, None, entwurf]}]}
+        innerer_kontext = self._innerer_kontext(
+            runde, sequenzen, vorläufig, {"bisheriges_protokoll": " ".join(sequenzen[: runde - 1])}
+        )
+        return self._schritt3_anfrage(
+            runde=runde,
+            letzte_runde=letzte_runde,
+            neue_sequenz=sequenzen[runde - 1],
+            bisheriges_protokoll=innerer_kontext,
+            äußerer_kontext=äußerer_kontext,
+            laufende_analyse=vorläufig,
+            kontextfreie_lesarten=kontextfreie_lesarten,
+        )
+
+    def _spekulation_prüfen(
+        self,
+        laufende_analyse: Dict[str, Any],
+        runde: int,
+        entwurf_hypothese: str,
+    ) -> Tuple[bool, float]:
+        """Vergleicht die endgültige Hypothese der Vorrunde mit dem Entwurf."""
+        endgültig = self._hypothese(laufende_analyse["runden"][runde - 2]["ergebnisse"][2])
+        ähnlichkeit = difflib.SequenceMatcher(None, endgültig.split(), entwurf_hypothese.split()).ratio()
+        return ähnlichkeit >= self.config.speculative_min_similarity, round(ähnlichkeit, 3)
+
+    def _schritt1_anfrage(self, neue_sequenz: str) -> Dict[str, Any]:
+        """Baut die Anfrage für Schritt 1 (Beispielsituationen)."""
         if self.verbose:
             print('\nSchritt 1: Beispielsituationen erzählen ("kontextfrei")')
 
-        response = self.client.responses.parse(
-            input=[
+        return {
+            "input": [
                 {"role": "developer", "content": self._prompts.prompt1_beispielsituationen},
                 {"role": "user", "content": neue_sequenz},
             ],
-            text_format=Beispielsituationen,
-            **self._common_parse_args(),
-        )
-        result, meta = _extract_result_and_meta(response)
-        if self.verbose and self.verbose_outputs:
-            pprint(result)
+            "text_format": Beispielsituationen,
+            **self._common_parse_args(1),
+        }
 
-        return result, meta
+    def _stichproben_anfragen(self, neue_sequenz: str) -> List[Dict[str, Any]]:
+        """Teilt Schritt 1 bei ``stage1_samples`` > 1 in kürzere Anfragen mit je eigener Anregung."""
+        anfrage = self._schritt1_anfrage(neue_sequenz)
+        anzahl = self.config.stage1_samples
+        if anzahl <= 1:
+            return [anfrage]
+        return [
+            {
+                **anfrage,
+                "input": [
+                    *anfrage["input"],
+                    {
+                        "role": "user",
+                        "content": (
+                            f"Teilaufgabe {i + 1} von {anzahl}: Erfinde abweichend von der Anzahl oben genau "
+                            f"{self.config.stage1_situations_per_sample} Beispielsituationen. Die übrigen "
+                            "Teilaufgaben laufen parallel; wähle deine Situationen bevorzugt aus dem Bereich "
+                            f"„{_LEBENSBEREICHE[i % len(_LEBENSBEREICHE)]}“."
+                        ),
+                    },
+                ],
+            }
+            for i in range(anzahl)
+        ]
 
+    def _stichproben_zusammenführen(
+        self, antworten: List[Union[Tuple[Any, Dict[str, Any]], BaseException]]
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Führt die Stichproben aus Schritt 1 zusammen und entfernt Beinahe-Dubletten.
 
-    def _schritt2(self, situationenerzählungen: Dict[str, Any]) -> Dict[str, Any]:
-        """Leitet kontextfreie Lesarten aus den Beispielsituationen ab."""
+        Fehlgeschlagene Stichproben werden übergangen, solange eine gelungen
+        ist. Die Metadaten der einzelnen Aufrufe liegen unter ``stichproben``,
+        die Zusammenführung samt Diversität (mittlere paarweise Unähnlichkeit
+        der Szenen) unter ``zusammenführung``.
+        """
+        gelungen = [a for a in antworten if not isinstance(a, BaseException)]
+        if not gelungen:
+            raise antworten[0]
+        if len(antworten) == 1:
+            return gelungen[0]
+
+        behalten: List[Dict[str, Any]] = []
+        normalisiert: List[Tuple[str, str]] = []
+        dubletten = []
+        for result, _ in gelungen:
+            for situation in result["beispielsituationen"]:
+                titel, szene = _normalisieren(situation["titel"]), _normalisieren(situation["szene"])
+                for j, (titel_b, szene_b) in enumerate(normalisiert):
+                    if titel == titel_b or _ähnlichkeit(szene, szene_b) >= self.config.stage1_duplicate_similarity:
+                        dubletten.append({"titel": situation["titel"], "ähnlich_zu": behalten[j]["titel"]})
+                        break
+                else:
+                    behalten.append(situation)
+                    normalisiert.append((titel, szene))
+
+        paare = [(a[1], b[1]) for i, a in enumerate(normalisiert) for b in normalisiert[i + 1:]]
+        meta = {
+            "stichproben": [meta for _, meta in gelungen],
+            "zusammenführung": {
+                "stichproben": len(antworten),
+                "fehlgeschlagen": len(antworten) - len(gelungen),
+                "erzeugt": len(behalten) + len(dubletten),
+                "behalten": len(behalten),
+                "dubletten": dubletten,
+                "diversität": round(1 - sum(_ähnlichkeit(a, b) for a, b in paare) / len(paare), 3) if paare else None,
+            },
+        }
+        return {"beispielsituationen": behalten}, meta
+
+    def _schritt2_anfrage(self, situationenerzählungen: Dict[str, Any]) -> Dict[str, Any]:
+        """Baut die Anfrage für Schritt 2 (Lesarten)."""
         if self.verbose:
             print('\nSchritt 2: Lesartenbildung ("kontextfrei")')
 
-        response = self.client.responses.parse(
-            input=[
+        return {
+            "input": [
                 {"role": "developer", "content": self._prompts.prompt2_lesarten},
-                {"role": "user", "content": str(situationenerzählungen)},
+                {"role": "user", "content": _json_kompakt(situationenerzählungen)},
             ],
-            text_format=KontextfreieLesarten,
-            **self._common_parse_args(),
-        )
-        result, meta = _extract_result_and_meta(response)
-        if self.verbose and self.verbose_outputs:
-            pprint(result)
-
-        return result, meta
-    
+            "text_format": KontextfreieLesarten,
+            **self._common_parse_args(2),
+        }
 
-    def _schritt3(
+    def _schritt3_anfrage(
         self,
         runde: int,
         letzte_runde: int,
@@ -249,7 +902,7 @@ class SequenzAnalyse:
         laufende_analyse: Dict[str, Any],
         kontextfreie_lesarten: Dict[str, Any],
     ) -> Dict[str, Any]:
-        """Konfrontiert Lesarten mit Kontext und erzeugt Fallstrukturhypothesen."""
+        """Baut die Anfrage für Schritt 3 (Konfrontation mit dem Kontext)."""
         if self.verbose:
             print("\nSchritt 3: Kontrastierung mit dem tatsächlichen Kontext")
 
@@ -280,37 +933,9 @@ class SequenzAnalyse:
             kontext.pop("erwartete_fortführungen")
             kontext.pop("alte_fallstrukturhypothese")
         
-        rundeundziel = (
-            self._prompts.prompt3_konfrontation_rundeundziel_anfang if runde == 1
-            else self._prompts.prompt3_konfrontation_rundeundziel_mitte if runde < letzte_runde
-            else self._prompts.prompt3_konfrontation_rundeundziel_ende
-        )
-
-        eingabe = (
-            self._prompts.prompt3_konfrontation_eingabe_anfang if runde == 1
-            else self._prompts.prompt3_konfrontation_eingabe_mitte_ende
-        )
-
-        aufgabe = (
-            self._prompts.prompt3_konfrontation_aufgabe_anfang if runde == 1
-            else self._prompts.prompt3_konfrontation_aufgabe_mitte if runde < letzte_runde
-            else self._prompts.prompt3_konfrontation_aufgabe_ende
-        )
-
-        ausgabe = (
-            self._prompts.prompt3_konfrontation_ausgabe_anfang if runde == 1
-            else self._prompts.prompt3_konfrontation_ausgabe_mitte if runde < letzte_runde
-            else self._prompts.prompt3_konfrontation_ausgabe_ende
-        )
-    
-        dev_prompt = (
-            self._prompts.prompt3_konfrontation_template.replace("[RUNDE]", str(runde))
-            .replace("[RUNDEUNDZIEL]", rundeundziel)
-            .replace("[EINGABE]", eingabe)
-            .replace("[AUFGABE]", aufgabe)
-            .replace("[AUSGABE]", ausgabe)
-            .strip()
-        )
+        rundentyp = "anfang" if runde == 1 else "mitte" if runde < letzte_runde else "ende"
+        prefix_cache = self.config.stage3_layout == "prefix_cache"
+        dev_prompt = self._prompts.konfrontation_prompt(rundentyp, "`runde` (siehe Input)" if prefix_cache else str(runde))
 
         schema = (
             KonfrontationMitKontextErsteRunde if runde == 1
@@ -318,21 +943,569 @@ class SequenzAnalyse:
             else KonfrontationMitKontextLetzteRunde
         )
 
-        response = self.client.responses.parse(
-            input=[
+        if prefix_cache:
+            return self._schritt3_anfrage_prefix_cache(runde, dev_prompt, kontext, schema, laufende_analyse)
+
+        return {
+            "input": [
                 {"role": "developer", "content": dev_prompt},
-                {"role": "user", "content": str(kontext)},
+                {"role": "user", "content": _json_kompakt(kontext)},
             ],
-            text_format=schema,
-            **self._common_parse_args(),
+            "text_format": schema,
+            **self._common_parse_args(3),
+        }
+
+    def _schritt3_anfrage_prefix_cache(
+        self,
+        runde: int,
+        dev_prompt: str,
+        kontext: Dict[str, Any],
+        schema: Any,
+        laufende_analyse: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Ordnet die Nachrichten für Schritt 3 so, dass der Präfix über Runden stabil bleibt.
+
+        Reihenfolge: Anweisungen (je Rundentyp fest), äußerer Kontext, inneres
+        Protokoll (wächst nur am Ende), danach alles Rundenspezifische. Die
+        Kontexte werden als Klartext statt eingebettet im JSON übergeben, damit sich
+        ihr Anfang nicht durch Quoting-Wechsel verschiebt.
+        """
+        kontext = dict(kontext)
+        tatsächlicher_kontext = kontext.pop("tatsächlicher_kontext")
+
+        nachrichten = [
+            {"role": "developer", "content": dev_prompt},
+            {
+                "role": "user",
+                "content": f"tatsächlicher_kontext.äußerer_kontext:\n{tatsächlicher_kontext['äußerer_kontext']}",
+            },
+        ]
+        if "innerer_kontext" in tatsächlicher_kontext:
+            nachrichten.append({
+                "role": "user",
+                "content": f"tatsächlicher_kontext.innerer_kontext:\n{tatsächlicher_kontext['innerer_kontext']}",
+            })
+        nachrichten.append({"role": "user", "content": _json_kompakt({"runde": runde, **kontext})})
+
+        # Ein Schlüssel je Protokoll, unabhängig vom Rundentyp: Die Anweisungen wechseln nach
+        # Runde 1, äußerer Kontext und inneres Protokoll bleiben der gemeinsame Präfix.
+        sequenzen = laufende_analyse["sequenzen"]
+        routing = "\x00".join([tatsächlicher_kontext["äußerer_kontext"], str(len(sequenzen)), sequenzen[0]])
+        return {
+            "input": nachrichten,
+            "text_format": schema,
+            "prompt_cache_key": "sequenzanalyse-" + hashlib.sha256(routing.encode("utf-8")).hexdigest()[:32],
+            **self._common_parse_args(3),
+        }
+
+
+class SequenzAnalyse(_SequenzAnalyseBasis):
+    """Führt die Sequenzanalyse für eine Liste von Sequenzen aus."""
+
+    def __init__(
+        self,
+        client: Optional[OpenAI] = None,
+        config: Optional[SequenzAnalyseConfig] = None,
+        verbose: bool = True,
+        verbose_outputs: bool = False,
+        cache: Optional[AntwortCache] = None,
+        metrik_callback: Optional[MetrikCallback] = None,
+    ) -> None:
+        super().__init__(
+            config=config,
+            verbose=verbose,
+            verbose_outputs=verbose_outputs,
+            cache=cache,
+            metrik_callback=metrik_callback,
         )
-        result, meta = _extract_result_and_meta(response)
-        if self.verbose and self.verbose_outputs:
-            pprint(result)
+        self.client = client
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._stichproben_pool: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
 
-        return result, meta
+    def close(self) -> None:
+        """Beendet die Hintergrund-Threads der Instanz.
+
+        Wartet auf noch laufende unterlegene Hedging-Anfragen und Stichproben
+        aus Schritt 1. Die Instanz bleibt nutzbar; benötigte Pools werden bei
+        Bedarf neu angelegt.
+        """
+        with self._hedge_lock:
+            pools = [self._hedge_pool, self._stichproben_pool]
+            self._hedge_pool = self._stichproben_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "SequenzAnalyse":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def analyse(
+        self,
+        sequenzen: List[str],
+        äußerer_kontext: str,
+        checkpoint: Optional[Union[Path, str]] = None,
+        resume: bool = False,
+        trace: Optional[Union[Path, str, TraceSchreiber]] = None,
+        vorher: Optional[Union[SequenzAnalyseErgebnis, Dict[str, Any], Path, str]] = None,
+    ) -> SequenzAnalyseErgebnis:
+        """Analysiert Sequenzen gegen einen äußeren Kontext und sammelt Ergebnisse.
+
+        Mit ``checkpoint`` wird jede abgeschlossene Runde sofort in eine
+        JSONL-Datei geschrieben; ``resume=True`` setzt eine abgebrochene
+        Analyse aus dieser Datei bei der ersten fehlenden Runde fort.
+        ``trace`` schreibt den Trace ebenfalls rundenweise (bei ``.gz``
+        komprimiert), siehe ``TraceSchreiber``.
+
+        Mit ``vorher`` (Ergebnis, Trace-Daten oder Pfad eines Traces einer
+        früheren Analyse) wird nur neu berechnet, was von geänderten Sequenzen,
+        äußerem Kontext, Prompts oder Einstellungen abhängt: Runden vor der
+        ersten betroffenen werden unverändert übernommen, Schritt 1 und 2
+        laufen nur für geänderte Sequenzen. Grenze und Hypothesen-Diff stehen
+        unter ``meta["neuberechnung"]``.
+        """
+        for ereignis in self.analyse_iter(
+            sequenzen, äußerer_kontext, checkpoint=checkpoint, resume=resume, trace=trace, vorher=vorher
+        ):
+            pass
+        return ereignis.daten
+
+    def analyse_iter(
+        self,
+        sequenzen: List[str],
+        äußerer_kontext: str,
+        checkpoint: Optional[Union[Path, str]] = None,
+        resume: bool = False,
+        stufen: bool = False,
+        trace: Optional[Union[Path, str, TraceSchreiber]] = None,
+        vorher: Optional[Union[SequenzAnalyseErgebnis, Dict[str, Any], Path, str]] = None,
+    ) -> Iterator[AnalyseEreignis]:
+        """Wie ``analyse``, liefert aber jede fertige (neu berechnete) Runde sofort als Ereignis.
+
+        Mit ``stufen=True`` kommen zusätzlich die Ergebnisse der einzelnen
+        Schritte. Das letzte Ereignis (``art="ende"``) trägt das vollständige
+        ``SequenzAnalyseErgebnis``.
+        """
+        if vorher is not None and resume:
+            raise ValueError("vorher und resume=True schließen sich aus.")
+        # Vor dem Anlegen von Checkpoint und Trace prüfen, damit eine ungültige Einstellung keine Dateien hinterlässt.
+        spekulativ = self._spekulation_aktiv()
+        laufende_analyse, checkpoint = self._analyse_beginnen(sequenzen, äußerer_kontext, checkpoint, resume)
+        übernommen: Dict[int, Any] = {}
+        if vorher is not None:
+            vorher, übernommen = self._neuberechnung_beginnen(laufende_analyse, vorher, checkpoint)
+        trace = self._trace_beginnen(laufende_analyse, trace)
+        letzte_runde = len(sequenzen)
+        erste_runde = len(laufende_analyse["runden"]) + 1
+
+        kontextfreie_runden = self._kontextfreie_runden(sequenzen[erste_runde - 1:], erste_runde, übernommen)
+        spekulation = _Spekulation(self, sequenzen, äußerer_kontext) if spekulativ else None
+        vorgezogen: deque = deque()
+        try:
+            for runde, neue_sequenz in enumerate(sequenzen[erste_runde - 1:], erste_runde):
+                ergebnisse_dieser_runde = self._runde_beginnen(runde, sequenzen)
+
+                (situationenerzählungen, meta1), (kontextfreie_lesarten, meta2) = (
+                    vorgezogen.popleft() if vorgezogen else next(kontextfreie_runden)
+                )
+                if spekulation is not None:
+                    # Die Entwurfskette braucht die kontextfreien Lesarten der kommenden Runden.
+                    while len(vorgezogen) < min(self.config.speculative_depth, letzte_runde - runde):
+                        vorgezogen.append(next(kontextfreie_runden))
+                        spekulation.lesarten_melden(runde + len(vorgezogen), vorgezogen[-1][1][0])
+                ergebnisse_dieser_runde["ergebnisse"].append(situationenerzählungen)
+                ergebnisse_dieser_runde["responses_meta"].append(meta1)
+                ergebnisse_dieser_runde["ergebnisse"].append(kontextfreie_lesarten)
+                ergebnisse_dieser_runde["responses_meta"].append(meta2)
+                if stufen:
+                    yield AnalyseEreignis("stufe", runde, situationenerzählungen, stufe=1, meta=meta1)
+                    yield AnalyseEreignis("stufe", runde, kontextfreie_lesarten, stufe=2, meta=meta2)
+
+                zusammenfassung_anfrage = self._zusammenfassung_anfrage(runde, sequenzen, laufende_analyse)
+                neue_zusammenfassung = (
+                    self._aufruf(zusammenfassung_anfrage, stufe="zusammenfassung", runde=runde)
+                    if zusammenfassung_anfrage is not None else None
+                )
+                innerer_kontext = self._innerer_kontext(
+                    runde, sequenzen, laufende_analyse, ergebnisse_dieser_runde, neue_zusammenfassung
+                )
+
+                schritt3 = dict(
+                    runde=runde,
+                    letzte_runde=letzte_runde,
+                    neue_sequenz=neue_sequenz,
+                    bisheriges_protokoll=innerer_kontext,
+                    äußerer_kontext=äußerer_kontext,
+                    laufende_analyse=laufende_analyse,
+                    kontextfreie_lesarten=kontextfreie_lesarten,
+                )
+                if spekulation is not None:
+                    konfrontation_mit_kontext, meta3 = spekulation.schritt3(ergebnisse_dieser_runde, schritt3)
+                else:
+                    konfrontation_mit_kontext, meta3 = self._schritt3(**schritt3)
+                ergebnisse_dieser_runde["ergebnisse"].append(konfrontation_mit_kontext)
+                ergebnisse_dieser_runde["responses_meta"].append(meta3)
+                if stufen:
+                    yield AnalyseEreignis("stufe", runde, konfrontation_mit_kontext, stufe=3, meta=meta3)
+
+                self._runde_abschließen(laufende_analyse, ergebnisse_dieser_runde, checkpoint, trace)
+                yield AnalyseEreignis("runde", runde, ergebnisse_dieser_runde)
+        finally:
+            kontextfreie_runden.close()
+            if spekulation is not None:
+                spekulation.schließen()
+            if trace is not None:
+                trace.schließen()
+
+        if vorher is not None:
+            laufende_analyse["meta"]["neuberechnung"]["hypothesen_diff"] = hypothesen_diff(vorher, laufende_analyse)
+        if self.verbose:
+            print(f"\n\n=== ENDE ===")
+
+        yield AnalyseEreignis("ende", None, SequenzAnalyseErgebnis(data=laufende_analyse))
+
+    def _aufruf(
+        self,
+        anfrage: Dict[str, Any],
+        stufe: Union[int, str],
+        runde: Optional[int] = None,
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Schickt eine Anfrage an die Responses-API und wertet die Antwort aus."""
+        start = time.perf_counter()
+        schlüssel, treffer = self._cache_lesen(anfrage, stufe)
+        if treffer is not None:
+            return self._metrik_erfassen(treffer, stufe, runde, time.perf_counter() - start, 0.0, 0, cache_hit=True)
+
+        gewartet = 0.0
+        wiederholungen = 0
+        verlauf: Dict[str, Any] = {}
+        while True:
+            try:
+                response = self._parse(anfrage, stufe, verlauf)
+                result, meta = self._antwort_auswerten(response, anfrage.get("text_format"))
+                break
+            except Exception as exc:
+                geändert = self._nach_fehler(anfrage, stufe, exc, verlauf)
+                if geändert is not None:
+                    anfrage = geändert
+                    continue
+                if wiederholungen >= self.config.max_retries or not ist_wiederholbar(exc):
+                    raise
+                pause = wartezeit(wiederholungen, self.config, exc)
+                wiederholungen += 1
+                gewartet += pause
+                time.sleep(pause)
+
+        meta.update(verlauf)
+        meta["input_tokens_geschätzt"] = eingabe_tokens_schätzen(anfrage)
+        self._cache_schreiben(schlüssel, result, meta)
+        return self._metrik_erfassen(
+            (result, meta), stufe, runde, time.perf_counter() - start, gewartet, wiederholungen, cache_hit=False
+        )
+
+    def _parse_gemessen(self, anfrage: Dict[str, Any], stufe: Union[int, str]) -> Any:
+        start = time.perf_counter()
+        response = self.client.responses.parse(**anfrage)
+        self._latenzen.erfassen(stufe, time.perf_counter() - start)
+        return response
+
+    def _parse(self, anfrage: Dict[str, Any], stufe: Union[int, str], verlauf: Dict[str, Any]) -> Any:
+        """Ruft ``responses.parse`` auf, bei Überschreiten der Hedging-Frist doppelt.
+
+        Die unterlegene Anfrage läuft im Hintergrund zu Ende (``close`` wartet
+        auf sie); ihr Ergebnis wird verworfen.
+        """
+        frist = self._hedge_frist(stufe)
+        if frist is None:
+            return self._parse_gemessen(anfrage, stufe)
+
+        with self._hedge_lock:
+            if self._hedge_pool is None:
+                # Je gleichzeitigem Aufruf (Schritt 3 und die vorgezogenen Schritte 1/2) zwei Anfragen
+                gleichzeitig = 1 + self.config.max_workers * max(1, self.config.stage1_samples)
+                self._hedge_pool = ThreadPoolExecutor(
+                    max_workers=2 * gleichzeitig, thread_name_prefix="sequenzanalyse-hedge"
+                )
+        erster = self._hedge_pool.submit(self._parse_gemessen, anfrage, stufe)
+        if wait([erster], timeout=frist).done:
+            return erster.result()
+
+        zweiter = self._hedge_pool.submit(self._parse_gemessen, anfrage, stufe)
+        verlauf["hedge"] = {"frist": round(frist, 3), "gewinner": None}
+        offen = [erster, zweiter]
+        while True:
+            fertig, _ = wait(offen, return_when=FIRST_COMPLETED)
+            for future in fertig:
+                offen.remove(future)
+                if future.exception() is None:
+                    verlauf["hedge"]["gewinner"] = 1 if future is erster else 2
+                    return future.result()
+                if not offen:
+                    raise future.exception()
+
+    def _kontextfrei(self, neue_sequenz: str, runde: Optional[int] = None) -> Tuple[Tuple[Any, Dict[str, Any]], Tuple[Any, Dict[str, Any]]]:
+        """Führt die kontextfreien Schritte 1 und 2 für eine Sequenz aus."""
+        situationenerzählungen, meta1 = self._schritt1(neue_sequenz, runde)
+        kontextfreie_lesarten, meta2 = self._schritt2(situationenerzählungen, runde)
+        return (situationenerzählungen, meta1), (kontextfreie_lesarten, meta2)
+
+    def _kontextfreie_runden(
+        self,
+        sequenzen: List[str],
+        erste_runde: int = 1,
+        übernommen: Optional[Dict[int, Tuple[Tuple[Any, Dict[str, Any]], Tuple[Any, Dict[str, Any]]]]] = None,
+    ) -> Iterator[Tuple[Tuple[Any, Dict[str, Any]], Tuple[Any, Dict[str, Any]]]]:
+        """Liefert die Ergebnisse der Schritte 1 und 2 in Rundenreihenfolge.
+
+        Im Modus "pipelined" laufen die Aufrufe in einem Thread-Pool bis zu
+        ``lookahead`` Sequenzen vor der aktuell von Schritt 3 bearbeiteten Runde.
+        Mit ``deduplicate_sequences`` werden bereits gesehene Sequenzen aus dem
+        Memo der Instanz bedient. Runden in ``übernommen`` (Neuberechnung)
+        kommen ohne Aufruf aus der früheren Analyse.
+        """
+        lauf = object()
+        übernommen = übernommen or {}
+
+        def holen(future: Future, schlüssel: Optional[str], herkunft: Optional[Dict[str, Any]]) -> Any:
+            try:
+                ergebnis = future.result()
+            except BaseException:
+                if schlüssel is not None and self._kontextfrei_memo.get(schlüssel, (None,))[0] is future:
+                    del self._kontextfrei_memo[schlüssel]
+                raise
+            return self._wiederverwenden(ergebnis, herkunft) if herkunft is not None else ergebnis
+
+        if self.config.execution_mode != "pipelined":
+            for runde, neue_sequenz in enumerate(sequenzen, erste_runde):
+                if runde in übernommen:
+                    yield übernommen[runde]
+                    continue
+                schlüssel, future, herkunft = self._memo_suchen(neue_sequenz, lauf)
+                if future is None:
+                    future = Future()
+                    try:
+                        future.set_result(self._kontextfrei(neue_sequenz, runde))
+                    except BaseException as exc:
+                        future.set_exception(exc)
+                    if schlüssel is not None:
+                        self._memo_merken(schlüssel, future, runde, lauf)
+                yield holen(future, schlüssel, herkunft)
+            return
+
+        lookahead = self.config.lookahead or len(sequenzen)
+        ausstehend = enumerate(sequenzen, erste_runde)
+        pool = ThreadPoolExecutor(max_workers=self.config.max_workers)
+
+        def starten(runde: int, neue_sequenz: str) -> Tuple[Future, Optional[str], Optional[Dict[str, Any]]]:
+            if runde in übernommen:
+                future = Future()
+                future.set_result(übernommen[runde])
+                return future, None, None
+            schlüssel, future, herkunft = self._memo_suchen(neue_sequenz, lauf)
+            if future is None:
+                future = pool.submit(self._kontextfrei, neue_sequenz, runde)
+                if schlüssel is not None:
+                    self._memo_merken(schlüssel, future, runde, lauf)
+            return future, schlüssel, herkunft
+
+        try:
+            futures = deque(starten(runde, s) for _, (runde, s) in zip(range(lookahead), ausstehend))
+            while futures:
+                ergebnis = holen(*futures.popleft())
+                nächste = next(ausstehend, None)
+                if nächste is not None:
+                    futures.append(starten(*nächste))
+                yield ergebnis
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _schritt1(self, neue_sequenz: str, runde: Optional[int] = None) -> Dict[str, Any]:
+        """Erstellt kontextfreie Beispielsituationen zur neuen Sequenz (ggf. in parallelen Stichproben)."""
+        anfragen = self._stichproben_anfragen(neue_sequenz)
+        if len(anfragen) == 1:
+            return self._aufruf(anfragen[0], stufe=1, runde=runde)
+
+        with self._hedge_lock:
+            if self._stichproben_pool is None:
+                # Im Modus "pipelined" laufen bis zu ``max_workers`` Sequenzen gleichzeitig durch Schritt 1.
+                sequenzen = self.config.max_workers if self.config.execution_mode == "pipelined" else 1
+                self._stichproben_pool = ThreadPoolExecutor(
+                    max_workers=sequenzen * self.config.stage1_samples, thread_name_prefix="sequenzanalyse-stichproben"
+                )
+        futures = [self._stichproben_pool.submit(self._aufruf, anfrage, 1, runde) for anfrage in anfragen]
+        wait(futures)
+        return self._stichproben_zusammenführen([f.exception() or f.result() for f in futures])
+
+    def _schritt2(self, situationenerzählungen: Dict[str, Any], runde: Optional[int] = None) -> Dict[str, Any]:
+        """Leitet kontextfreie Lesarten aus den Beispielsituationen ab."""
+        return self._aufruf(self._schritt2_anfrage(situationenerzählungen), stufe=2, runde=runde)
+
+    def _schritt3(
+        self,
+        runde: int,
+        letzte_runde: int,
+        neue_sequenz: str,
+        bisheriges_protokoll: str,
+        äußerer_kontext: str,
+        laufende_analyse: Dict[str, Any],
+        kontextfreie_lesarten: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Konfrontiert Lesarten mit Kontext und erzeugt Fallstrukturhypothesen."""
+        return self._aufruf(
+            self._schritt3_anfrage(
+                runde=runde,
+                letzte_runde=letzte_runde,
+                neue_sequenz=neue_sequenz,
+                bisheriges_protokoll=bisheriges_protokoll,
+                äußerer_kontext=äußerer_kontext,
+                laufende_analyse=laufende_analyse,
+                kontextfreie_lesarten=kontextfreie_lesarten,
+            ),
+            stufe=3,
+            runde=runde,
+        )
+
+
+class _Spekulation:
+    """Spekulative Ausführung von Schritt 3 während einer synchronen Analyse.
+
+    Eine Entwurfskette läuft in einem Hintergrund-Thread mit günstigen
+    Entwürfen von Schritt 3 bis zu ``speculative_depth`` Runden voraus und
+    startet für jede Runde den eigentlichen Schritt 3 vorab, mit der
+    Entwurfshypothese der Vorrunde. Erreicht die Analyse diese Runde, prüft
+    ``_spekulation_prüfen`` das Vorab-Ergebnis gegen die endgültige Hypothese.
+    Wird es verworfen, ist die ganze Kette ungültig und beginnt neu mit der
+    endgültigen Anfrage.
+    """
+
+    def __init__(self, sa: "SequenzAnalyse", sequenzen: List[str], äußerer_kontext: str) -> None:
+        self.sa = sa
+        self.sequenzen = sequenzen
+        self.äußerer_kontext = äußerer_kontext
+        self.letzte_runde = len(sequenzen)
+        self.tiefe = sa.config.speculative_depth
+        self.pool = ThreadPoolExecutor(max_workers=2 * (self.tiefe + 1))
+        self.bedingung = threading.Condition()
+        self.lesarten: Dict[int, Dict[str, Any]] = {}
+        # Runde -> (Future des Vorab-Aufrufs, Entwurfshypothese und -metadaten der Vorrunde)
+        self.vorab: Dict[int, Tuple[Future, str, Dict[str, Any]]] = {}
+        self.verworfen: List[Future] = []
+        self.verworfene_metas: List[Dict[str, Any]] = []
+        self.kettenfehler: List[str] = []
+        self.aktuelle_runde = 0
+        self.generation = 0
+        self.kette_aktiv = False
+
+    def lesarten_melden(self, runde: int, kontextfreie_lesarten: Dict[str, Any]) -> None:
+        with self.bedingung:
+            self.lesarten[runde] = kontextfreie_lesarten
+            self.bedingung.notify_all()
+
+    def _kette(self, generation: int, runde: int, anfrage: Dict[str, Any]) -> None:
+        try:
+            while runde < self.letzte_runde:
+                result, meta = self.sa._aufruf(self.sa._entwurf_anfrage(anfrage), "entwurf", runde)
+                nächste = runde + 1
+                with self.bedingung:
+                    self.bedingung.wait_for(
+                        lambda: generation != self.generation
+                        or (nächste in self.lesarten and nächste - self.aktuelle_runde <= self.tiefe)
+                    )
+                    if generation != self.generation:
+                        self.verworfene_metas.append(meta)
+                        return
+                    lesarten = self.lesarten[nächste]
+                anfrage = self.sa._spekulative_anfrage(
+                    nächste, self.letzte_runde, self.sequenzen, self.äußerer_kontext, result, lesarten
+                )
+                with self.bedingung:
+                    if generation != self.generation:
+                        self.verworfene_metas.append(meta)
+                        return
+                    self.vorab[nächste] = (self.pool.submit(self.sa._aufruf, anfrage, 3, nächste), self.sa._hypothese(result), meta)
+                    self.bedingung.notify_all()
+                runde = nächste
+        except Exception as exc:
+            # Ohne Entwurfskette läuft Schritt 3 regulär weiter; der Fehler landet im Trace.
+            with self.bedingung:
+                self.kettenfehler.append(repr(exc))
+        finally:
+            with self.bedingung:
+                if generation == self.generation:
+                    self.kette_aktiv = False
+                self.bedingung.notify_all()
+
+    def _verwerfen(self) -> None:
+        """Macht die laufende Entwurfskette ungültig (Aufrufer hält die Bedingung)."""
+        self.generation += 1
+        self.kette_aktiv = False
+        for future, _, meta in self.vorab.values():
+            self.verworfen.append(future)
+            self.verworfene_metas.append(meta)
+        self.vorab.clear()
+        self.bedingung.notify_all()
+
+    def schritt3(self, ergebnisse_dieser_runde: Dict[str, Any], schritt3: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+        """Liefert Schritt 3 der Runde, vorab berechnet oder regulär, und hält die Kette am Laufen."""
+        runde = schritt3["runde"]
+        with self.bedingung:
+            self.aktuelle_runde = runde
+            self.bedingung.notify_all()
+            self.bedingung.wait_for(lambda: runde in self.vorab or not self.kette_aktiv)
+            eintrag = self.vorab.pop(runde, None)
+
+        ergebnis: Optional[Tuple[Any, Dict[str, Any]]] = None
+        info: Dict[str, Any] = {"spekuliert": False, "metas": []}
+        if eintrag is not None:
+            vorab, entwurf_hypothese, entwurf_meta = eintrag
+            behalten, ähnlichkeit = self.sa._spekulation_prüfen(schritt3["laufende_analyse"], runde, entwurf_hypothese)
+            info = {"spekuliert": True, "behalten": behalten, "ähnlichkeit": ähnlichkeit, "metas": [entwurf_meta]}
+            if behalten:
+                try:
+                    ergebnis = vorab.result()
+                except Exception as exc:
+                    info.update(behalten=False, fehler=repr(exc))
+            if ergebnis is None:
+                with self.bedingung:
+                    self.verworfen.append(vorab)
+                    self._verwerfen()
+
+        anfrage = self.sa._schritt3_anfrage(**schritt3)
+        with self.bedingung:
+            if not self.kette_aktiv and runde < self.letzte_runde and runde + 1 not in self.vorab:
+                self.kette_aktiv = True
+                self.pool.submit(self._kette, self.generation, runde, anfrage)
+        if ergebnis is None:
+            ergebnis = self.sa._aufruf(anfrage, stufe=3, runde=runde)
+
+        # Fertige verworfene Aufrufe werden der aktuellen Runde zugerechnet.
+        with self.bedingung:
+            info["metas"].extend(self.verworfene_metas)
+            self.verworfene_metas.clear()
+            if self.kettenfehler:
+                info["kettenfehler"] = self.kettenfehler
+                self.kettenfehler = []
+            fertig = [future for future in self.verworfen if future.done()]
+            self.verworfen = [future for future in self.verworfen if not future.done()]
+        for future in fertig:
+            if future.exception() is None:
+                _, meta = future.result()
+                meta["metrik"]["stufe"] = "verworfen"
+                info["metas"].append(meta)
+        if info["spekuliert"] or info["metas"] or "kettenfehler" in info:
+            ergebnisse_dieser_runde["spekulation"] = info
+        return ergebnis
+
+    def schließen(self) -> None:
+        with self.bedingung:
+            self._verwerfen()
+        self.pool.shutdown(wait=True, cancel_futures=True)
 
 
 def analyse(sequenzen: List[str], äußerer_kontext: str, config: Optional[SequenzAnalyseConfig] = None) -> Dict[str, Any]:
     """Kurzfunktion für die Analyse ohne direkte Klassennutzung."""
-    return SequenzAnalyse(config=config, verbose=False).analyse(sequenzen, äußerer_kontext).data
+    with SequenzAnalyse(config=config, verbose=False) as sa:
+        return sa.analyse(sequenzen, äußerer_kontext).data
@@ -0,0 +1,518 @@
+"""Asynchrone Variante der Sequenzanalyse auf Basis von AsyncOpenAI."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from .analyse import AnalyseEreignis, SequenzAnalyseErgebnis, _SequenzAnalyseBasis
+from .cache import AntwortCache
+from .clients import geteilter_async_client
+from .config import SequenzAnalyseConfig
+from .metriken import MetrikCallback
+from .neuberechnung import hypothesen_diff
+from .resilienz import RateLimiter, eingabe_tokens_schätzen, ist_wiederholbar, schätze_tokens, wartezeit
+from .traces import TraceSchreiber
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+class AsyncSequenzAnalyse(_SequenzAnalyseBasis):
+    """Führt die Sequenzanalyse asynchron aus.
+
+    Eine Instanz kann beliebig viele Protokolle gleichzeitig auf einer
+    Event-Loop analysieren; ``max_concurrency`` begrenzt dabei die Zahl der
+    gleichzeitig offenen API-Aufrufe über alle Protokolle hinweg. Ein
+    optionaler ``rate_limiter`` teilt zusätzlich ein Budget an Anfragen und
+    Tokens pro Minute.
+    """
+
+    _geteilter_client = staticmethod(geteilter_async_client)
+
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI] = None,
+        config: Optional[SequenzAnalyseConfig] = None,
+        verbose: bool = True,
+        verbose_outputs: bool = False,
+        max_concurrency: int = 16,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional[AntwortCache] = None,
+        metrik_callback: Optional[MetrikCallback] = None,
+    ) -> None:
+        super().__init__(
+            config=config,
+            verbose=verbose,
+            verbose_outputs=verbose_outputs,
+            cache=cache,
+            metrik_callback=metrik_callback,
+        )
+        self.client = client
+        self.rate_limiter = rate_limiter
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def analyse(
+        self,
+        sequenzen: List[str],
+        äußerer_kontext: str,
+        checkpoint: Optional[Union[Path, str]] = None,
+        resume: bool = False,
+        trace: Optional[Union[Path, str, TraceSchreiber]] = None,
+        vorher: Optional[Union[SequenzAnalyseErgebnis, Dict[str, Any], Path, str]] = None,
+    ) -> SequenzAnalyseErgebnis:
+        """Analysiert Sequenzen gegen einen äußeren Kontext und sammelt Ergebnisse.
+
+        Mit ``checkpoint`` wird jede abgeschlossene Runde sofort in eine
+        JSONL-Datei geschrieben; ``resume=True`` setzt eine abgebrochene
+        Analyse aus dieser Datei bei der ersten fehlenden Runde fort.
+        ``trace`` schreibt den Trace ebenfalls rundenweise (bei ``.gz``
+        komprimiert), siehe ``TraceSchreiber``. ``vorher`` berechnet nur die
+        von Änderungen betroffenen Runden neu, siehe ``SequenzAnalyse.analyse``.
+        """
+        async for ereignis in self.analyse_iter(
+            sequenzen, äußerer_kontext, checkpoint=checkpoint, resume=resume, trace=trace, vorher=vorher
+        ):
+            pass
+        return ereignis.daten
+
+    async def analyse_iter(
+        self,
+        sequenzen: List[str],
+        äußerer_kontext: str,
+        checkpoint: Optional[Union[Path, str]] = None,
+        resume: bool = False,
+        stufen: bool = False,
+        trace: Optional[Union[Path, str, TraceSchreiber]] = None,
+        vorher: Optional[Union[SequenzAnalyseErgebnis, Dict[str, Any], Path, str]] = None,
+    ) -> AsyncIterator[AnalyseEreignis]:
+        """Wie ``analyse``, liefert aber jede fertige (neu berechnete) Runde sofort als Ereignis.
+
+        Mit ``stufen=True`` kommen zusätzlich die Ergebnisse der einzelnen
+        Schritte. Das letzte Ereignis (``art="ende"``) trägt das vollständige
+        ``SequenzAnalyseErgebnis``.
+        """
+        if vorher is not None and resume:
+            raise ValueError("vorher und resume=True schließen sich aus.")
+        # Vor dem Anlegen von Checkpoint und Trace prüfen, damit eine ungültige Einstellung keine Dateien hinterlässt.
+        spekulativ = self._spekulation_aktiv()
+        laufende_analyse, checkpoint = self._analyse_beginnen(sequenzen, äußerer_kontext, checkpoint, resume)
+        übernommen: Dict[int, Any] = {}
+        if vorher is not None:
+            vorher, übernommen = self._neuberechnung_beginnen(laufende_analyse, vorher, checkpoint)
+        trace = self._trace_beginnen(laufende_analyse, trace)
+        letzte_runde = len(sequenzen)
+        erste_runde = len(laufende_analyse["runden"]) + 1
+
+        kontextfreie_runden = self._kontextfreie_runden(sequenzen[erste_runde - 1:], erste_runde, übernommen)
+        spekulation = _AsyncSpekulation(self, sequenzen, äußerer_kontext) if spekulativ else None
+        vorgezogen: deque = deque()
+        try:
+            for runde, neue_sequenz in enumerate(sequenzen[erste_runde - 1:], erste_runde):
+                ergebnisse_dieser_runde = self._runde_beginnen(runde, sequenzen)
+
+                (situationenerzählungen, meta1), (kontextfreie_lesarten, meta2) = (
+                    vorgezogen.popleft() if vorgezogen else await anext(kontextfreie_runden)
+                )
+                if spekulation is not None:
+                    # Die Entwurfskette braucht die kontextfreien Lesarten der kommenden Runden.
+                    while len(vorgezogen) < min(self.config.speculative_depth, letzte_runde - runde):
+                        vorgezogen.append(await anext(kontextfreie_runden))
+                        await spekulation.lesarten_melden(runde + len(vorgezogen), vorgezogen[-1][1][0])
+                ergebnisse_dieser_runde["ergebnisse"].append(situationenerzählungen)
+                ergebnisse_dieser_runde["responses_meta"].append(meta1)
+                ergebnisse_dieser_runde["ergebnisse"].append(kontextfreie_lesarten)
+                ergebnisse_dieser_runde["responses_meta"].append(meta2)
+                if stufen:
+                    yield AnalyseEreignis("stufe", runde, situationenerzählungen, stufe=1, meta=meta1)
+                    yield AnalyseEreignis("stufe", runde, kontextfreie_lesarten, stufe=2, meta=meta2)
+
+                zusammenfassung_anfrage = self._zusammenfassung_anfrage(runde, sequenzen, laufende_analyse)
+                neue_zusammenfassung = (
+                    await self._aufruf(zusammenfassung_anfrage, stufe="zusammenfassung", runde=runde)
+                    if zusammenfassung_anfrage is not None else None
+                )
+                innerer_kontext = self._innerer_kontext(
+                    runde, sequenzen, laufende_analyse, ergebnisse_dieser_runde, neue_zusammenfassung
+                )
+
+                schritt3 = dict(
+                    runde=runde,
+                    letzte_runde=letzte_runde,
+                    neue_sequenz=neue_sequenz,
+                    bisheriges_protokoll=innerer_kontext,
+                    äußerer_kontext=äußerer_kontext,
+                    laufende_analyse=laufende_analyse,
+                    kontextfreie_lesarten=kontextfreie_lesarten,
+                )
+                if spekulation is not None:
+                    konfrontation_mit_kontext, meta3 = await spekulation.schritt3(ergebnisse_dieser_runde, schritt3)
+                else:
+                    konfrontation_mit_kontext, meta3 = await self._schritt3(**schritt3)
+                ergebnisse_dieser_runde["ergebnisse"].append(konfrontation_mit_kontext)
+                ergebnisse_dieser_runde["responses_meta"].append(meta3)
+                if stufen:
+                    yield AnalyseEreignis("stufe", runde, konfrontation_mit_kontext, stufe=3, meta=meta3)
+
+                self._runde_abschließen(laufende_analyse, ergebnisse_dieser_runde, checkpoint, trace)
+                yield AnalyseEreignis("runde", runde, ergebnisse_dieser_runde)
+        finally:
+            await kontextfreie_runden.aclose()
+            if spekulation is not None:
+                await spekulation.schließen()
+            if trace is not None:
+                trace.schließen()
+
+        if vorher is not None:
+            laufende_analyse["meta"]["neuberechnung"]["hypothesen_diff"] = hypothesen_diff(vorher, laufende_analyse)
+        if self.verbose:
+            print(f"\n\n=== ENDE ===")
+
+        yield AnalyseEreignis("ende", None, SequenzAnalyseErgebnis(data=laufende_analyse))
+
+    async def _aufruf(
+        self,
+        anfrage: Dict[str, Any],
+        stufe: Union[int, str],
+        runde: Optional[int] = None,
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Schickt eine Anfrage an die Responses-API und wertet die Antwort aus."""
+        start = time.perf_counter()
+        schlüssel, treffer = self._cache_lesen(anfrage, stufe)
+        if treffer is not None:
+            return self._metrik_erfassen(treffer, stufe, runde, time.perf_counter() - start, 0.0, 0, cache_hit=True)
+
+        gewartet = 0.0
+        wiederholungen = 0
+        verlauf: Dict[str, Any] = {}
+        while True:
+            # Das Ratenlimit wird vor der Nebenläufigkeitsgrenze erworben, damit
+            # wartende Aufrufe keine Plätze belegen; jeder Versuch reserviert neu.
+            geschätzt = schätze_tokens(anfrage)
+            warten_ab = time.perf_counter()
+            if self.rate_limiter is not None:
+                await self.rate_limiter.erwerben(geschätzt)
+            try:
+                async with self._semaphore:
+                    gewartet += time.perf_counter() - warten_ab
+                    response = await self._parse(anfrage, stufe, verlauf)
+                result, meta = self._antwort_auswerten(response, anfrage.get("text_format"))
+                break
+            except Exception as exc:
+                geändert = self._nach_fehler(anfrage, stufe, exc, verlauf)
+                if geändert is not None:
+                    # Die ungültige Antwort hat Tokens verbraucht; die Reservierung bleibt stehen.
+                    anfrage = geändert
+                    continue
+                if self.rate_limiter is not None:
+                    self.rate_limiter.korrigieren(-geschätzt)
+                if wiederholungen >= self.config.max_retries or not ist_wiederholbar(exc):
+                    raise
+                pause = wartezeit(wiederholungen, self.config, exc)
+                wiederholungen += 1
+                gewartet += pause
+                await asyncio.sleep(pause)
+
+        meta.update(verlauf)
+        meta["input_tokens_geschätzt"] = eingabe_tokens_schätzen(anfrage)
+        usage = meta.get("usage") or {}
+        if self.rate_limiter is not None and usage.get("total_tokens"):
+            self.rate_limiter.korrigieren(usage["total_tokens"] - geschätzt)
+        self._cache_schreiben(schlüssel, result, meta)
+        return self._metrik_erfassen(
+            (result, meta), stufe, runde, time.perf_counter() - start, gewartet, wiederholungen, cache_hit=False
+        )
+
+    async def _parse_gemessen(self, anfrage: Dict[str, Any], stufe: Union[int, str]) -> Any:
+        start = time.perf_counter()
+        response = await self.client.responses.parse(**anfrage)
+        self._latenzen.erfassen(stufe, time.perf_counter() - start)
+        return response
+
+    async def _parse(self, anfrage: Dict[str, Any], stufe: Union[int, str], verlauf: Dict[str, Any]) -> Any:
+        """Ruft ``responses.parse`` auf, bei Überschreiten der Hedging-Frist doppelt.
+
+        Die zweite Anfrage belegt keinen weiteren Platz der Nebenläufigkeitsgrenze,
+        zählt aber für das Ratenlimit; die unterlegene Anfrage wird abgebrochen.
+        """
+        frist = self._hedge_frist(stufe)
+        if frist is None:
+            return await self._parse_gemessen(anfrage, stufe)
+
+        async def nachlegen() -> Any:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.erwerben(schätze_tokens(anfrage))
+            return await self._parse_gemessen(anfrage, stufe)
+
+        erster = asyncio.ensure_future(self._parse_gemessen(anfrage, stufe))
+        offen = {erster}
+        try:
+            fertig, _ = await asyncio.wait(offen, timeout=frist)
+            if fertig:
+                return erster.result()
+
+            zweiter = asyncio.ensure_future(nachlegen())
+            verlauf["hedge"] = {"frist": round(frist, 3), "gewinner": None}
+            offen = {erster, zweiter}
+            while True:
+                fertig, offen = await asyncio.wait(offen, return_when=asyncio.FIRST_COMPLETED)
+                for task in fertig:
+                    if task.exception() is None:
+                        verlauf["hedge"]["gewinner"] = 1 if task is erster else 2
+                        return task.result()
+                if not offen:
+                    raise task.exception()
+        finally:
+            for task in offen:
+                task.cancel()
+
+    async def _kontextfrei(self, neue_sequenz: str, runde: Optional[int] = None) -> Tuple[Tuple[Any, Dict[str, Any]], Tuple[Any, Dict[str, Any]]]:
+        """Führt die kontextfreien Schritte 1 und 2 für eine Sequenz aus."""
+        situationenerzählungen, meta1 = await self._schritt1(neue_sequenz, runde)
+        kontextfreie_lesarten, meta2 = await self._schritt2(situationenerzählungen, runde)
+        return (situationenerzählungen, meta1), (kontextfreie_lesarten, meta2)
+
+    async def _kontextfreie_runden(
+        self,
+        sequenzen: List[str],
+        erste_runde: int = 1,
+        übernommen: Optional[Dict[int, Tuple[Tuple[Any, Dict[str, Any]], Tuple[Any, Dict[str, Any]]]]] = None,
+    ) -> AsyncIterator[Tuple[Tuple[Any, Dict[str, Any]], Tuple[Any, Dict[str, Any]]]]:
+        """Liefert die Ergebnisse der Schritte 1 und 2 in Rundenreihenfolge.
+
+        Im Modus "pipelined" laufen die Aufrufe als Tasks bis zu ``lookahead``
+        Sequenzen vor der aktuell von Schritt 3 bearbeiteten Runde. Beim
+        Abbruch der Analyse werden noch offene Tasks abgebrochen.
+        Mit ``deduplicate_sequences`` werden bereits gesehene Sequenzen aus dem
+        Memo der Instanz bedient, auch zwischen gleichzeitig laufenden
+        Protokollen. Runden in ``übernommen`` (Neuberechnung) kommen ohne
+        Aufruf aus der früheren Analyse.
+        """
+        lauf = object()
+        übernommen = übernommen or {}
+
+        def starten(runde: int, neue_sequenz: str) -> Tuple[asyncio.Future, Optional[str], Optional[Dict[str, Any]]]:
+            if runde in übernommen:
+                task = asyncio.get_running_loop().create_future()
+                task.set_result(übernommen[runde])
+                return task, None, None
+            schlüssel, task, herkunft = self._memo_suchen(neue_sequenz, lauf)
+            if task is None:
+                task = asyncio.ensure_future(self._kontextfrei(neue_sequenz, runde))
+                if schlüssel is not None:
+                    self._memo_merken(schlüssel, task, runde, lauf)
+            return task, schlüssel, herkunft
+
+        async def holen(task: asyncio.Future, schlüssel: Optional[str], herkunft: Optional[Dict[str, Any]]) -> Any:
+            try:
+                # Memo-Tasks können von anderen Protokollen geteilt werden und
+                # dürfen beim eigenen Abbruch nicht mit abbrechen.
+                ergebnis = await (task if schlüssel is None else asyncio.shield(task))
+            except BaseException:
+                if schlüssel is not None and self._kontextfrei_memo.get(schlüssel, (None,))[0] is task and task.done():
+                    del self._kontextfrei_memo[schlüssel]
+                raise
+            return self._wiederverwenden(ergebnis, herkunft) if herkunft is not None else ergebnis
+
+        if self.config.execution_mode != "pipelined":
+            for runde, neue_sequenz in enumerate(sequenzen, erste_runde):
+                yield await holen(*starten(runde, neue_sequenz))
+            return
+
+        lookahead = self.config.lookahead or len(sequenzen)
+        ausstehend = enumerate(sequenzen, erste_runde)
+        tasks = deque(starten(runde, s) for _, (runde, s) in zip(range(lookahead), ausstehend))
+        try:
+            while tasks:
+                ergebnis = await holen(*tasks[0])
+                tasks.popleft()
+                nächste = next(ausstehend, None)
+                if nächste is not None:
+                    tasks.append(starten(*nächste))
+                yield ergebnis
+        finally:
+            # Geteilte Memo-Tasks laufen für andere Protokolle weiter und werden nicht abgewartet.
+            eigene = [task for task, schlüssel, _ in tasks if schlüssel is None]
+            for task in eigene:
+                task.cancel()
+            await asyncio.gather(*eigene, return_exceptions=True)
+
+    async def _schritt1(self, neue_sequenz: str, runde: Optional[int] = None) -> Dict[str, Any]:
+        """Erstellt kontextfreie Beispielsituationen zur neuen Sequenz (ggf. in parallelen Stichproben)."""
+        anfragen = self._stichproben_anfragen(neue_sequenz)
+        if len(anfragen) == 1:
+            return await self._aufruf(anfragen[0], stufe=1, runde=runde)
+        antworten = await asyncio.gather(
+            *(self._aufruf(anfrage, stufe=1, runde=runde) for anfrage in anfragen), return_exceptions=True
+        )
+        return self._stichproben_zusammenführen(list(antworten))
+
+    async def _schritt2(self, situationenerzählungen: Dict[str, Any], runde: Optional[int] = None) -> Dict[str, Any]:
+        """Leitet kontextfreie Lesarten aus den Beispielsituationen ab."""
+        return await self._aufruf(self._schritt2_anfrage(situationenerzählungen), stufe=2, runde=runde)
+
+    async def _schritt3(
+        self,
+        runde: int,
+        letzte_runde: int,
+        neue_sequenz: str,
+        bisheriges_protokoll: str,
+        äußerer_kontext: str,
+        laufende_analyse: Dict[str, Any],
+        kontextfreie_lesarten: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Konfrontiert Lesarten mit Kontext und erzeugt Fallstrukturhypothesen."""
+        return await self._aufruf(
+            self._schritt3_anfrage(
+                runde=runde,
+                letzte_runde=letzte_runde,
+                neue_sequenz=neue_sequenz,
+                bisheriges_protokoll=bisheriges_protokoll,
+                äußerer_kontext=äußerer_kontext,
+                laufende_analyse=laufende_analyse,
+                kontextfreie_lesarten=kontextfreie_lesarten,
+            ),
+            stufe=3,
+            runde=runde,
+        )
+
+
+class _AsyncSpekulation:
+    """Spekulative Ausführung von Schritt 3 während einer asynchronen Analyse.
+
+    Entspricht ``_Spekulation`` der synchronen Analyse; Entwurfskette und
+    Vorab-Aufrufe laufen als Tasks. Beim Abbruch oder Verwerfen werden die
+    noch offenen Tasks abgebrochen, beim Schließen auch abgewartet.
+    """
+
+    def __init__(self, sa: AsyncSequenzAnalyse, sequenzen: List[str], äußerer_kontext: str) -> None:
+        self.sa = sa
+        self.sequenzen = sequenzen
+        self.äußerer_kontext = äußerer_kontext
+        self.letzte_runde = len(sequenzen)
+        self.tiefe = sa.config.speculative_depth
+        self.bedingung = asyncio.Condition()
+        self.lesarten: Dict[int, Dict[str, Any]] = {}
+        # Runde -> (Task des Vorab-Aufrufs, Entwurfshypothese und -metadaten der Vorrunde)
+        self.vorab: Dict[int, Tuple[asyncio.Task, str, Dict[str, Any]]] = {}
+        self.kette: Optional[asyncio.Task] = None
+        self.verworfene_metas: List[Dict[str, Any]] = []
+        self.kettenfehler: List[str] = []
+        # Abgebrochene Tasks, die beim Schließen noch abzuwarten sind
+        self.abgebrochen: List[asyncio.Task] = []
+        self.aktuelle_runde = 0
+
+    async def lesarten_melden(self, runde: int, kontextfreie_lesarten: Dict[str, Any]) -> None:
+        async with self.bedingung:
+            self.lesarten[runde] = kontextfreie_lesarten
+            self.bedingung.notify_all()
+
+    async def _kette(self, runde: int, anfrage: Dict[str, Any]) -> None:
+        try:
+            while runde < self.letzte_runde:
+                result, meta = await self.sa._aufruf(self.sa._entwurf_anfrage(anfrage), "entwurf", runde)
+                nächste = runde + 1
+                async with self.bedingung:
+                    await self.bedingung.wait_for(
+                        lambda: nächste in self.lesarten and nächste - self.aktuelle_runde <= self.tiefe
+                    )
+                anfrage = self.sa._spekulative_anfrage(
+                    nächste, self.letzte_runde, self.sequenzen, self.äußerer_kontext, result, self.lesarten[nächste]
+                )
+                async with self.bedingung:
+                    vorab = asyncio.ensure_future(self.sa._aufruf(anfrage, 3, nächste))
+                    self.vorab[nächste] = (vorab, self.sa._hypothese(result), meta)
+                    self.bedingung.notify_all()
+                runde = nächste
+        except Exception as exc:
+            # Ohne Entwurfskette läuft Schritt 3 regulär weiter; der Fehler landet im Trace.
+            self.kettenfehler.append(repr(exc))
+        finally:
+            async with self.bedingung:
+                self.bedingung.notify_all()
+
+    def _kette_aktiv(self) -> bool:
+        return self.kette is not None and not self.kette.done()
+
+    def _verwerfen(self) -> None:
+        """Bricht die laufende Entwurfskette und alle offenen Vorab-Aufrufe ab."""
+        if self.kette is not None:
+            self.kette.cancel()
+            self.abgebrochen.append(self.kette)
+            self.kette = None
+        for vorab, _, meta in self.vorab.values():
+            vorab.cancel()
+            self.abgebrochen.append(vorab)
+            self.verworfene_metas.append(meta)
+        self.vorab.clear()
+
+    async def schritt3(self, ergebnisse_dieser_runde: Dict[str, Any], schritt3: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+        """Liefert Schritt 3 der Runde, vorab berechnet oder regulär, und hält die Kette am Laufen."""
+        runde = schritt3["runde"]
+        async with self.bedingung:
+            self.aktuelle_runde = runde
+            self.bedingung.notify_all()
+            await self.bedingung.wait_for(lambda: runde in self.vorab or not self._kette_aktiv())
+            eintrag = self.vorab.pop(runde, None)
+
+        ergebnis: Optional[Tuple[Any, Dict[str, Any]]] = None
+        info: Dict[str, Any] = {"spekuliert": False, "metas": []}
+        if eintrag is not None:
+            vorab, entwurf_hypothese, entwurf_meta = eintrag
+            behalten, ähnlichkeit = self.sa._spekulation_prüfen(schritt3["laufende_analyse"], runde, entwurf_hypothese)
+            info = {"spekuliert": True, "behalten": behalten, "ähnlichkeit": ähnlichkeit, "metas": [entwurf_meta]}
+            if behalten:
+                try:
+                    ergebnis = await vorab
+                except Exception as exc:
+                    info.update(behalten=False, fehler=repr(exc))
+            else:
+                vorab.cancel()
+                self.abgebrochen.append(vorab)
+            if ergebnis is None:
+                self._verwerfen()
+
+        anfrage = self.sa._schritt3_anfrage(**schritt3)
+        if not self._kette_aktiv() and runde < self.letzte_runde and runde + 1 not in self.vorab:
+            self.kette = asyncio.ensure_future(self._kette(runde, anfrage))
+        if ergebnis is None:
+            ergebnis = await self.sa._aufruf(anfrage, stufe=3, runde=runde)
+
+        info["metas"].extend(self.verworfene_metas)
+        self.verworfene_metas.clear()
+        if self.kettenfehler:
+            info["kettenfehler"] = self.kettenfehler
+            self.kettenfehler = []
+        self._aufräumen()
+        if info["spekuliert"] or info["metas"] or "kettenfehler" in info:
+            ergebnisse_dieser_runde["spekulation"] = info
+        return ergebnis
+
+    def _aufräumen(self) -> None:
+        """Gibt fertige abgebrochene Tasks frei; ihre Ergebnisse und Fehler werden nicht gebraucht."""
+        offen = []
+        for task in self.abgebrochen:
+            if not task.done():
+                offen.append(task)
+            elif not task.cancelled():
+                task.exception()
+        self.abgebrochen = offen
+
+    async def schließen(self) -> None:
+        """Bricht Entwurfskette und Vorab-Aufrufe ab und wartet, bis sie beendet sind."""
+        self._verwerfen()
+        await asyncio.gather(*self.abgebrochen, return_exceptions=True)
+        self.abgebrochen.clear()
+
+
+async def analyse_async(
+    sequenzen: List[str],
+    äußerer_kontext: str,
+    config: Optional[SequenzAnalyseConfig] = None,
+) -> Dict[str, Any]:
+    """Asynchrone Kurzfunktion für die Analyse ohne direkte Klassennutzung."""
+    ergebnis = await AsyncSequenzAnalyse(config=config, verbose=False).analyse(sequenzen, äußerer_kontext)
+    return ergebnis.data
@@ -0,0 +1,386 @@
+"""Korpusanalyse über die Batch-API für Offline-Läufe ohne Latenzanforderung."""
+
+from __future__ import annotations
+
+import itertools
+import json
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .analyse import SequenzAnalyseErgebnis, _SequenzAnalyseBasis
+from .cache import AntwortCache
+from .config import SequenzAnalyseConfig
+from .korpus import KorpusJob
+from .metriken import MetrikCallback
+from .resilienz import eingabe_tokens_schätzen
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+_ENDSTATUS = ("completed", "failed", "expired", "cancelled")
+
+
+def _strikt(schema: Dict[str, Any], wurzel: Dict[str, Any]) -> Dict[str, Any]:
+    """Bringt ein JSON-Schema in die strikte Form, die Structured Outputs verlangt.
+
+    Objekte erhalten ``additionalProperties: false`` und führen alle
+    Eigenschaften als Pflichtfelder; ``None``-Defaults entfallen, einzelne
+    ``allOf``-Einträge und ``$ref`` mit weiteren Schlüsseln werden aufgelöst.
+    """
+    for abschnitt in ("$defs", "definitions"):
+        for teil in (schema.get(abschnitt) or {}).values():
+            _strikt(teil, wurzel)
+    if schema.get("type") == "object":
+        schema.setdefault("additionalProperties", False)
+    if isinstance(schema.get("properties"), dict):
+        schema["required"] = list(schema["properties"])
+        schema["properties"] = {k: _strikt(v, wurzel) for k, v in schema["properties"].items()}
+    if isinstance(schema.get("items"), dict):
+        schema["items"] = _strikt(schema["items"], wurzel)
+    if isinstance(schema.get("anyOf"), list):
+        schema["anyOf"] = [_strikt(v, wurzel) for v in schema["anyOf"]]
+    if isinstance(schema.get("allOf"), list):
+        if len(schema["allOf"]) == 1:
+            schema.update(_strikt(schema.pop("allOf")[0], wurzel))
+        else:
+            schema["allOf"] = [_strikt(v, wurzel) for v in schema["allOf"]]
+    if "default" in schema and schema["default"] is None:
+        del schema["default"]
+    if "$ref" in schema and len(schema) > 1:
+        ziel: Any = wurzel
+        for teil in schema.pop("$ref").lstrip("#/").split("/"):
+            ziel = ziel[teil]
+        schema.update({**ziel, **schema})
+        return _strikt(schema, wurzel)
+    return schema
+
+
+def _text_format(schema: Any) -> Dict[str, Any]:
+    """``text.format``-Parameter für ein Pydantic-Modell, wie ihn ``responses.parse`` sendet."""
+    json_schema = schema.model_json_schema()
+    return {
+        "type": "json_schema",
+        "name": schema.__name__,
+        "strict": True,
+        "schema": _strikt(json_schema, json_schema),
+    }
+
+
+def _batch_body(anfrage: Dict[str, Any]) -> Dict[str, Any]:
+    """Übersetzt eine ``responses.parse``-Anfrage in den Body einer Batch-Zeile."""
+    body = {k: v for k, v in anfrage.items() if k not in ("text_format", "timeout") and v is not None}
+    if isinstance(body.get("reasoning"), dict):
+        body["reasoning"] = {k: v for k, v in body["reasoning"].items() if v is not None}
+    body["text"] = {"format": _text_format(anfrage["text_format"])}
+    return body
+
+
+class _BatchAntwort:
+    """Bietet einer Batch-Ausgabezeile die Schnittstelle einer Responses-Antwort."""
+
+    def __init__(self, body: Dict[str, Any], schema: Any) -> None:
+        self._body = body
+        text = "".join(
+            teil.get("text", "")
+            for item in body.get("output", [])
+            for teil in item.get("content") or []
+            if teil.get("type") == "output_text"
+        )
+        self.output_parsed = schema.model_validate_json(text)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._body)
+
+
+class BatchSequenzAnalyse(_SequenzAnalyseBasis):
+    """Analysiert einen ganzen Korpus über die Batch-API.
+
+    Zuerst laufen alle Anfragen für Schritt 1 des Korpus als ein Batch, dann
+    alle für Schritt 2, danach Schritt 3 Runde für Runde über alle Protokolle
+    hinweg (sequenziell je Protokoll, parallel zwischen Protokollen). Der
+    Client muss nur ``files.create``, ``files.content``, ``batches.create`` und
+    ``batches.retrieve`` bieten; ``LokalerBatchClient`` ist ein lokaler Ersatz.
+    """
+
+    def __init__(
+        self,
+        client: Optional[OpenAI] = None,
+        config: Optional[SequenzAnalyseConfig] = None,
+        verbose: bool = True,
+        cache: Optional[AntwortCache] = None,
+        poll_interval: float = 60.0,
+        completion_window: str = "24h",
+        metrik_callback: Optional[MetrikCallback] = None,
+    ) -> None:
+        # Ausgaben je Protokoll wären bei Korpusläufen nur Rauschen; ``verbose``
+        # meldet stattdessen den Fortschritt der Batches.
+        super().__init__(config=config, verbose=False, cache=cache, metrik_callback=metrik_callback)
+        self.client = client
+        self.fortschritt = verbose
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    def analyse(self, jobs: Iterable[Union[KorpusJob, Tuple[List[str], str]]]) -> List[SequenzAnalyseErgebnis]:
+        """Analysiert alle Jobs und liefert die Ergebnisse in Job-Reihenfolge."""
+        jobs = [job if isinstance(job, KorpusJob) else KorpusJob(*job) for job in jobs]
+        läufe = [self._analyse_beginnen(job.sequenzen, job.äußerer_kontext)[0] for job in jobs]
+        positionen = [(j, runde) for j, job in enumerate(jobs) for runde in range(1, len(job.sequenzen) + 1)]
+
+        # Planung: mit ``deduplicate_sequences`` gehen Schritt 1 und 2 nur für
+        # das erste Vorkommen jeder normalisierten Sequenz im Korpus in den Batch.
+        quelle: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        erste: Dict[str, Tuple[int, int]] = {}
+        for j, runde in positionen:
+            schlüssel = self._dedup_schlüssel(jobs[j].sequenzen[runde - 1])
+            if schlüssel is not None:
+                quelle[(j, runde)] = erste.setdefault(schlüssel, (j, runde))
+        eigene = [p for p in positionen if quelle.get(p, p) == p]
+
+        stichproben = self._batch(
+            "Schritt 1",
+            {
+                f"{j}-{runde}-1-{i}": (anfrage, 1, runde)
+                for j, runde in eigene
+                for i, anfrage in enumerate(self._stichproben_anfragen(jobs[j].sequenzen[runde - 1]))
+            },
+        )
+        schritt1 = {
+            f"{j}-{runde}-1": self._stichproben_zusammenführen(
+                [stichproben[f"{j}-{runde}-1-{i}"] for i in range(max(1, self.config.stage1_samples))]
+            )
+            for j, runde in eigene
+        }
+        schritt2 = self._batch(
+            "Schritt 2",
+            {
+                f"{j}-{runde}-2": (self._schritt2_anfrage(schritt1[f"{j}-{runde}-1"][0]), 2, runde)
+                for j, runde in eigene
+            },
+        )
+
+        for runde in range(1, max((len(job.sequenzen) for job in jobs), default=0) + 1):
+            aktiv = [j for j, job in enumerate(jobs) if len(job.sequenzen) >= runde]
+            runden: Dict[int, Dict[str, Any]] = {}
+            for j in aktiv:
+                ergebnisse_dieser_runde = self._runde_beginnen(runde, jobs[j].sequenzen)
+                j0, runde0 = quelle.get((j, runde), (j, runde))
+                kontextfrei = tuple(ergebnis[f"{j0}-{runde0}-{stufe}"] for stufe, ergebnis in ((1, schritt1), (2, schritt2)))
+                if (j0, runde0) != (j, runde):
+                    herkunft: Dict[str, Any] = {"von_runde": runde0}
+                    if j0 != j:
+                        herkunft["anderes_protokoll"] = True
+                    kontextfrei = self._wiederverwenden(kontextfrei, herkunft)
+                for result, meta in kontextfrei:
+                    ergebnisse_dieser_runde["ergebnisse"].append(result)
+                    ergebnisse_dieser_runde["responses_meta"].append(meta)
+                runden[j] = ergebnisse_dieser_runde
+
+            zusammenfassungen = self._batch(
+                f"Zusammenfassung Runde {runde}",
+                {
+                    f"{j}-{runde}-z": (anfrage, "zusammenfassung", runde)
+                    for j in aktiv
+                    for anfrage in [self._zusammenfassung_anfrage(runde, jobs[j].sequenzen, läufe[j])]
+                    if anfrage is not None
+                },
+            )
+
+            anfragen3 = {}
+            for j in aktiv:
+                innerer_kontext = self._innerer_kontext(
+                    runde, jobs[j].sequenzen, läufe[j], runden[j], zusammenfassungen.get(f"{j}-{runde}-z")
+                )
+                anfragen3[f"{j}-{runde}-3"] = (
+                    self._schritt3_anfrage(
+                        runde=runde,
+                        letzte_runde=len(jobs[j].sequenzen),
+                        neue_sequenz=jobs[j].sequenzen[runde - 1],
+                        bisheriges_protokoll=innerer_kontext,
+                        äußerer_kontext=jobs[j].äußerer_kontext,
+                        laufende_analyse=läufe[j],
+                        kontextfreie_lesarten=runden[j]["ergebnisse"][1],
+                    ),
+                    3,
+                    runde,
+                )
+            schritt3 = self._batch(f"Schritt 3 Runde {runde}", anfragen3)
+
+            for j in aktiv:
+                result, meta = schritt3[f"{j}-{runde}-3"]
+                runden[j]["ergebnisse"].append(result)
+                runden[j]["responses_meta"].append(meta)
+                self._runde_abschließen(läufe[j], runden[j], None)
+
+        return [SequenzAnalyseErgebnis(data=lauf) for lauf in läufe]
+
+    def _batch(
+        self,
+        titel: str,
+        anfragen: Dict[str, Tuple[Dict[str, Any], Union[int, str], int]],
+    ) -> Dict[str, Tuple[Any, Dict[str, Any]]]:
+        """Führt Anfragen als Batch aus; fehlgeschlagene Zeilen werden erneut eingereicht.
+
+        Wie oft, bestimmt ``config.max_retries``; Zeilen mit ungültiger Ausgabe
+        gehen zusätzlich an das Eskalationsmodell ihres Schritts bzw. als
+        Reparaturanfrage erneut in den Batch. Antworten für Schritt 1 und 2 werden, falls konfiguriert,
+        aus dem Cache bedient und dort abgelegt.
+        Laufzeiten einzelner Aufrufe sind im Batch nicht messbar; die Metriken
+        führen dafür 0.
+        """
+        ergebnisse: Dict[str, Tuple[Any, Dict[str, Any]]] = {}
+        schlüssel: Dict[str, Optional[str]] = {}
+        offen: Dict[str, Tuple[Dict[str, Any], Union[int, str], int]] = {}
+        for custom_id, (anfrage, stufe, runde) in anfragen.items():
+            schlüssel[custom_id], treffer = self._cache_lesen(anfrage, stufe)
+            if treffer is not None:
+                ergebnisse[custom_id] = self._metrik_erfassen(treffer, stufe, runde, 0.0, 0.0, 0, cache_hit=True)
+            else:
+                offen[custom_id] = (anfrage, stufe, runde)
+
+        fehler: Dict[str, Any] = {}
+        verläufe: Dict[str, Dict[str, Any]] = {}
+        zusatzrunden = 0
+        for versuch in itertools.count():
+            if not offen or versuch > self.config.max_retries + zusatzrunden:
+                break
+            if self.fortschritt:
+                print(f"{titel}: {len(offen)} Anfragen im Batch (Versuch {versuch + 1})")
+
+            antworten, fehler = self._batch_ausführen(
+                {custom_id: _batch_body(anfrage) for custom_id, (anfrage, _, _) in offen.items()}
+            )
+            for custom_id, body in antworten.items():
+                anfrage, stufe, runde = offen.pop(custom_id)
+                try:
+                    result, meta = self._antwort_auswerten(_BatchAntwort(body, anfrage["text_format"]))
+                except ValueError as exc:
+                    verlauf = verläufe.setdefault(custom_id, {})
+                    geändert = self._nach_fehler(anfrage, stufe, exc, verlauf)
+                    if geändert is not None:
+                        anfrage = geändert
+                        zusatzrunden = max(
+                            zusatzrunden, bool(verlauf.get("eskaliert")) + verlauf.get("repariert", {}).get("versuche", 0)
+                        )
+                    offen[custom_id] = (anfrage, stufe, runde)
+                    fehler[custom_id] = str(exc)
+                    continue
+                verlauf = verläufe.get(custom_id, {})
+                meta.update(verlauf)
+                meta["input_tokens_geschätzt"] = eingabe_tokens_schätzen(anfrage)
+                self._cache_schreiben(schlüssel[custom_id], result, meta)
+                # Eskalations- und Reparaturrunden zählen nicht als Wiederholung.
+                wiederholungen = versuch - bool(verlauf.get("eskaliert")) - verlauf.get("repariert", {}).get("versuche", 0)
+                ergebnisse[custom_id] = self._metrik_erfassen(
+                    (result, meta), stufe, runde, 0.0, 0.0, wiederholungen, cache_hit=False
+                )
+
+        if offen:
+            beispiele = {k: fehler.get(k) for k in list(offen)[:3]}
+            raise RuntimeError(f"{titel}: {len(offen)} Anfragen ohne gültige Antwort, z. B. {beispiele}")
+
+        return ergebnisse
+
+    def _batch_ausführen(self, bodies: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+        """Lädt eine Batch-Datei hoch, wartet auf das Ende und liest die Ausgabe."""
+        zeilen = "".join(
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/responses", "body": body}, ensure_ascii=False)
+            + "\n"
+            for custom_id, body in bodies.items()
+        )
+        datei = self.client.files.create(file=("sequenzanalyse-batch.jsonl", zeilen.encode("utf-8")), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=datei.id,
+            endpoint="/v1/responses",
+            completion_window=self.completion_window,
+        )
+        while batch.status not in _ENDSTATUS:
+            time.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+
+        antworten: Dict[str, Dict[str, Any]] = {}
+        fehler: Dict[str, Any] = {}
+        for datei_id in (getattr(batch, "output_file_id", None), getattr(batch, "error_file_id", None)):
+            if not datei_id:
+                continue
+            for zeile in self.client.files.content(datei_id).text.splitlines():
+                if not zeile.strip():
+                    continue
+                eintrag = json.loads(zeile)
+                response = eintrag.get("response") or {}
+                if response.get("status_code") == 200 and not eintrag.get("error"):
+                    antworten[eintrag["custom_id"]] = response["body"]
+                else:
+                    fehler[eintrag["custom_id"]] = eintrag.get("error") or response.get("body")
+
+        if batch.status != "completed" and not antworten:
+            raise RuntimeError(f"Batch {batch.id} endete mit Status {batch.status!r}.")
+
+        return antworten, fehler
+
+
+class LokalerBatchClient:
+    """Lokaler Ersatz für die Datei- und Batch-Endpunkte, etwa für Tests.
+
+    Jede Batch-Zeile wird beim Anlegen des Batches sofort über
+    ``client.responses.create`` ausgeführt; Fehler landen wie bei der echten
+    API in der Fehlerdatei.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+        self._dateien: Dict[str, bytes] = {}
+        self._batches: Dict[str, SimpleNamespace] = {}
+        self.files = SimpleNamespace(create=self._datei_anlegen, content=self._datei_lesen)
+        self.batches = SimpleNamespace(create=self._batch_anlegen, retrieve=self._batches.__getitem__)
+
+    def _datei_anlegen(self, file: Any, purpose: str) -> SimpleNamespace:
+        inhalt = file[1] if isinstance(file, tuple) else file
+        datei_id = f"file-lokal-{len(self._dateien) + 1}"
+        self._dateien[datei_id] = inhalt if isinstance(inhalt, bytes) else inhalt.read()
+        return SimpleNamespace(id=datei_id, purpose=purpose)
+
+    def _datei_lesen(self, datei_id: str) -> SimpleNamespace:
+        return SimpleNamespace(text=self._dateien[datei_id].decode("utf-8"))
+
+    def _batch_anlegen(self, input_file_id: str, endpoint: str, completion_window: str) -> SimpleNamespace:
+        ausgabe, fehler = [], []
+        for zeile in self._dateien[input_file_id].decode("utf-8").splitlines():
+            anfrage = json.loads(zeile)
+            try:
+                response = self.client.responses.create(**anfrage["body"])
+                ausgabe.append({
+                    "custom_id": anfrage["custom_id"],
+                    "response": {"status_code": 200, "body": response.to_dict()},
+                    "error": None,
+                })
+            except Exception as exc:
+                fehler.append({
+                    "custom_id": anfrage["custom_id"],
+                    "response": {"status_code": getattr(exc, "status_code", 500), "body": {"error": {"message": str(exc)}}},
+                    "error": None,
+                })
+
+        batch = SimpleNamespace(
+            id=f"batch-lokal-{len(self._batches) + 1}",
+            status="completed",
+            output_file_id=self._datei_anlegen(("", self._jsonl(ausgabe)), "batch_output").id if ausgabe else None,
+            error_file_id=self._datei_anlegen(("", self._jsonl(fehler)), "batch_output").id if fehler else None,
+        )
+        self._batches[batch.id] = batch
+        return batch
+
+    @staticmethod
+    def _jsonl(zeilen: List[Dict[str, Any]]) -> bytes:
+        return "".join(json.dumps(z, ensure_ascii=False) + "\n" for z in zeilen).encode("utf-8")
+
+
+def batch_analyse(
+    jobs: Iterable[Union[KorpusJob, Tuple[List[str], str]]],
+    config: Optional[SequenzAnalyseConfig] = None,
+    poll_interval: float = 60.0,
+) -> List[Dict[str, Any]]:
+    """Kurzfunktion für eine Korpusanalyse über die Batch-API."""
+    ergebnisse = BatchSequenzAnalyse(config=config, poll_interval=poll_interval).analyse(jobs)
+    return [ergebnis.data for ergebnis in ergebnisse]
@@ -0,0 +1,316 @@
+"""Offline-Benchmarks mit einem deterministischen Ersatz für die Responses-API.
+
+Aufruf: ``python -m sequenzanalyse.benchmark`` (Optionen siehe ``--help``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import hashlib
+import json
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import typing
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import openai
+from pydantic import BaseModel
+
+from . import models
+from .analyse import SequenzAnalyse
+from .async_analyse import AsyncSequenzAnalyse
+from .config import SequenzAnalyseConfig
+from .utils import tokens_schätzen
+
+try:
+    import httpx
+except ImportError:  # neuere SDK-Versionen bringen ihren eigenen HTTP-Client mit
+    import httpx2 as httpx
+
+
+Latenz = Union[float, Callable[[random.Random], float]]
+
+
+def lognormal_latenz(median: float, sigma: float = 0.5) -> Callable[[random.Random], float]:
+    """Latenzverteilung mit langem Ende, wie sie bei LLM-APIs typisch ist."""
+    return lambda rng: rng.lognormvariate(0, sigma) * median
+
+
+def _beispielwert(typ: Any, rng: random.Random, name: str) -> Any:
+    """Erzeugt einen schemagültigen Beispielwert für einen Feldtyp."""
+    origin = typing.get_origin(typ)
+    if origin is typing.Literal:
+        return rng.choice(typing.get_args(typ))
+    if origin in (list, List):
+        return [_beispielwert(typing.get_args(typ)[0], rng, name) for _ in range(rng.randint(2, 4))]
+    if isinstance(typ, type) and issubclass(typ, BaseModel):
+        return _beispielobjekt(typ, rng)
+    return f"{name} {rng.randrange(10_000)}"
+
+
+def _beispielobjekt(schema: type, rng: random.Random) -> BaseModel:
+    """Füllt ein Pydantic-Modell aus ``models`` rekursiv mit Beispielwerten."""
+    hints = typing.get_type_hints(schema)
+    return schema(**{name: _beispielwert(hints[name], rng, name) for name in schema.model_fields})
+
+
+class _FakeAntwort:
+    """Antwortobjekt mit der Schnittstelle, die ``_extract_result_and_meta`` erwartet."""
+
+    def __init__(self, parsed: BaseModel, model: str, usage: Dict[str, Any], antwort_id: str) -> None:
+        self.output_parsed = parsed
+        self.output_text = parsed.model_dump_json()
+        self.model = model
+        self.usage = usage
+        self.id = antwort_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "object": "response",
+            "status": "completed",
+            "model": self.model,
+            "usage": dict(self.usage),
+            "output": [{"type": "message", "content": [{"type": "output_text", "text": self.output_text}]}],
+        }
+
+
+class FakeResponses:
+    """Deterministischer Ersatz für ``client.responses``.
+
+    Zufall (Latenz, Fehler, Ausgabelänge, Inhalte) wird je Aufruf aus Seed,
+    Eingabe, Modell, Reasoning-Einstellung und Wiederholungszähler abgeleitet
+    und ist damit unabhängig von der Reihenfolge, in der parallele Aufrufe
+    eintreffen. Mit ``fehlerquote`` wird
+    ein Anteil der Aufrufe mit 429 bzw. 500 beantwortet.
+    """
+
+    def __init__(
+        self,
+        latenz: Latenz = 0.0,
+        fehlerquote: float = 0.0,
+        output_tokens: int = 800,
+        reasoning_anteil: float = 0.5,
+        seed: int = 0,
+    ) -> None:
+        self.latenz = latenz
+        self.fehlerquote = fehlerquote
+        self.output_tokens = output_tokens
+        self.reasoning_anteil = reasoning_anteil
+        self.seed = seed
+        self.aufrufe = 0
+        self._gesehen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _vorbereiten(self, input: List[Dict[str, Any]], schema: type, model: str, reasoning: Any) -> tuple[random.Random, float]:
+        inhalt = json.dumps([input, model, reasoning, schema.__name__], ensure_ascii=False, sort_keys=True, default=str)
+        schlüssel = hashlib.sha256(inhalt.encode("utf-8")).hexdigest()
+        with self._lock:
+            self.aufrufe += 1
+            wiederholung = self._gesehen.get(schlüssel, 0)
+            self._gesehen[schlüssel] = wiederholung + 1
+        rng = random.Random(f"{self.seed}:{schlüssel}:{wiederholung}")
+        latenz = self.latenz(rng) if callable(self.latenz) else self.latenz
+        return rng, latenz
+
+    def _antworten(self, rng: random.Random, input: List[Dict[str, Any]], schema: type, model: str) -> _FakeAntwort:
+        if rng.random() < self.fehlerquote:
+            status = rng.choice((429, 500))
+            response = httpx.Response(status, request=httpx.Request("POST", "https://fake.invalid/v1/responses"))
+            fehler = openai.RateLimitError if status == 429 else openai.InternalServerError
+            raise fehler(f"Simulierter Fehler {status}", response=response, body=None)
+
+        input_tokens = sum(tokens_schätzen(str(m.get("content", ""))) for m in input)
+        output_tokens = max(1, int(rng.gauss(self.output_tokens, self.output_tokens / 4)))
+        usage = {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": int(output_tokens * self.reasoning_anteil)},
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return _FakeAntwort(_beispielobjekt(schema, rng), model, usage, f"resp_fake_{rng.getrandbits(64):016x}")
+
+    def parse(self, *, input: List[Dict[str, Any]], text_format: type, model: str = "fake", **kwargs: Any) -> _FakeAntwort:
+        rng, latenz = self._vorbereiten(input, text_format, model, kwargs.get("reasoning"))
+        time.sleep(latenz)
+        return self._antworten(rng, input, text_format, model)
+
+    def create(self, *, input: List[Dict[str, Any]], text: Dict[str, Any], model: str = "fake", **kwargs: Any) -> _FakeAntwort:
+        """Variante für ``LokalerBatchClient``: Schema kommt als JSON-Schema-Name."""
+        schema = getattr(models, text["format"]["name"])
+        rng, latenz = self._vorbereiten(input, schema, model, kwargs.get("reasoning"))
+        time.sleep(latenz)
+        return self._antworten(rng, input, schema, model)
+
+
+class AsyncFakeResponses(FakeResponses):
+    """Asynchrone Variante von ``FakeResponses`` für ``AsyncSequenzAnalyse``."""
+
+    async def parse(self, *, input: List[Dict[str, Any]], text_format: type, model: str = "fake", **kwargs: Any) -> _FakeAntwort:
+        rng, latenz = self._vorbereiten(input, text_format, model, kwargs.get("reasoning"))
+        await asyncio.sleep(latenz)
+        return self._antworten(rng, input, text_format, model)
+
+
+class FakeResponsesClient:
+    """Client-Ersatz mit ``responses.parse`` (und ``responses.create``)."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.responses = FakeResponses(**kwargs)
+
+
+class AsyncFakeResponsesClient:
+    """Asynchroner Client-Ersatz mit ``await responses.parse``."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        self.responses = AsyncFakeResponses(**kwargs)
+
+
+def synthetisches_protokoll(n: int, seed: int = 0) -> List[str]:
+    """Erzeugt ein Interview-artiges Protokoll aus ``n`` Sequenzen."""
+    rng = random.Random(seed)
+    wörter = "ja also ich weiß nicht genau wie das damals war und dann haben wir halt gesagt".split()
+    return [
+        f"{'AB'[i % 2]}: " + " ".join(rng.choice(wörter) for _ in range(rng.randint(1, 25))) + "."
+        for i in range(n)
+    ]
+
+
+def _messen(lauf: Callable[[], Any], client: Any) -> Dict[str, Any]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    ergebnis = lauf()
+    dauer = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    json.dumps(ergebnis.data, ensure_ascii=False)
+    serialisierung = time.perf_counter() - start
+
+    aufrufe = client.responses.aufrufe
+    return {
+        "dauer_s": round(dauer, 3),
+        "peak_mib": round(peak / 2**20, 1),
+        "aufrufe": aufrufe,
+        "aufrufe_pro_s": round(aufrufe / dauer, 1) if dauer else None,
+        "serialisierung_s": round(serialisierung, 3),
+    }
+
+
+def benchmark(
+    längen: Iterable[int] = (10, 100, 1000),
+    modi: Iterable[str] = ("serial", "pipelined", "async", "async-pipelined"),
+    latenz: Latenz = 0.0,
+    fehlerquote: float = 0.0,
+    config: Optional[SequenzAnalyseConfig] = None,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Misst ``analyse`` über synthetische Protokolle je Länge und Ausführungsmodus.
+
+    Gemessen werden Wandzeit, Spitzenspeicher (tracemalloc), Aufrufe pro
+    Sekunde und die Zeit für das Serialisieren des Traces.
+    """
+    config = config or SequenzAnalyseConfig(max_retries=10, retry_base_delay=0.0)
+    zeilen = []
+    for n in längen:
+        sequenzen = synthetisches_protokoll(n, seed)
+        for modus in modi:
+            asynchron = modus.startswith("async")
+            modus_config = dataclasses.replace(
+                config, execution_mode="pipelined" if modus.endswith("pipelined") else "serial"
+            )
+            fake_args = dict(latenz=latenz, fehlerquote=fehlerquote, seed=seed)
+            if asynchron:
+                client = AsyncFakeResponsesClient(**fake_args)
+                sa = AsyncSequenzAnalyse(client=client, config=modus_config, verbose=False)
+                lauf = lambda: asyncio.run(sa.analyse(sequenzen, "Synthetisches Interview."))
+            else:
+                client = FakeResponsesClient(**fake_args)
+                sa = SequenzAnalyse(client=client, config=modus_config, verbose=False)
+                lauf = lambda: sa.analyse(sequenzen, "Synthetisches Interview.")
+            zeilen.append({"sequenzen": n, "modus": modus, **_messen(lauf, client)})
+            if not asynchron:
+                sa.close()
+    return zeilen
+
+
+_IMPORT_SKRIPT = """
+import sys, time
+start = time.perf_counter()
+import sequenzanalyse
+importiert = time.perf_counter() - start
+start = time.perf_counter()
+sequenzanalyse.SequenzAnalyse(client=object(), verbose=False)
+erste_instanz = time.perf_counter() - start
+start = time.perf_counter()
+sequenzanalyse.SequenzAnalyse(client=object(), verbose=False)
+zweite_instanz = time.perf_counter() - start
+print(importiert, erste_instanz, zweite_instanz, "openai" in sys.modules)
+"""
+
+
+def importzeit(wiederholungen: int = 5) -> Dict[str, Any]:
+    """Misst Kaltstartkosten in frischen Interpretern (Median über ``wiederholungen``).
+
+    Erfasst werden ``import sequenzanalyse``, das Anlegen der ersten und einer
+    weiteren ``SequenzAnalyse`` (Prompts laden bzw. aus dem Speicher) und ob
+    dabei ``openai`` importiert wurde.
+    """
+    läufe = []
+    for _ in range(wiederholungen):
+        ausgabe = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SKRIPT], capture_output=True, text=True, check=True
+        ).stdout.split()
+        läufe.append(ausgabe)
+    return {
+        "import_s": round(statistics.median(float(l[0]) for l in läufe), 4),
+        "erste_instanz_s": round(statistics.median(float(l[1]) for l in läufe), 4),
+        "weitere_instanz_s": round(statistics.median(float(l[2]) for l in läufe), 5),
+        "openai_importiert": any(l[3] == "True" for l in läufe),
+    }
+
+
+def _tabelle(zeilen: List[Dict[str, Any]]) -> str:
+    spalten = list(zeilen[0])
+    breiten = [max(len(str(s)), *(len(str(z[s])) for z in zeilen)) for s in spalten]
+    kopf = "  ".join(str(s).ljust(b) for s, b in zip(spalten, breiten))
+    return "\n".join([kopf, "-" * len(kopf)] + ["  ".join(str(z[s]).ljust(b) for s, b in zip(spalten, breiten)) for z in zeilen])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline-Benchmark der Sequenzanalyse mit Fake-Client.")
+    parser.add_argument("--laengen", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--modi", nargs="+", default=["serial", "pipelined", "async", "async-pipelined"])
+    parser.add_argument("--latenz", type=float, default=0.0, help="Median-Latenz je Aufruf in Sekunden (lognormal).")
+    parser.add_argument("--fehlerquote", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Ergebnisse als JSON statt als Tabelle ausgeben.")
+    parser.add_argument("--importzeit", action="store_true", help="Nur Import- und Startkosten messen.")
+    args = parser.parse_args(argv)
+
+    if args.importzeit:
+        zeile = importzeit()
+        print(json.dumps(zeile, indent=2) if args.json else _tabelle([zeile]))
+        return
+
+    zeilen = benchmark(
+        längen=args.laengen,
+        modi=args.modi,
+        latenz=lognormal_latenz(args.latenz) if args.latenz else 0.0,
+        fehlerquote=args.fehlerquote,
+        seed=args.seed,
+    )
+    print(json.dumps(zeilen, indent=2) if args.json else _tabelle(zeilen))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Inhaltsadressierter Antwort-Cache für die kontextfreien Schritte 1 und 2."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+def cache_schlüssel(anfrage: Dict[str, Any]) -> str:
+    """Bildet einen Hash über Modell, Sampling-Parameter, Prompts, Eingabe und Schema."""
+    schema = anfrage.get("text_format")
+    inhalt = {
+        "model": anfrage.get("model"),
+        "max_output_tokens": anfrage.get("max_output_tokens"),
+        "reasoning": anfrage.get("reasoning"),
+        "temperature": anfrage.get("temperature"),
+        "tool_choice": anfrage.get("tool_choice"),
+        "input": anfrage.get("input"),
+        "schema": schema.model_json_schema() if hasattr(schema, "model_json_schema") else str(schema),
+    }
+    kodiert = json.dumps(inhalt, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(kodiert.encode("utf-8")).hexdigest()
+
+
+class AntwortCache(ABC):
+    """Schnittstelle für Antwort-Caches; eigene Speicher implementieren get/set."""
+
+    @abstractmethod
+    def get(self, schlüssel: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """Liefert (Ergebnis, Metadaten) zum Schlüssel oder None."""
+
+    @abstractmethod
+    def set(self, schlüssel: str, result: Any, meta: Dict[str, Any]) -> None:
+        """Legt (Ergebnis, Metadaten) unter dem Schlüssel ab."""
+
+
+class SQLiteCache(AntwortCache):
+    """Antwort-Cache in einer SQLite-Datei.
+
+    ``max_entries`` begrenzt die Zahl der Einträge (die am längsten nicht
+    gelesenen werden zuerst verdrängt), ``max_age`` das Alter in Sekunden.
+    """
+
+    def __init__(
+        self,
+        path: Union[Path, str] = ".sequenzanalyse-cache.sqlite",
+        max_entries: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS antworten ("
+                "schlüssel TEXT PRIMARY KEY, result TEXT NOT NULL, meta TEXT NOT NULL, "
+                "erstellt REAL NOT NULL, zugriff REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS antworten_zugriff ON antworten (zugriff)")
+
+    def get(self, schlüssel: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        jetzt = time.time()
+        with self._lock, self._conn:
+            zeile = self._conn.execute(
+                "SELECT result, meta, erstellt FROM antworten WHERE schlüssel = ?", (schlüssel,)
+            ).fetchone()
+            if zeile is None:
+                return None
+            if self.max_age is not None and jetzt - zeile[2] > self.max_age:
+                self._conn.execute("DELETE FROM antworten WHERE schlüssel = ?", (schlüssel,))
+                return None
+            self._conn.execute("UPDATE antworten SET zugriff = ? WHERE schlüssel = ?", (jetzt, schlüssel))
+
+        meta = json.loads(zeile[1])
+        meta["cache"] = {"hit": True, "key": schlüssel, "erstellt": zeile[2]}
+        return json.loads(zeile[0]), meta
+
+    def set(self, schlüssel: str, result: Any, meta: Dict[str, Any]) -> None:
+        jetzt = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO antworten VALUES (?, ?, ?, ?, ?)",
+                (
+                    schlüssel,
+                    json.dumps(result, ensure_ascii=False),
+                    json.dumps(meta, ensure_ascii=False, default=str),
+                    jetzt,
+                    jetzt,
+                ),
+            )
+            self._verdrängen(jetzt)
+
+    def _verdrängen(self, jetzt: float) -> None:
+        if self.max_age is not None:
+            self._conn.execute("DELETE FROM antworten WHERE erstellt < ?", (jetzt - self.max_age,))
+        if self.max_entries is not None:
+            anzahl = self._conn.execute("SELECT COUNT(*) FROM antworten").fetchone()[0]
+            if anzahl <= self.max_entries:
+                return
+            self._conn.execute(
+                "DELETE FROM antworten WHERE schlüssel NOT IN "
+                "(SELECT schlüssel FROM antworten ORDER BY zugriff DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def close(self) -> None:
+        """Schließt die Datenbankverbindung."""
+        self._conn.close()
@@ -0,0 +1,76 @@
+"""Inkrementelles Sichern abgeschlossener Runden und Fortsetzen abgebrochener Analysen."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+class RundenCheckpoint:
+    """Append-only JSONL-Datei: eine Kopfzeile, danach eine Zeile pro Runde.
+
+    Jede Runde wird sofort nach ihrem Abschluss geschrieben und auf die Platte
+    gezwungen, so dass bei einem Abbruch höchstens die laufende Runde verloren
+    geht. Eine beim Abbruch nur halb geschriebene letzte Zeile übergeht
+    ``laden``; ``kürzen`` entfernt sie, bevor weitere Runden angehängt werden.
+    """
+
+    def __init__(self, path: Union[Path, str], encoding: str = "utf-8") -> None:
+        self.path = Path(path)
+        self.encoding = encoding
+        self._gültig_bis: Optional[int] = None
+
+    def existiert(self) -> bool:
+        """Prüft, ob bereits eine Kopfzeile geschrieben wurde."""
+        return self.path.exists() and self.path.stat().st_size > 0
+
+    def laden(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Liest Kopf und abgeschlossene Runden, ohne die Datei zu verändern."""
+        kopf: Optional[Dict[str, Any]] = None
+        runden: List[Dict[str, Any]] = []
+        gültig_bis = 0
+
+        with self.path.open("rb") as f:
+            for zeile in f:
+                try:
+                    eintrag = json.loads(zeile.decode(self.encoding))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break
+                if not zeile.endswith(b"\n"):
+                    break
+                gültig_bis += len(zeile)
+                if kopf is None:
+                    kopf = eintrag
+                else:
+                    runden.append(eintrag)
+
+        if kopf is None:
+            raise ValueError(f"Checkpoint {self.path} enthält keine gültige Kopfzeile.")
+
+        self._gültig_bis = gültig_bis
+        return kopf, runden
+
+    def kürzen(self) -> None:
+        """Entfernt eine defekte Endzeile, die ``laden`` übergangen hat."""
+        if self._gültig_bis is not None and self._gültig_bis < self.path.stat().st_size:
+            with self.path.open("r+b") as f:
+                f.truncate(self._gültig_bis)
+
+    def beginnen(self, kopf: Dict[str, Any]) -> None:
+        """Legt die Datei neu an und schreibt die Kopfzeile."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w", encoding=self.encoding) as f:
+            self._schreiben(f, kopf)
+
+    def runde_schreiben(self, runde: Dict[str, Any]) -> None:
+        """Hängt eine abgeschlossene Runde an."""
+        with self.path.open("a", encoding=self.encoding) as f:
+            self._schreiben(f, runde)
+
+    @staticmethod
+    def _schreiben(f: Any, eintrag: Dict[str, Any]) -> None:
+        f.write(json.dumps(eintrag, ensure_ascii=False, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
@@ -0,0 +1,44 @@
+"""Prozessweit geteilte, erst bei Bedarf erzeugte API-Clients.
+
+Das ``openai``-Paket wird erst beim ersten Zugriff importiert. Alle
+Analyse-Instanzen ohne eigenen Client teilen sich einen Client und damit
+dessen HTTP-Verbindungspool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+_lock = threading.Lock()
+_client: Optional["OpenAI"] = None
+# Je Event-Loop ein eigener Client, da asynchrone Verbindungen an ihre Loop gebunden sind.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+
+def geteilter_client() -> "OpenAI":
+    """Liefert den gemeinsamen ``OpenAI``-Client des Prozesses."""
+    global _client
+    with _lock:
+        if _client is None:
+            from openai import OpenAI
+
+            _client = OpenAI()
+        return _client
+
+
+def geteilter_async_client() -> "AsyncOpenAI":
+    """Liefert den gemeinsamen ``AsyncOpenAI``-Client der laufenden Event-Loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = _async_clients[loop] = AsyncOpenAI()
+        return client
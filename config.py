@@ -6,6 +6,24 @@ from dataclasses import dataclass
 from typing import Literal, Optional
 
 
+@dataclass(frozen=True)
+class StufenConfig:
+    """Abweichende Modellparameter für einen einzelnen Schritt.
+
+    Felder mit ``None`` übernehmen den Wert aus ``SequenzAnalyseConfig``.
+    Ist ``escalation_model`` gesetzt, wird ein Aufruf, der an der
+    Schemavalidierung scheitert oder nach ``timeout`` Sekunden abbricht, einmal
+    mit diesem Modell (und ``escalation_reasoning_effort``) wiederholt.
+    """
+    model: Optional[str] = None
+    reasoning_effort: Optional[Literal["minimal", "low", "medium", "high", "xhigh"]] = None
+    max_output_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    timeout: Optional[float] = None
+    escalation_model: Optional[str] = None
+    escalation_reasoning_effort: Optional[Literal["minimal", "low", "medium", "high", "xhigh"]] = None
+
+
 @dataclass(frozen=True)
 class SequenzAnalyseConfig:
     """Bündelt Parameter für Modell- und Analyseausführung."""
@@ -16,3 +34,93 @@ class SequenzAnalyseConfig:
     temperature: float = 1.0
     tool_choice: str = "none"
     store: bool = False
+
+    # Modellwahl je Schritt (1, 2, 3 und die Kontextzusammenfassung), etwa ein
+    # kleines Modell für die vielen Aufrufe in Schritt 1 und das stärkste für
+    # Schritt 3; optional mit Eskalation auf ein größeres Modell.
+    stage1: Optional[StufenConfig] = None
+    stage2: Optional[StufenConfig] = None
+    stage3: Optional[StufenConfig] = None
+    summary: Optional[StufenConfig] = None
+
+    # Ausführung: "serial" arbeitet Runde für Runde, "pipelined" zieht die
+    # kontextfreien Schritte 1 und 2 parallel vor, während Schritt 3 der Reihe
+    # nach läuft.
+    execution_mode: Literal["serial", "pipelined"] = "serial"
+    max_workers: int = 4
+    lookahead: Optional[int] = None
+
+    # Wiederholung vorübergehender Fehler (429, 5xx, Verbindungsabbrüche,
+    # Überschreiten von ``request_timeout`` Sekunden je Aufruf)
+    max_retries: int = 0
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 60.0
+    request_timeout: Optional[float] = None
+
+    # Reparatur ungültiger Ausgaben: Scheitert die Validierung gegen das
+    # Schema (oder ist die Ausgabe abgeschnitten), wird die Anfrage bis zu
+    # ``schema_repair_retries`` Mal mit dem Validierungsfehler als Hinweis
+    # wiederholt.
+    schema_repair_retries: int = 1
+
+    # Hedging gegen lange Latenzen: Läuft ein Aufruf länger als das
+    # ``hedge_quantile``-Quantil der bisherigen Aufrufe desselben Schritts
+    # (ab ``hedge_min_samples`` Messungen, davor nach ``hedge_delay``
+    # Sekunden, falls gesetzt), startet eine zweite, gleiche Anfrage; die erste
+    # erfolgreiche Antwort zählt.
+    hedge_requests: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+    hedge_delay: Optional[float] = None
+
+    # Antwort-Cache für Schritt 1 und 2; False umgeht den Cache bei
+    # temperature > 0, wenn neue Stichproben gewünscht sind.
+    cache_sampled_outputs: bool = True
+
+    # Innerer Kontext für Schritt 3: "full" schickt das ganze bisherige
+    # Protokoll, "window" nur die letzten ``inner_context_window`` Sequenzen,
+    # "summary" zusätzlich eine Zusammenfassung des früheren Verlaufs, die alle
+    # ``inner_context_summary_interval`` Runden fortgeschrieben wird.
+    inner_context: Literal["full", "window", "summary"] = "full"
+    inner_context_window: int = 20
+    inner_context_summary_interval: int = 10
+
+    # Nachrichtenaufbau in Schritt 3: "prefix_cache" stellt stabile Teile
+    # (Anweisungen, äußerer Kontext, wachsendes Protokoll) an den Anfang und
+    # alles Rundenspezifische ans Ende, damit anbieterseitiges Prompt-Caching
+    # greift.
+    stage3_layout: Literal["default", "prefix_cache"] = "default"
+
+    # Schritt 1 in Stichproben: Mit ``stage1_samples`` > 1 entstehen die
+    # Beispielsituationen in ebenso vielen parallelen, kürzeren Aufrufen mit je
+    # ``stage1_situations_per_sample`` Situationen und eigenem Lebensbereich als
+    # Anregung. Die Ergebnisse werden zusammengeführt; Situationen mit gleichem
+    # normalisierten Titel oder einer Szene, die einer behaltenen mindestens zu
+    # ``stage1_duplicate_similarity`` gleicht (difflib-Quote), fallen weg.
+    stage1_samples: int = 1
+    stage1_situations_per_sample: int = 3
+    stage1_duplicate_similarity: float = 0.85
+
+    # Deduplizierung: Sequenzen, die nach Normalisierung (Unicode NFC,
+    # Leerraum, optional ohne Sprecherkennung gemäß ``speaker_tag_pattern``)
+    # gleich sind, durchlaufen Schritt 1 und 2 nur einmal je Instanz bzw.
+    # Batch-Lauf; alle weiteren Runden übernehmen das Ergebnis. Das Memo einer
+    # Instanz hält höchstens ``dedup_memo_size`` Sequenzen (die am längsten
+    # nicht wiederverwendeten werden verdrängt; None: unbegrenzt).
+    deduplicate_sequences: bool = False
+    speaker_tag_pattern: Optional[str] = None
+    dedup_memo_size: Optional[int] = 10_000
+
+    # Spekulative Ausführung von Schritt 3: Entwürfe mit ``speculative_model``
+    # (Standard: ``model``) und geringem Reasoning-Aufwand laufen bis zu
+    # ``speculative_depth`` Runden voraus und liefern vorläufige
+    # Fallstrukturhypothesen, mit denen Schritt 3 der Folgerunden vorab startet.
+    # Ein Vorab-Ergebnis wird nur behalten, wenn die endgültige Hypothese dem
+    # Entwurf mindestens zu ``speculative_min_similarity`` gleicht
+    # (difflib-Quote auf Wortebene). Nicht kombinierbar mit
+    # ``inner_context="summary"``.
+    speculative_stage3: bool = False
+    speculative_model: Optional[str] = None
+    speculative_reasoning_effort: Literal["minimal", "low", "medium", "high", "xhigh"] = "minimal"
+    speculative_min_similarity: float = 0.8
+    speculative_depth: int = 2
@@ -0,0 +1,129 @@
+"""Korpusweite Analyse vieler Protokolle mit gemeinsamem Ratenlimit."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Literal, Optional, Tuple, Union
+
+from .async_analyse import AsyncSequenzAnalyse
+from .cache import AntwortCache
+from .config import SequenzAnalyseConfig
+from .metriken import MetrikCallback
+from .resilienz import RateLimiter
+from .traces import TraceSchreiber
+from .utils import analyse_als_json_speichern, make_timestamp, slugify_short
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+@dataclass
+class KorpusJob:
+    """Ein zu analysierendes Protokoll eines Korpus."""
+    sequenzen: List[str]
+    äußerer_kontext: str
+
+
+@dataclass
+class KorpusErgebnis:
+    """Ausgang eines Korpus-Jobs: Pfad zum Trace oder der aufgetretene Fehler."""
+    job: KorpusJob
+    pfad: Optional[Path] = None
+    fehler: Optional[BaseException] = None
+
+
+async def korpus_analyse_async(
+    jobs: Iterable[Union[KorpusJob, Tuple[List[str], str]]],
+    output_dir: Union[Path, str] = ".",
+    config: Optional[SequenzAnalyseConfig] = None,
+    client: Optional[AsyncOpenAI] = None,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    max_concurrency: int = 64,
+    remove_responses_meta: bool = True,
+    cache: Optional[AntwortCache] = None,
+    metrik_callback: Optional[MetrikCallback] = None,
+    trace_format: Literal["json", "jsonl", "jsonl.gz"] = "json",
+) -> List[KorpusErgebnis]:
+    """Analysiert viele Protokolle parallel und speichert jeden fertigen Trace.
+
+    Alle Protokolle teilen sich Client, Nebenläufigkeitsgrenze und Budget an
+    Anfragen bzw. Tokens pro Minute. Vorübergehende Fehler (429/5xx) werden
+    gemäß ``config.max_retries`` wiederholt. Ohne ``config`` sind es 5
+    Wiederholungen; eine übergebene ``config`` gilt unverändert.
+    Ein fehlgeschlagenes Protokoll bricht den Lauf nicht ab, sondern wird im
+    zugehörigen ``KorpusErgebnis`` vermerkt.
+
+    Mit ``trace_format="jsonl"`` bzw. ``"jsonl.gz"`` wird jeder Trace
+    rundenweise geschrieben, während die Analyse läuft (siehe ``TraceSchreiber``).
+    """
+    config = config or SequenzAnalyseConfig(max_retries=5)
+    sa = AsyncSequenzAnalyse(
+        client=client,
+        config=config,
+        verbose=False,
+        max_concurrency=max_concurrency,
+        rate_limiter=RateLimiter(requests_per_minute, tokens_per_minute),
+        cache=cache,
+        metrik_callback=metrik_callback,
+    )
+    jobs = [job if isinstance(job, KorpusJob) else KorpusJob(*job) for job in jobs]
+    ts = make_timestamp()
+
+    async def _job(nummer: int, job: KorpusJob) -> KorpusErgebnis:
+        try:
+            if trace_format != "json":
+                pfad = Path(output_dir) / (
+                    f"sequenzanalyse--{slugify_short(job.äußerer_kontext)}--{ts}--{nummer}.{trace_format}"
+                )
+                trace = TraceSchreiber(pfad, remove_responses_meta=remove_responses_meta)
+                await sa.analyse(job.sequenzen, job.äußerer_kontext, trace=trace)
+                return KorpusErgebnis(job=job, pfad=pfad)
+
+            ergebnis = await sa.analyse(job.sequenzen, job.äußerer_kontext)
+            pfad = await asyncio.to_thread(
+                analyse_als_json_speichern,
+                ergebnis.data,
+                job.äußerer_kontext,
+                output_dir=output_dir,
+                remove_responses_meta=remove_responses_meta,
+                timestamp=f"{ts}--{nummer}",
+            )
+            return KorpusErgebnis(job=job, pfad=pfad)
+        except Exception as exc:
+            return KorpusErgebnis(job=job, fehler=exc)
+
+    return await asyncio.gather(*(_job(nummer, job) for nummer, job in enumerate(jobs, 1)))
+
+
+def korpus_analyse(
+    jobs: Iterable[Union[KorpusJob, Tuple[List[str], str]]],
+    output_dir: Union[Path, str] = ".",
+    config: Optional[SequenzAnalyseConfig] = None,
+    client: Optional[AsyncOpenAI] = None,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    max_concurrency: int = 64,
+    remove_responses_meta: bool = True,
+    cache: Optional[AntwortCache] = None,
+    metrik_callback: Optional[MetrikCallback] = None,
+    trace_format: Literal["json", "jsonl", "jsonl.gz"] = "json",
+) -> List[KorpusErgebnis]:
+    """Synchrone Kurzfunktion für ``korpus_analyse_async``."""
+    return asyncio.run(
+        korpus_analyse_async(
+            jobs,
+            output_dir=output_dir,
+            config=config,
+            client=client,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_concurrency=max_concurrency,
+            remove_responses_meta=remove_responses_meta,
+            cache=cache,
+            metrik_callback=metrik_callback,
+            trace_format=trace_format,
+        )
+    )
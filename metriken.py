@@ -0,0 +1,114 @@
+"""Strukturierte Laufzeit- und Tokenmetriken je API-Aufruf."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+@dataclass
+class AufrufMetrik:
+    """Messwerte eines einzelnen Modellaufrufs.
+
+    ``dauer`` ist die Wandzeit des gesamten Aufrufs inklusive Wiederholungen,
+    ``wartezeit`` der Anteil davon, der vor dem eigentlichen Request verging
+    (Nebenläufigkeitsgrenze, Ratenlimit, Backoff). Bei Cache-Treffern sind
+    alle Tokenzahlen 0, da nichts verbraucht wurde; ``input_tokens_geschätzt``
+    ist die vor dem Senden ermittelte Schätzung der Eingabe. ``eskaliert`` markiert
+    Aufrufe, die auf das Eskalationsmodell des Schritts ausweichen mussten;
+    ``model`` ist dann das Modell der endgültigen Antwort. ``hedged`` zeigt
+    eine zweite, parallel gestartete Anfrage an, ``reparaturen`` die Zahl der
+    Wiederholungen wegen ungültiger Ausgabe.
+    """
+    stufe: Union[int, str]
+    runde: Optional[int]
+    model: Optional[str]
+    dauer: float
+    wartezeit: float
+    input_tokens: int
+    output_tokens: int
+    reasoning_tokens: int
+    cached_tokens: int
+    retries: int
+    cache_hit: bool
+    input_tokens_geschätzt: int = 0
+    eskaliert: bool = False
+    hedged: bool = False
+    reparaturen: int = 0
+
+
+MetrikCallback = Callable[[AufrufMetrik], None]
+
+
+def metrik_aus_meta(
+    meta: Dict[str, Any],
+    stufe: Union[int, str],
+    runde: Optional[int],
+    dauer: float,
+    wartezeit: float,
+    retries: int,
+    cache_hit: bool,
+) -> AufrufMetrik:
+    """Baut eine ``AufrufMetrik`` aus den Metadaten einer Antwort."""
+    usage = {} if cache_hit else (meta.get("usage") or {})
+    verlauf = {} if cache_hit else meta
+    return AufrufMetrik(
+        stufe=stufe,
+        runde=runde,
+        model=meta.get("model"),
+        dauer=dauer,
+        wartezeit=wartezeit,
+        input_tokens=usage.get("input_tokens") or 0,
+        output_tokens=usage.get("output_tokens") or 0,
+        reasoning_tokens=(usage.get("output_tokens_details") or {}).get("reasoning_tokens") or 0,
+        cached_tokens=(usage.get("input_tokens_details") or {}).get("cached_tokens") or 0,
+        retries=retries,
+        cache_hit=cache_hit,
+        input_tokens_geschätzt=meta.get("input_tokens_geschätzt") or 0,
+        eskaliert=bool(verlauf.get("eskaliert")),
+        hedged=bool(verlauf.get("hedge")),
+        reparaturen=(verlauf.get("repariert") or {}).get("versuche", 0),
+    )
+
+
+_SUMMEN = (
+    "dauer", "wartezeit", "input_tokens", "input_tokens_geschätzt", "output_tokens", "reasoning_tokens",
+    "cached_tokens", "retries",
+)
+
+
+def _aggregieren(metriken: List[Dict[str, Any]]) -> Dict[str, Any]:
+    werte: Dict[str, Any] = {"aufrufe": len(metriken)}
+    for feld in _SUMMEN:
+        werte[feld] = sum(m.get(feld, 0) for m in metriken)
+    werte["cache_hits"] = sum(1 for m in metriken if m["cache_hit"])
+    werte["dauer_max"] = max((m["dauer"] for m in metriken), default=0.0)
+    werte["eskalationen"] = sum(1 for m in metriken if m.get("eskaliert"))
+    werte["hedges"] = sum(1 for m in metriken if m.get("hedged"))
+    werte["reparaturen"] = sum(m.get("reparaturen", 0) for m in metriken)
+    modelle: Dict[str, int] = {}
+    for m in metriken:
+        if not m["cache_hit"]:
+            modelle[m["model"]] = modelle.get(m["model"], 0) + 1
+    werte["modelle"] = modelle
+    return werte
+
+
+def metriken_zusammenfassen(analyse: Dict[str, Any]) -> Dict[str, Any]:
+    """Fasst die Metriken eines Traces je Schritt, je Runde und insgesamt zusammen."""
+    alle: List[Dict[str, Any]] = []
+    runden = []
+    for r in analyse["runden"]:
+        metriken = r.get("metriken", [])
+        alle.extend(metriken)
+        runden.append({"runde": r["runde"], **_aggregieren(metriken)})
+
+    stufen: Dict[str, List[Dict[str, Any]]] = {}
+    for m in alle:
+        stufen.setdefault(str(m["stufe"]), []).append(m)
+
+    return {
+        "gesamt": _aggregieren(alle),
+        "stufen": {stufe: _aggregieren(metriken) for stufe, metriken in stufen.items()},
+        "runden": runden,
+    }
@@ -41,6 +41,12 @@ class KontextfreieLesarten(BaseModel):
 
 ### Schritt 3
 
+# Keine Sonderzeichen hier. Schema geht direkt an OpenAI (Zusammenfassung des inneren Kontexts)
+class Kontextzusammenfassung(BaseModel):
+    """Verdichtete Fassung des früheren Protokollverlaufs."""
+    zusammenfassung: str
+
+
 class SequenzVsKontext(BaseModel):
     """Bewertung einer Sequenz im Vergleich zum Kontext."""
     sequenz: str
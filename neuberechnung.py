@@ -0,0 +1,177 @@
+"""Teilweise Neuberechnung einer Analyse nach geänderten Sequenzen, Prompts oder Einstellungen."""
+
+from __future__ import annotations
+
+import difflib
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Gruppen von Eingaben, von denen die Schritte abhängen (siehe ``_SequenzAnalyseBasis._abhängigkeiten``)
+_RUNDENTYPEN = ("anfang", "mitte", "ende")
+
+
+def fingerabdruck(*teile: Any) -> str:
+    """Kurzer, stabiler Hash über JSON-serialisierbare Teile."""
+    text = json.dumps(teile, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class Neuberechnung:
+    """Abhängigkeitsgrenze einer Neuberechnung gegenüber einer früheren Analyse.
+
+    Die Runden vor ``ab_runde`` werden unverändert übernommen, Schritt 3
+    läuft ab ``ab_runde`` neu. ``kontextfrei_übernommen`` ordnet neuen Runden
+    die Runde der früheren Analyse zu, deren Schritte 1 und 2 (gleiche
+    Sequenz, unveränderte Prompts und Einstellungen) wiederverwendet werden.
+    ``gründe`` nennt, was die Grenze bestimmt hat.
+    """
+    ab_runde: int
+    kontextfrei_übernommen: Dict[int, int] = field(default_factory=dict)
+    gründe: List[str] = field(default_factory=list)
+
+
+def _typ(runde: int, letzte_runde: int) -> str:
+    return "anfang" if runde == 1 else "mitte" if runde < letzte_runde else "ende"
+
+
+def neuberechnung_planen(
+    vorher: Dict[str, Any],
+    sequenzen: List[str],
+    äußerer_kontext: str,
+    abhängigkeiten: Dict[str, str],
+) -> Neuberechnung:
+    """Bestimmt, welche Runden und Schritte gegenüber ``vorher`` neu zu berechnen sind.
+
+    Schritt 3 einer Runde hängt von ihrer Sequenz, allen vorigen Sequenzen,
+    dem äußeren Kontext, dem Ergebnis der Vorrunde, dem Rundentyp (erste,
+    mittlere, letzte) sowie Prompt und Einstellungen ab; die Schritte 1 und 2
+    nur von der Sequenz und ihren Prompts und Einstellungen. Fehlen in
+    ``vorher`` die Fingerabdrücke (ältere Traces), gelten Prompts und
+    Einstellungen als unverändert.
+    """
+    alte_sequenzen = vorher["sequenzen"]
+    alte_runden = vorher["runden"]
+    alt = vorher.get("meta", {}).get("abhängigkeiten")
+    n_alt, n = len(alte_sequenzen), len(sequenzen)
+    grenze = n + 1
+    gründe: List[str] = []
+
+    def begrenzen(runde: int, grund: str) -> None:
+        nonlocal grenze
+        if runde <= n and runde < grenze:
+            grenze = runde
+            gründe.append(grund)
+
+    if alt is None:
+        gründe.append("ohne Fingerabdrücke: Prompts und Einstellungen gelten als unverändert")
+        alt = abhängigkeiten
+    if äußerer_kontext != vorher.get("äußerer_kontext"):
+        begrenzen(1, "äußerer Kontext geändert")
+    if alt.get("kontextfrei") != abhängigkeiten["kontextfrei"]:
+        begrenzen(1, "Schritt 1/2: Prompt oder Einstellungen geändert")
+    for runde, typ in ((1, "anfang"), (2, "mitte"), (n, "ende")):
+        if typ == _typ(runde, n) and alt.get(typ) != abhängigkeiten[typ]:
+            begrenzen(runde, f"Schritt 3 ({typ}): Prompt oder Einstellungen geändert")
+    if alt.get("zusammenfassung") != abhängigkeiten["zusammenfassung"]:
+        erste = next((r["runde"] for r in alte_runden if "zusammenfassung" in r.get("innerer_kontext", {})), None)
+        if erste is not None:
+            begrenzen(erste, "Zusammenfassung: Prompt oder Einstellungen geändert")
+
+    gemeinsam = 0
+    while gemeinsam < min(n, n_alt) and sequenzen[gemeinsam] == alte_sequenzen[gemeinsam]:
+        gemeinsam += 1
+    begrenzen(gemeinsam + 1, f"Sequenz {gemeinsam + 1} geändert, eingefügt oder entfernt")
+    kürzer = min(n, n_alt)
+    if n != n_alt and kürzer > 1:
+        begrenzen(kürzer, f"Runde {kürzer} wechselt den Rundentyp")
+    # Ohne alle Runden der früheren Analyse lässt sich nur bis zur ersten fehlenden übernehmen.
+    begrenzen(len(alte_runden) + 1, f"frühere Analyse endet nach Runde {len(alte_runden)}")
+
+    übernommen: Dict[int, int] = {}
+    if alt.get("kontextfrei") == abhängigkeiten["kontextfrei"]:
+        frühere = {}
+        for r in alte_runden:
+            frühere.setdefault(r.get("neue_sequenz", alte_sequenzen[r["runde"] - 1]), r["runde"])
+        for runde in range(grenze, n + 1):
+            if sequenzen[runde - 1] in frühere:
+                übernommen[runde] = frühere[sequenzen[runde - 1]]
+    return Neuberechnung(ab_runde=grenze, kontextfrei_übernommen=übernommen, gründe=gründe)
+
+
+def _hypothese(runde: Dict[str, Any]) -> str:
+    ergebnis = runde["ergebnisse"][2] if len(runde.get("ergebnisse", [])) > 2 else {}
+    return (
+        ergebnis.get("erste_fallstrukturhypothese")
+        or ergebnis.get("neue_fallstrukturhypothese")
+        or ergebnis.get("finale_fallstrukturhypothese")
+        or ""
+    )
+
+
+def _wortdiff(alt: str, neu: str) -> str:
+    """Wortweise Änderungen im Stil ``[-alt-]{+neu+}``."""
+    a, b = alt.split(), neu.split()
+    teile = []
+    for op, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if op == "equal":
+            teile.append(" ".join(a[i1:i2]))
+            continue
+        if i2 > i1:
+            teile.append("[-" + " ".join(a[i1:i2]) + "-]")
+        if j2 > j1:
+            teile.append("{+" + " ".join(b[j1:j2]) + "+}")
+    return " ".join(teile)
+
+
+def hypothesen_diff(vorher: Dict[str, Any], nachher: Dict[str, Any]) -> Dict[str, Any]:
+    """Vergleicht die Fallstrukturhypothesen zweier Analysen Runde für Runde.
+
+    Runden werden über ihre Sequenzen einander zugeordnet (eingefügte oder
+    entfernte Sequenzen haben kein Gegenstück). Je Runde mit abweichender
+    Hypothese liefert ``runden`` beide Fassungen, ihre Ähnlichkeit
+    (difflib-Quote auf Wortebene) und einen Wortdiff; ``finale`` vergleicht
+    die Hypothesen der jeweils letzten Runde.
+    """
+    alt_runden = {r["runde"]: r for r in vorher["runden"]}
+    neu_runden = {r["runde"]: r for r in nachher["runden"]}
+    paare = []
+    matcher = difflib.SequenceMatcher(None, vorher["sequenzen"], nachher["sequenzen"], autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        alt_nr = list(range(i1 + 1, i2 + 1))
+        neu_nr = list(range(j1 + 1, j2 + 1))
+        for k in range(max(len(alt_nr), len(neu_nr))):
+            paare.append((
+                alt_nr[k] if k < len(alt_nr) else None,
+                neu_nr[k] if k < len(neu_nr) else None,
+                op == "equal",
+            ))
+
+    def eintrag(alt_nr: Optional[int], neu_nr: Optional[int], sequenz_gleich: bool) -> Optional[Dict[str, Any]]:
+        alt = _hypothese(alt_runden[alt_nr]) if alt_nr in alt_runden else None
+        neu = _hypothese(neu_runden[neu_nr]) if neu_nr in neu_runden else None
+        if alt == neu:
+            return None
+        ähnlichkeit = (
+            round(difflib.SequenceMatcher(None, alt.split(), neu.split()).ratio(), 3)
+            if alt is not None and neu is not None else 0.0
+        )
+        return {
+            "runde_alt": alt_nr,
+            "runde_neu": neu_nr,
+            "sequenz_geändert": not sequenz_gleich,
+            "alt": alt,
+            "neu": neu,
+            "ähnlichkeit": ähnlichkeit,
+            "diff": _wortdiff(alt or "", neu or ""),
+        }
+
+    runden = [e for e in (eintrag(*paar) for paar in paare) if e is not None]
+    finale = eintrag(max(alt_runden, default=None), max(neu_runden, default=None), True)
+    return {
+        "geändert": len(runden),
+        "runden": runden,
+        "finale": finale or {"unverändert": True},
+    }
@@ -0,0 +1,302 @@
+"""Vorab-Schätzung von Tokens, Kosten und Laufzeit ohne API-Aufrufe."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .analyse import _SequenzAnalyseBasis
+from .config import SequenzAnalyseConfig
+from .utils import tokens_schätzen
+
+_STUFEN = ("1", "2", "3", "zusammenfassung")
+
+# Grobe Vorgaben, solange keine Traces vorliegen (siehe ``Prognose.aus_traces``)
+_AUSGABE = {"1": 700.0, "2": 1500.0, "3": 2000.0, "zusammenfassung": 500.0}
+_REASONING = {"1": 800.0, "2": 1500.0, "3": 3000.0, "zusammenfassung": 500.0}
+
+# Schlüssel und Satzzeichen des JSON-Gerüsts der Nutzereingabe in Schritt 3
+_JSON_GERÜST = 40
+
+# Mittlere Zahl der Beispielsituationen eines ungeteilten Schritt-1-Aufrufs
+# (der Prompt verlangt 5 bis 8); damit wird ``Prognose.ausgabe["1"]`` auf
+# ``stage1_situations_per_sample`` Situationen je Stichprobe umgerechnet.
+_SITUATIONEN_JE_AUFRUF = 6.5
+
+
+@dataclass(frozen=True)
+class Preis:
+    """Preise je Million Tokens; ``cached_input`` wird hier nicht angesetzt."""
+    input: float
+    output: float
+
+
+@dataclass
+class Prognose:
+    """Erwartete Ausgabe und Latenz je Schritt ("1", "2", "3", "zusammenfassung").
+
+    ``ausgabe`` sind sichtbare Ausgabetokens (sie gehen in spätere Eingaben
+    ein), ``reasoning`` die zusätzlich berechneten. Die Latenz eines Aufrufs
+    ist ``dauer_fix + sekunden_pro_token * (ausgabe + reasoning)``.
+    ``übernahme_anteil`` ist der Teil der Schritt-3-Ausgabe (Hypothese,
+    erwartete Fortführungen), der in die nächste Runde eingeht.
+    """
+    ausgabe: Dict[str, float] = field(default_factory=lambda: dict(_AUSGABE))
+    reasoning: Dict[str, float] = field(default_factory=lambda: dict(_REASONING))
+    dauer_fix: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(_STUFEN, 1.0))
+    sekunden_pro_token: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(_STUFEN, 0.02))
+    übernahme_anteil: float = 0.3
+
+    @classmethod
+    def aus_traces(cls, pfade: Iterable[Union[Path, str]]) -> "Prognose":
+        """Schätzt die Prognose aus den ``metriken`` gespeicherter Traces.
+
+        Cache-Treffer bleiben außen vor; die Latenz wird je Schritt linear
+        über die Ausgabetokens angepasst. Schritte ohne Daten behalten die
+        Vorgaben.
+        """
+        from .trace_index import _trace_dateien, _trace_lesen
+
+        if isinstance(pfade, (str, Path)):
+            pfade = [pfade]
+        messungen: Dict[str, List[Tuple[int, int, float]]] = {stufe: [] for stufe in _STUFEN}
+        for pfad, aus_verzeichnis in _trace_dateien(pfade):
+            try:
+                _, runden = _trace_lesen(pfad)
+            except ValueError:
+                if aus_verzeichnis:
+                    continue
+                raise
+            for runde in runden:
+                for m in runde.get("metriken", []):
+                    if m["cache_hit"] or str(m["stufe"]) not in messungen:
+                        continue
+                    messungen[str(m["stufe"])].append(
+                        (m["output_tokens"] - m["reasoning_tokens"], m["reasoning_tokens"], m["dauer"] - m["wartezeit"])
+                    )
+
+        prognose = cls()
+        for stufe, werte in messungen.items():
+            if not werte:
+                continue
+            n = len(werte)
+            prognose.ausgabe[stufe] = sum(w[0] for w in werte) / n
+            prognose.reasoning[stufe] = sum(w[1] for w in werte) / n
+            x = [w[0] + w[1] for w in werte]
+            y = [w[2] for w in werte]
+            mx, my = sum(x) / n, sum(y) / n
+            varianz = sum((xi - mx) ** 2 for xi in x)
+            steigung = sum((xi - mx) * (yi - my) for xi, yi in zip(x, y)) / varianz if varianz else 0.0
+            if steigung > 0:
+                prognose.sekunden_pro_token[stufe] = steigung
+                prognose.dauer_fix[stufe] = max(0.0, my - steigung * mx)
+            else:
+                prognose.sekunden_pro_token[stufe] = my / mx if mx else 0.0
+                prognose.dauer_fix[stufe] = 0.0
+        return prognose
+
+    def latenz(self, stufe: str, ausgabe: float) -> float:
+        return self.dauer_fix[stufe] + self.sekunden_pro_token[stufe] * (ausgabe + self.reasoning[stufe])
+
+
+@dataclass
+class Plan:
+    """Geschätzter Bedarf eines Protokolls oder Korpus, je Schritt aufgeschlüsselt.
+
+    ``output_tokens`` enthält Reasoning-Tokens. ``dauer`` nennt Sekunden je
+    Ausführungsmodus; ``kosten`` ist None, wenn für ein Modell kein Preis
+    vorliegt.
+    """
+    protokolle: int
+    sequenzen: int
+    aufrufe: Dict[str, int]
+    input_tokens: Dict[str, int]
+    output_tokens: Dict[str, int]
+    kosten: Optional[float]
+    dauer: Dict[str, float]
+
+    @property
+    def tokens(self) -> int:
+        return sum(self.input_tokens.values()) + sum(self.output_tokens.values())
+
+
+class Planer:
+    """Schätzt einen Lauf, ohne die API aufzurufen.
+
+    Die Eingaben werden aus den tatsächlichen Prompts, Sequenzen und dem
+    äußeren Kontext berechnet (wachsender innerer Kontext je nach
+    ``config.inner_context``, Deduplizierung, Stichproben in Schritt 1),
+    Ausgaben und Latenzen aus einer ``Prognose``. Alles läuft über
+    Zeichenlängen, daher sind auch Tausende Protokolle in Sekunden geplant.
+    """
+
+    def __init__(
+        self,
+        config: Optional[SequenzAnalyseConfig] = None,
+        prognose: Optional[Prognose] = None,
+        preise: Optional[Dict[str, Preis]] = None,
+    ) -> None:
+        self._basis = _SequenzAnalyseBasis(config=config, verbose=False)
+        self.config = self._basis.config
+        self.prognose = prognose or Prognose()
+        self.preise = preise or {}
+        prompts = self._basis._prompts
+        self._prompt_tokens = {
+            "1": tokens_schätzen(prompts.prompt1_beispielsituationen),
+            "2": tokens_schätzen(prompts.prompt2_lesarten),
+            "zusammenfassung": tokens_schätzen(prompts.prompt3_kontextzusammenfassung),
+            **{typ: tokens for typ, (_, tokens) in prompts.konfrontation.items()},
+        }
+        # Zusätzliche Anweisung je Stichprobe in Schritt 1 (nur bei ``stage1_samples`` > 1)
+        anfragen = self._basis._stichproben_anfragen("")
+        self._stichproben_hinweis = tokens_schätzen(anfragen[-1]["input"][-1]["content"]) if len(anfragen) > 1 else 0
+        self._modelle = {
+            str(stufe): self._basis._common_parse_args(stufe)["model"] for stufe in (1, 2, 3, "zusammenfassung")
+        }
+
+    def _protokoll(self, sequenzen: List[str], äußerer_kontext: str, gesehen: set) -> Dict[str, Any]:
+        config, prognose = self.config, self.prognose
+        n = len(sequenzen)
+        längen = [len(s) for s in sequenzen]
+        aufrufe = dict.fromkeys(_STUFEN, 0)
+        eingabe = dict.fromkeys(_STUFEN, 0)
+        ausgabe = dict.fromkeys(_STUFEN, 0.0)
+        latenzen: Dict[str, List[float]] = {stufe: [0.0] * n for stufe in _STUFEN}
+
+        proben = max(1, config.stage1_samples)
+        faktor = config.stage1_situations_per_sample / _SITUATIONEN_JE_AUFRUF if proben > 1 else 1.0
+        aus1, aus2, aus3 = prognose.ausgabe["1"], prognose.ausgabe["2"], prognose.ausgabe["3"]
+        kontext_tokens = tokens_schätzen(äußerer_kontext)
+
+        protokoll_zeichen = 0
+        zusammengefasst_bis = 0
+        for i, sequenz in enumerate(sequenzen):
+            runde = i + 1
+            schlüssel = self._basis._dedup_schlüssel(sequenz)
+            if schlüssel is None or schlüssel not in gesehen:
+                if schlüssel is not None:
+                    gesehen.add(schlüssel)
+                aufrufe["1"] += proben
+                eingabe["1"] += proben * (self._prompt_tokens["1"] + tokens_schätzen(sequenz) + self._stichproben_hinweis)
+                ausgabe["1"] += proben * (aus1 * faktor + prognose.reasoning["1"])
+                latenzen["1"][i] = prognose.latenz("1", aus1 * faktor)
+                aufrufe["2"] += 1
+                eingabe["2"] += self._prompt_tokens["2"] + int(aus1 * faktor * proben)
+                ausgabe["2"] += aus2 + prognose.reasoning["2"]
+                latenzen["2"][i] = prognose.latenz("2", aus2)
+
+            if config.inner_context == "full":
+                innen = protokoll_zeichen
+            else:
+                fenster = config.inner_context_window
+                fällig = runde - 1 - zusammengefasst_bis >= fenster + config.inner_context_summary_interval
+                if config.inner_context == "summary" and fällig:
+                    neu_bis = runde - 1 - fenster
+                    aufrufe["zusammenfassung"] += 1
+                    eingabe["zusammenfassung"] += (
+                        self._prompt_tokens["zusammenfassung"]
+                        + int(prognose.ausgabe["zusammenfassung"] if zusammengefasst_bis else 0)
+                        + (sum(längen[zusammengefasst_bis:neu_bis]) + 3) // 4
+                    )
+                    ausgabe["zusammenfassung"] += prognose.ausgabe["zusammenfassung"] + prognose.reasoning["zusammenfassung"]
+                    latenzen["zusammenfassung"][i] = prognose.latenz("zusammenfassung", prognose.ausgabe["zusammenfassung"])
+                    zusammengefasst_bis = neu_bis
+                ab = max(0, runde - 1 - fenster) if config.inner_context == "window" else zusammengefasst_bis
+                innen = sum(längen[ab: runde - 1]) + max(0, runde - 2 - ab)
+                if config.inner_context == "summary" and ab:
+                    innen += 4 * prognose.ausgabe["zusammenfassung"]
+
+            typ = "anfang" if runde == 1 else "mitte" if runde < n else "ende"
+            aufrufe["3"] += 1
+            eingabe["3"] += (
+                self._prompt_tokens[typ] + _JSON_GERÜST + tokens_schätzen(sequenz) + kontext_tokens
+                + (innen + 3) // 4 + int(aus2) + (int(aus3 * prognose.übernahme_anteil) if runde > 1 else 0)
+            )
+            ausgabe["3"] += aus3 + prognose.reasoning["3"]
+            latenzen["3"][i] = prognose.latenz("3", aus3)
+            protokoll_zeichen += längen[i] + (1 if i else 0)
+
+        kontextfrei = [a + b for a, b in zip(latenzen["1"], latenzen["2"])]
+        schritt3 = [a + b for a, b in zip(latenzen["3"], latenzen["zusammenfassung"])]
+        parallel = min(config.max_workers, config.lookahead or config.max_workers)
+        return {
+            "aufrufe": aufrufe,
+            "eingabe": eingabe,
+            "ausgabe": ausgabe,
+            "dauer": {
+                "serial": sum(kontextfrei) + sum(schritt3),
+                "pipelined": (kontextfrei[0] if n else 0.0)
+                + sum(max(s3, k / parallel) for s3, k in zip(schritt3, kontextfrei[1:] + [0.0])),
+            },
+            "latenz_summe": sum(kontextfrei) + sum(schritt3) + sum(latenzen["1"]) * (proben - 1),
+        }
+
+    def _kosten(self, eingabe: Dict[str, int], ausgabe: Dict[str, int]) -> Optional[float]:
+        kosten = 0.0
+        for stufe in _STUFEN:
+            if not eingabe[stufe] and not ausgabe[stufe]:
+                continue
+            preis = self.preise.get(self._modelle[stufe])
+            if preis is None:
+                return None
+            kosten += (eingabe[stufe] * preis.input + ausgabe[stufe] * preis.output) / 1_000_000
+        return round(kosten, 4)
+
+    def planen(self, sequenzen: List[str], äußerer_kontext: str) -> Plan:
+        """Plant ein einzelnes Protokoll (Modi "serial" und "pipelined")."""
+        return self.korpus_planen([(sequenzen, äußerer_kontext)], max_concurrency=None)
+
+    def korpus_planen(
+        self,
+        jobs: Iterable[Any],
+        max_concurrency: Optional[int] = 64,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ) -> Plan:
+        """Plant einen Korpus aus ``KorpusJob``s bzw. Paaren (Sequenzen, äußerer Kontext).
+
+        "serial" und "pipelined" nennen die Dauer, wenn die Protokolle
+        nacheinander laufen; "korpus" die von ``korpus_analyse`` mit
+        ``max_concurrency`` gleichzeitigen Aufrufen und optionalen Limits je
+        Minute (das längste Protokoll ist die Untergrenze).
+        """
+        gesehen: set = set()
+        aufrufe = dict.fromkeys(_STUFEN, 0)
+        eingabe = dict.fromkeys(_STUFEN, 0)
+        ausgabe = dict.fromkeys(_STUFEN, 0.0)
+        dauer = {"serial": 0.0, "pipelined": 0.0}
+        längstes = latenz_summe = 0.0
+        protokolle = sequenzen_gesamt = 0
+        for job in jobs:
+            sequenzen, äußerer_kontext = (job.sequenzen, job.äußerer_kontext) if hasattr(job, "sequenzen") else job
+            teil = self._protokoll(sequenzen, äußerer_kontext, gesehen)
+            for stufe in _STUFEN:
+                aufrufe[stufe] += teil["aufrufe"][stufe]
+                eingabe[stufe] += teil["eingabe"][stufe]
+                ausgabe[stufe] += teil["ausgabe"][stufe]
+            for modus in dauer:
+                dauer[modus] += teil["dauer"][modus]
+            längstes = max(längstes, teil["dauer"][self.config.execution_mode])
+            latenz_summe += teil["latenz_summe"]
+            protokolle += 1
+            sequenzen_gesamt += len(sequenzen)
+
+        ausgabe_int = {stufe: int(wert) for stufe, wert in ausgabe.items()}
+        if max_concurrency is not None:
+            schranken = [längstes, latenz_summe / max_concurrency]
+            if requests_per_minute:
+                schranken.append(sum(aufrufe.values()) / requests_per_minute * 60)
+            if tokens_per_minute:
+                schranken.append((sum(eingabe.values()) + sum(ausgabe_int.values())) / tokens_per_minute * 60)
+            dauer["korpus"] = max(schranken)
+
+        return Plan(
+            protokolle=protokolle,
+            sequenzen=sequenzen_gesamt,
+            aufrufe=aufrufe,
+            input_tokens=eingabe,
+            output_tokens=ausgabe_int,
+            kosten=self._kosten(eingabe, ausgabe_int),
+            dauer={modus: round(wert, 1) for modus, wert in dauer.items()},
+        )
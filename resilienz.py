@@ -0,0 +1,155 @@
+"""Ratenbegrenzung und Wiederholungslogik für API-Aufrufe."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Union
+
+from .config import SequenzAnalyseConfig
+from .utils import tokens_schätzen
+
+
+def ist_wiederholbar(exc: BaseException) -> bool:
+    """Prüft, ob ein Fehler vorübergehend ist (429, 5xx, Verbindung, Timeout)."""
+    import openai
+
+    if isinstance(exc, (openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code >= 500
+    return False
+
+
+def ist_eskalierbar(exc: BaseException) -> bool:
+    """Prüft, ob ein größeres Modell helfen könnte (Timeout, ungültige oder abgeschnittene Ausgabe)."""
+    import openai
+    import pydantic
+
+    return isinstance(
+        exc,
+        (
+            openai.APITimeoutError,
+            openai.LengthFinishReasonError,
+            openai.ContentFilterFinishReasonError,
+            pydantic.ValidationError,
+            json.JSONDecodeError,
+        ),
+    )
+
+
+def ist_reparierbar(exc: BaseException) -> bool:
+    """Prüft, ob die Ausgabe des Modells ungültig oder abgeschnitten war."""
+    import openai
+    import pydantic
+
+    return isinstance(exc, (openai.LengthFinishReasonError, pydantic.ValidationError, json.JSONDecodeError))
+
+
+def wartezeit(versuch: int, config: SequenzAnalyseConfig, exc: Optional[BaseException] = None) -> float:
+    """Berechnet die Wartezeit vor dem nächsten Versuch (exponentiell mit Jitter).
+
+    Ein ``Retry-After``-Header des Anbieters hat Vorrang.
+    """
+    response = getattr(exc, "response", None)
+    retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), config.retry_max_delay)
+        except ValueError:
+            pass
+
+    obergrenze = min(config.retry_max_delay, config.retry_base_delay * 2 ** versuch)
+    return random.uniform(0, obergrenze)
+
+
+def eingabe_tokens_schätzen(anfrage: Dict[str, Any]) -> int:
+    """Schätzt die Eingabetokens aller Nachrichten einer Anfrage."""
+    return sum(tokens_schätzen(str(m.get("content", ""))) for m in anfrage.get("input", []))
+
+
+def schätze_tokens(anfrage: Dict[str, Any], ausgabe_tokens: int = 4000) -> int:
+    """Schätzt den Tokenbedarf einer Anfrage aus Eingabe und maximaler Ausgabe."""
+    return eingabe_tokens_schätzen(anfrage) + (anfrage.get("max_output_tokens") or ausgabe_tokens)
+
+
+class LatenzStatistik:
+    """Gleitendes Fenster der letzten Aufrufdauern je Schritt für das Hedging."""
+
+    def __init__(self, fenster: int = 200) -> None:
+        self._dauern: Dict[Union[int, str], Deque[float]] = {}
+        self._fenster = fenster
+        self._lock = threading.Lock()
+
+    def erfassen(self, stufe: Union[int, str], dauer: float) -> None:
+        with self._lock:
+            self._dauern.setdefault(stufe, deque(maxlen=self._fenster)).append(dauer)
+
+    def quantil(self, stufe: Union[int, str], q: float, mindestens: int) -> Optional[float]:
+        """Liefert das ``q``-Quantil, sobald mindestens ``mindestens`` Messungen vorliegen."""
+        with self._lock:
+            dauern = sorted(self._dauern.get(stufe, ()))
+        if not dauern or len(dauern) < mindestens:
+            return None
+        return dauern[min(len(dauern) - 1, int(q * len(dauern)))]
+
+
+class RateLimiter:
+    """Token-Bucket für Anfragen und Tokens pro Minute.
+
+    Eine Instanz wird von allen Protokollen eines Laufs geteilt, so dass der
+    Durchsatz durch das Limit des Anbieters bestimmt wird und nicht durch die
+    Latenz einzelner Protokolle. Wartende Aufrufe werden in Ankunftsreihenfolge
+    bedient.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._anfragen = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._stand = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _auffüllen(self) -> None:
+        jetzt = time.monotonic()
+        vergangen = jetzt - self._stand
+        self._stand = jetzt
+        if self.requests_per_minute:
+            self._anfragen = min(self.requests_per_minute, self._anfragen + vergangen * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + vergangen * self.tokens_per_minute / 60)
+
+    async def erwerben(self, tokens: int = 0) -> None:
+        """Wartet, bis eine Anfrage mit ``tokens`` geschätzten Tokens erlaubt ist."""
+        async with self._lock:
+            while True:
+                self._auffüllen()
+                warten = 0.0
+                if self.requests_per_minute and self._anfragen < 1:
+                    warten = (1 - self._anfragen) * 60 / self.requests_per_minute
+                if self.tokens_per_minute:
+                    benötigt = min(tokens, self.tokens_per_minute)
+                    if self._tokens < benötigt:
+                        warten = max(warten, (benötigt - self._tokens) * 60 / self.tokens_per_minute)
+                if warten <= 0:
+                    break
+                await asyncio.sleep(warten)
+
+            if self.requests_per_minute:
+                self._anfragen -= 1
+            if self.tokens_per_minute:
+                self._tokens -= tokens
+
+    def korrigieren(self, tokens: int) -> None:
+        """Verbucht die Differenz zwischen geschätzten und tatsächlichen Tokens."""
+        if self.tokens_per_minute:
+            self._tokens -= tokens
@@ -0,0 +1,222 @@
+"""Streamende Sequenzierung großer Transkripte und Manifeste für Korpusläufe."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Literal, Optional, Union
+
+from .utils import tokens_schätzen
+
+if TYPE_CHECKING:
+    from .korpus import KorpusJob
+
+
+_BLOCKGRÖSSE = 1 << 20
+
+# Zeilenanfang mit Sprecherkennung wie "A:", "I1:", "Interviewer:" oder "Frau K. (lacht):"
+SPRECHER_MUSTER = r"(?m)^(?=[ \t]*[A-ZÄÖÜ][\w.\-]*(?:[ \t][\w.\-]+){0,2}[ \t]*(?:\([^)\n]*\))?[ \t]*:)"
+
+
+@dataclass(frozen=True)
+class Sequenzierung:
+    """Regeln, nach denen ein Transkript in Sequenzen zerlegt wird.
+
+    ``strategie``: "trenner" teilt an der Zeichenkette ``sep``, "regex" an
+    Treffern von ``muster``, "sprecher" vor jeder Zeile mit Sprecherkennung
+    (``muster`` überschreibt ``SPRECHER_MUSTER``), "absatz" an Leerzeilen.
+    Sequenzen werden von Leerraum befreit; leere fallen immer weg, solche mit
+    weniger als ``min_zeichen`` Zeichen werden verworfen oder
+    (``kurze="anhängen"``) an die vorige Sequenz angehängt.
+    """
+    strategie: Literal["trenner", "regex", "sprecher", "absatz"] = "trenner"
+    sep: str = "[SEP]"
+    muster: Optional[str] = None
+    min_zeichen: int = 1
+    kurze: Literal["verwerfen", "anhängen"] = "verwerfen"
+    encoding: str = "utf-8"
+
+    def _regex(self) -> Optional["re.Pattern[str]"]:
+        if self.strategie == "trenner":
+            return None
+        if self.strategie == "absatz":
+            return re.compile(r"\n[ \t]*\n\s*")
+        if self.strategie == "sprecher":
+            return re.compile(self.muster or SPRECHER_MUSTER)
+        if not self.muster:
+            raise ValueError('strategie="regex" erfordert ein muster.')
+        return re.compile(self.muster)
+
+
+@dataclass
+class ManifestEintrag:
+    """Eine sequenzierte Datei: Umfang und die Regeln, um sie erneut zu lesen."""
+    pfad: str
+    sequenzen: int
+    tokens: int
+    zeichen: int
+    sequenzierung: Sequenzierung = field(default_factory=Sequenzierung)
+
+    def sequenzen_laden(self) -> List[str]:
+        return list(sequenzen_lesen(self.pfad, self.sequenzierung))
+
+
+def _blöcke(path: Path, encoding: str) -> Iterator[str]:
+    with path.open(encoding=encoding, newline="") as f:
+        while True:
+            block = f.read(_BLOCKGRÖSSE)
+            if not block:
+                return
+            yield block
+
+
+def _an_trenner(blöcke: Iterable[str], sep: str) -> Iterator[str]:
+    rest = ""
+    for block in blöcke:
+        teile = (rest + block).split(sep)
+        rest = teile.pop()
+        yield from teile
+    yield rest
+
+
+def _an_muster(blöcke: Iterable[str], regex: "re.Pattern[str]") -> Iterator[str]:
+    """Teilt an Regex-Treffern; der letzte Treffer eines Blocks wird erst mit dem nächsten entschieden."""
+    rest = ""
+    for block in blöcke:
+        puffer = rest + block
+        pos = 0
+        treffer = list(regex.finditer(puffer))
+        for m in treffer[:-1]:
+            yield puffer[pos:m.start()]
+            pos = m.end()
+        rest = puffer[pos:]
+    pos = 0
+    for m in regex.finditer(rest):
+        yield rest[pos:m.start()]
+        pos = m.end()
+    yield rest[pos:]
+
+
+def _bereinigen(segmente: Iterable[str], min_zeichen: int, kurze: str) -> Iterator[str]:
+    vorige: Optional[str] = None
+    übertrag = ""
+    for segment in segmente:
+        segment = segment.strip()
+        if not segment:
+            continue
+        if len(segment) < min_zeichen:
+            if kurze == "anhängen":
+                if vorige is not None:
+                    vorige = f"{vorige}\n{segment}"
+                else:
+                    übertrag = f"{übertrag}\n{segment}".strip()
+            continue
+        if übertrag:
+            segment, übertrag = f"{übertrag}\n{segment}", ""
+        if vorige is not None:
+            yield vorige
+        vorige = segment
+    if vorige is not None:
+        yield vorige
+    elif übertrag:
+        yield übertrag
+
+
+def sequenzen_lesen(path: Union[Path, str], sequenzierung: Optional[Sequenzierung] = None) -> Iterator[str]:
+    """Liest eine Textdatei blockweise und liefert ihre Sequenzen nacheinander.
+
+    Der Speicherbedarf hängt von der längsten Sequenz ab, nicht von der
+    Dateigröße.
+    """
+    sequenzierung = sequenzierung or Sequenzierung()
+    blöcke = _blöcke(Path(path), sequenzierung.encoding)
+    regex = sequenzierung._regex()
+    segmente = _an_trenner(blöcke, sequenzierung.sep) if regex is None else _an_muster(blöcke, regex)
+    return _bereinigen(segmente, sequenzierung.min_zeichen, sequenzierung.kurze)
+
+
+def _datei_erfassen(path: Path, sequenzierung: Sequenzierung) -> ManifestEintrag:
+    anzahl = tokens = zeichen = 0
+    for sequenz in sequenzen_lesen(path, sequenzierung):
+        anzahl += 1
+        tokens += tokens_schätzen(sequenz)
+        zeichen += len(sequenz)
+    return ManifestEintrag(str(path), anzahl, tokens, zeichen, sequenzierung)
+
+
+def _dateien(pfade: Iterable[Union[Path, str]], muster: str) -> Iterator[Path]:
+    for pfad in map(Path, pfade):
+        if pfad.is_dir():
+            yield from sorted(p for p in pfad.rglob(muster) if p.is_file())
+        else:
+            yield pfad
+
+
+def korpus_sequenzieren(
+    pfade: Union[Path, str, Iterable[Union[Path, str]]],
+    sequenzierung: Optional[Sequenzierung] = None,
+    manifest: Optional[Union[Path, str]] = None,
+    muster: str = "*.txt",
+    prozesse: Optional[int] = None,
+) -> List[ManifestEintrag]:
+    """Sequenziert Dateien bzw. alle zu ``muster`` passenden Dateien in Verzeichnissen.
+
+    Die Dateien werden in einem Prozess-Pool mit ``prozesse`` Prozessen
+    (Standard: Zahl der CPUs) verarbeitet. Das Ergebnis ist ein Manifest mit
+    Sequenzzahl und geschätzten Tokens je Datei; mit ``manifest`` wird es
+    zusätzlich als JSONL gespeichert (siehe ``manifest_laden`` und
+    ``manifest_jobs``).
+    """
+    if isinstance(pfade, (str, Path)):
+        pfade = [pfade]
+    sequenzierung = sequenzierung or Sequenzierung()
+    sequenzierung._regex()
+    dateien = list(_dateien(pfade, muster))
+
+    prozesse = min(prozesse or os.cpu_count() or 1, len(dateien))
+    if prozesse <= 1:
+        einträge = [_datei_erfassen(datei, sequenzierung) for datei in dateien]
+    else:
+        with ProcessPoolExecutor(max_workers=prozesse) as pool:
+            einträge = list(pool.map(_datei_erfassen, dateien, [sequenzierung] * len(dateien), chunksize=4))
+
+    if manifest is not None:
+        with Path(manifest).open("w", encoding="utf-8") as f:
+            for eintrag in einträge:
+                f.write(json.dumps(asdict(eintrag), ensure_ascii=False) + "\n")
+    return einträge
+
+
+def manifest_laden(path: Union[Path, str]) -> List[ManifestEintrag]:
+    """Lädt ein mit ``korpus_sequenzieren`` geschriebenes Manifest."""
+    einträge = []
+    with Path(path).open(encoding="utf-8") as f:
+        for zeile in f:
+            if zeile.strip():
+                daten = json.loads(zeile)
+                daten["sequenzierung"] = Sequenzierung(**daten["sequenzierung"])
+                einträge.append(ManifestEintrag(**daten))
+    return einträge
+
+
+def manifest_jobs(
+    manifest: Union[Path, str, Iterable[ManifestEintrag]],
+    äußerer_kontext: Union[str, Callable[[Path], str]],
+) -> Iterator["KorpusJob"]:
+    """Liefert je Manifest-Eintrag einen ``KorpusJob`` für ``korpus_analyse``.
+
+    Die Sequenzen werden erst beim Erzeugen des Jobs gelesen.
+    ``äußerer_kontext`` ist ein fester Text oder eine Funktion des Dateipfads.
+    """
+    from .korpus import KorpusJob
+
+    einträge = manifest_laden(manifest) if isinstance(manifest, (str, Path)) else manifest
+    for eintrag in einträge:
+        if eintrag.sequenzen == 0:
+            continue
+        kontext = äußerer_kontext(Path(eintrag.pfad)) if callable(äußerer_kontext) else äußerer_kontext
+        yield KorpusJob(eintrag.sequenzen_laden(), kontext)
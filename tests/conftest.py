@@ -0,0 +1,108 @@
+"""Deterministischer Ersatz für ``client.responses`` in den Tests.
+
+Antworten füllen das verlangte Schema mit Werten, die nur von der Eingabe
+abhängen; gleiche Anfragen liefern also gleiche Ergebnisse, unabhängig von
+der Reihenfolge paralleler Aufrufe. ``fehler`` kann einzelne Aufrufe mit
+einer Ausnahme beantworten, ``ungültig`` mit einer Ausgabe, die nicht zum
+Schema passt.
+"""
+
+import hashlib
+import json
+import threading
+import typing
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from sequenzanalyse import models
+
+Fehler = Callable[[Dict[str, Any]], Optional[BaseException]]
+Ungültig = Callable[[Dict[str, Any]], bool]
+
+
+def _wert(typ: Any, text: str) -> Any:
+    origin = typing.get_origin(typ)
+    if origin is typing.Literal:
+        return typing.get_args(typ)[0]
+    if origin in (list, List):
+        return [_wert(typing.get_args(typ)[0], f"{text}.{i}") for i in range(2)]
+    if isinstance(typ, type) and issubclass(typ, BaseModel):
+        return beispiel(typ, text)
+    return text
+
+
+def beispiel(schema: type, text: str) -> BaseModel:
+    hints = typing.get_type_hints(schema)
+    return schema(**{name: _wert(hints[name], f"{name} {text}") for name in schema.model_fields})
+
+
+class FakeAntwort:
+    def __init__(self, parsed: Optional[BaseModel], model: str) -> None:
+        self.output_parsed = parsed
+        self.output_text = parsed.model_dump_json() if parsed is not None else "{}"
+        self.model = model
+        self.usage = {
+            "input_tokens": 100,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": 50,
+            "output_tokens_details": {"reasoning_tokens": 10},
+            "total_tokens": 150,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "object": "response",
+            "status": "completed",
+            "model": self.model,
+            "usage": dict(self.usage),
+            "output": [{"type": "message", "content": [{"type": "output_text", "text": self.output_text}]}],
+        }
+
+
+class FakeResponses:
+    def __init__(self, fehler: Optional[Fehler] = None, ungültig: Optional[Ungültig] = None) -> None:
+        self.fehler = fehler
+        self.ungültig = ungültig
+        self.anfragen: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _antworten(self, anfrage: Dict[str, Any], schema: type) -> FakeAntwort:
+        with self._lock:
+            self.anfragen.append(anfrage)
+        exc = self.fehler(anfrage) if self.fehler is not None else None
+        if exc is not None:
+            raise exc
+        if self.ungültig is not None and self.ungültig(anfrage):
+            return FakeAntwort(None, anfrage.get("model", "fake"))
+        inhalt = json.dumps(anfrage["input"], ensure_ascii=False, sort_keys=True, default=str)
+        text = hashlib.sha256(inhalt.encode("utf-8")).hexdigest()[:8]
+        return FakeAntwort(beispiel(schema, text), anfrage.get("model", "fake"))
+
+    def parse(self, **anfrage: Any) -> FakeAntwort:
+        return self._antworten(anfrage, anfrage["text_format"])
+
+    def create(self, **anfrage: Any) -> FakeAntwort:
+        return self._antworten(anfrage, getattr(models, anfrage["text"]["format"]["name"]))
+
+
+class AsyncFakeResponses(FakeResponses):
+    async def parse(self, **anfrage: Any) -> FakeAntwort:
+        return self._antworten(anfrage, anfrage["text_format"])
+
+
+class FakeClient:
+    def __init__(self, fehler: Optional[Fehler] = None, ungültig: Optional[Ungültig] = None) -> None:
+        self.responses = FakeResponses(fehler, ungültig)
+
+
+class AsyncFakeClient:
+    def __init__(self, fehler: Optional[Fehler] = None, ungültig: Optional[Ungültig] = None) -> None:
+        self.responses = AsyncFakeResponses(fehler, ungültig)
+
+
+def schema_name(anfrage: Dict[str, Any]) -> str:
+    """Name des Antwortschemas einer ``parse``- oder ``create``-Anfrage."""
+    if "text_format" in anfrage:
+        return anfrage["text_format"].__name__
+    return anfrage["text"]["format"]["name"]
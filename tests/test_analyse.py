@@ -0,0 +1,51 @@
+from conftest import FakeClient, schema_name
+
+from sequenzanalyse import SequenzAnalyse, SequenzAnalyseConfig
+
+SEQUENZEN = [
+    "A: Guten Tag, schön, dass Sie da sind.",
+    "B: Ja, hallo.",
+    "A: Wie war die Anreise?",
+    "B: Na ja, der Zug hatte Verspätung.",
+    "A: Das tut mir leid.",
+]
+
+
+def _analyse(config, sequenzen=SEQUENZEN):
+    client = FakeClient()
+    ergebnis = SequenzAnalyse(client=client, config=config, verbose=False).analyse(sequenzen, "Interview")
+    return ergebnis, client.responses.anfragen
+
+
+def _schritt3(anfragen):
+    return [a for a in anfragen if schema_name(a).startswith("KonfrontationMitKontext")]
+
+
+def test_pipelined_liefert_dieselben_runden_wie_serial():
+    serial, _ = _analyse(SequenzAnalyseConfig())
+    pipelined, anfragen = _analyse(SequenzAnalyseConfig(execution_mode="pipelined", max_workers=3, lookahead=2))
+
+    assert [r["ergebnisse"] for r in pipelined.data["runden"]] == [r["ergebnisse"] for r in serial.data["runden"]]
+    assert len(anfragen) == 3 * len(SEQUENZEN)
+    # Schritt 3 bleibt sequentiell: Runde n sieht die Hypothese aus Runde n - 1.
+    assert len(_schritt3(anfragen)) == len(SEQUENZEN)
+
+
+def test_prefix_cache_key_gilt_für_alle_runden_eines_protokolls():
+    config = SequenzAnalyseConfig(stage3_layout="prefix_cache")
+    _, anfragen = _analyse(config)
+    _, andere = _analyse(config, ["B: Etwas ganz anderes.", *SEQUENZEN[1:]])
+
+    schlüssel = {a["prompt_cache_key"] for a in _schritt3(anfragen)}
+    assert len(schlüssel) == 1
+    assert schlüssel.isdisjoint(a["prompt_cache_key"] for a in _schritt3(andere))
+
+
+def test_metriken_je_stufe():
+    ergebnis, _ = _analyse(SequenzAnalyseConfig())
+    metriken = ergebnis.metriken()
+
+    for stufe in ("1", "2", "3"):
+        assert metriken["stufen"][stufe]["aufrufe"] == len(SEQUENZEN)
+        assert metriken["stufen"][stufe]["input_tokens"] == 100 * len(SEQUENZEN)
+    assert metriken["gesamt"]["aufrufe"] == 3 * len(SEQUENZEN)
@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from sequenzanalyse import AsyncSequenzAnalyse, SequenzAnalyseConfig
+from sequenzanalyse.benchmark import AsyncFakeResponsesClient, synthetisches_protokoll
+
+
+class _Schritt3Fehler(RuntimeError):
+    pass
+
+
+class _Schritt3SchlägtFehl:
+    """Fake-Responses, deren Schritt-3-Aufrufe scheitern, während Schritt 1/2 noch laufen."""
+
+    def __init__(self) -> None:
+        self._fake = AsyncFakeResponsesClient(latenz=0.01).responses
+
+    async def parse(self, **anfrage):
+        if anfrage["text_format"].__name__.startswith("KonfrontationMitKontext"):
+            raise _Schritt3Fehler("Schritt 3 fehlgeschlagen")
+        return await self._fake.parse(**anfrage)
+
+
+class _Client:
+    def __init__(self) -> None:
+        self.responses = _Schritt3SchlägtFehl()
+
+
+def test_pipelined_fehler_in_schritt3_bricht_vorgezogene_tasks_ab():
+    async def lauf():
+        sa = AsyncSequenzAnalyse(
+            client=_Client(),
+            config=SequenzAnalyseConfig(execution_mode="pipelined", lookahead=4),
+            verbose=False,
+        )
+        with pytest.raises(_Schritt3Fehler):
+            await sa.analyse(synthetisches_protokoll(10), "Kontext")
+        offen = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        assert offen == []
+
+    asyncio.run(lauf())
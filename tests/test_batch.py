@@ -0,0 +1,86 @@
+from conftest import FakeClient, schema_name
+
+from sequenzanalyse import BatchSequenzAnalyse, SequenzAnalyse, SequenzAnalyseConfig, StufenConfig
+from sequenzanalyse.batch import LokalerBatchClient
+
+PROTOKOLLE = [
+    (["A: Guten Tag.", "B: Ja, hallo.", "A: Wie war die Anreise?"], "Interview"),
+    (["A: Guten Tag.", "B: Worum geht es?"], "Beratungsgespräch"),
+]
+
+
+def _batch(config=None, **fake):
+    client = FakeClient(**fake)
+    sa = BatchSequenzAnalyse(client=LokalerBatchClient(client), config=config, verbose=False, poll_interval=0)
+    return sa.analyse(PROTOKOLLE), client.responses.anfragen
+
+
+def _anzahl(anfragen, name):
+    return sum(1 for a in anfragen if schema_name(a).startswith(name))
+
+
+def test_batch_liefert_dieselben_runden_wie_die_direkte_analyse():
+    ergebnisse, anfragen = _batch()
+
+    assert len(anfragen) == 3 * 5
+    for ergebnis, (sequenzen, kontext) in zip(ergebnisse, PROTOKOLLE):
+        direkt = SequenzAnalyse(client=FakeClient(), verbose=False).analyse(sequenzen, kontext)
+        assert [r["ergebnisse"] for r in ergebnis.data["runden"]] == [r["ergebnisse"] for r in direkt.data["runden"]]
+
+
+def test_fehlgeschlagene_zeilen_werden_erneut_eingereicht():
+    fehlschläge = []
+
+    def fehler(anfrage):
+        if schema_name(anfrage) == "KontextfreieLesarten" and not fehlschläge:
+            fehlschläge.append(anfrage)
+            return RuntimeError("Zeile abgelehnt")
+        return None
+
+    ergebnisse, anfragen = _batch(SequenzAnalyseConfig(max_retries=1), fehler=fehler)
+
+    assert _anzahl(anfragen, "KontextfreieLesarten") == 5 + 1
+    assert all(len(e.data["runden"]) == len(p[0]) for e, p in zip(ergebnisse, PROTOKOLLE))
+    assert sum(e.metriken()["gesamt"]["retries"] for e in ergebnisse) == 1
+
+
+def test_gleiche_sequenzen_laufen_nur_einmal_durch_schritt_1_und_2():
+    ergebnisse, anfragen = _batch(SequenzAnalyseConfig(deduplicate_sequences=True))
+
+    assert _anzahl(anfragen, "Beispielsituationen") == 4
+    assert _anzahl(anfragen, "KontextfreieLesarten") == 4
+    runde = ergebnisse[1].data["runden"][0]
+    assert runde["ergebnisse"][:2] == ergebnisse[0].data["runden"][0]["ergebnisse"][:2]
+    assert runde["responses_meta"][0]["dedupliziert"] == {"von_runde": 1, "anderes_protokoll": True}
+
+
+def test_ungültige_ausgaben_gehen_an_das_eskalationsmodell():
+    config = SequenzAnalyseConfig(stage3=StufenConfig(escalation_model="groß"))
+    ergebnisse, anfragen = _batch(
+        config, ungültig=lambda a: schema_name(a).startswith("KonfrontationMitKontext") and a["model"] != "groß"
+    )
+
+    assert _anzahl(anfragen, "KonfrontationMitKontext") == 2 * 5
+    metriken = ergebnisse[0].metriken()
+    assert metriken["gesamt"]["eskalationen"] == 3
+    assert metriken["stufen"]["3"]["modelle"] == {"groß": 3}
+    assert metriken["gesamt"]["retries"] == 0
+
+
+def test_ungültige_ausgaben_werden_repariert():
+    # Die Reparaturanfrage hängt den Validierungsfehler als weitere Nachricht an.
+    ergebnisse, anfragen = _batch(ungültig=lambda a: schema_name(a) == "KontextfreieLesarten" and len(a["input"]) == 2)
+
+    assert _anzahl(anfragen, "KontextfreieLesarten") == 2 * 5
+    metriken = [e.metriken()["gesamt"] for e in ergebnisse]
+    assert [m["reparaturen"] for m in metriken] == [3, 2]
+    assert [m["retries"] for m in metriken] == [0, 0]
+    assert ergebnisse[0].data["runden"][0]["responses_meta"][1]["repariert"]["versuche"] == 1
+
+
+def test_schritt_1_in_stichproben():
+    ergebnisse, anfragen = _batch(SequenzAnalyseConfig(stage1_samples=3))
+
+    assert _anzahl(anfragen, "Beispielsituationen") == 3 * 5
+    assert _anzahl(anfragen, "KontextfreieLesarten") == 5
+    assert ergebnisse[0].metriken()["stufen"]["1"]["aufrufe"] == 3 * 3
@@ -0,0 +1,12 @@
+from sequenzanalyse import SequenzAnalyseConfig
+from sequenzanalyse.benchmark import benchmark
+
+
+def test_benchmark_misst_alle_modi():
+    config = SequenzAnalyseConfig(max_retries=10, retry_base_delay=0.0)
+    zeilen = benchmark(längen=(4,), fehlerquote=0.1, config=config)
+
+    assert [z["modus"] for z in zeilen] == ["serial", "pipelined", "async", "async-pipelined"]
+    # Fehlversuche zählen mit, mindestens drei Aufrufe je Sequenz
+    assert all(z["aufrufe"] >= 3 * 4 for z in zeilen)
+    assert all(z["dauer_s"] >= 0 and z["peak_mib"] >= 0 for z in zeilen)
@@ -0,0 +1,68 @@
+import pytest
+from conftest import FakeClient, schema_name
+
+from sequenzanalyse import SequenzAnalyse, SequenzAnalyseConfig
+from sequenzanalyse.cache import AntwortCache, SQLiteCache
+
+SEQUENZEN = ["A: Guten Tag.", "B: Ja, hallo.", "A: Wie geht es Ihnen?"]
+
+
+@pytest.fixture
+def uhr(monkeypatch):
+    jetzt = [1000.0]
+    monkeypatch.setattr("sequenzanalyse.cache.time.time", lambda: jetzt[0])
+    return jetzt
+
+
+def test_antwort_cache_ist_abstrakt():
+    with pytest.raises(TypeError):
+        AntwortCache()
+
+
+def test_treffer_trägt_cache_metadaten(tmp_path, uhr):
+    cache = SQLiteCache(tmp_path / "cache.sqlite")
+    assert cache.get("k") is None
+
+    cache.set("k", {"lesarten": []}, {"model": "fake"})
+    result, meta = cache.get("k")
+
+    assert result == {"lesarten": []}
+    assert meta == {"model": "fake", "cache": {"hit": True, "key": "k", "erstellt": 1000.0}}
+
+
+def test_abgelaufene_einträge_verfallen(tmp_path, uhr):
+    cache = SQLiteCache(tmp_path / "cache.sqlite", max_age=60)
+    cache.set("k", 1, {})
+    uhr[0] += 59
+    assert cache.get("k") is not None
+    uhr[0] += 2
+    assert cache.get("k") is None
+
+
+def test_am_längsten_nicht_gelesene_einträge_werden_verdrängt(tmp_path, uhr):
+    cache = SQLiteCache(tmp_path / "cache.sqlite", max_entries=2)
+    cache.set("a", 1, {})
+    uhr[0] += 1
+    cache.set("b", 2, {})
+    uhr[0] += 1
+    cache.get("a")
+    uhr[0] += 1
+    cache.set("c", 3, {})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_zweite_analyse_bedient_schritt_1_und_2_aus_dem_cache(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.sqlite")
+    SequenzAnalyse(client=FakeClient(), config=SequenzAnalyseConfig(), verbose=False, cache=cache).analyse(
+        SEQUENZEN, "Interview"
+    )
+    client = FakeClient()
+    ergebnis = SequenzAnalyse(client=client, config=SequenzAnalyseConfig(), verbose=False, cache=cache).analyse(
+        SEQUENZEN, "Interview"
+    )
+
+    assert all(schema_name(a).startswith("KonfrontationMitKontext") for a in client.responses.anfragen)
+    assert all(r["responses_meta"][0]["cache"]["hit"] for r in ergebnis.data["runden"])
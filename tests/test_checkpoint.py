@@ -0,0 +1,75 @@
+import json
+
+import pytest
+from conftest import FakeClient, schema_name
+
+from sequenzanalyse import SequenzAnalyse, SequenzAnalyseConfig
+
+SEQUENZEN = [
+    "A: Guten Tag.",
+    "B: Ja, hallo.",
+    "A: Wie war die Anreise?",
+    "B: Lang.",
+    "A: Das tut mir leid.",
+]
+
+
+def _abbruch_nach_runde(n):
+    """Fehler für jeden Aufruf von Schritt 3 nach den ersten ``n``."""
+    schritt3 = []
+
+    def fehler(anfrage):
+        if schema_name(anfrage).startswith("KonfrontationMitKontext"):
+            schritt3.append(anfrage)
+            if len(schritt3) > n:
+                return RuntimeError("Verbindung verloren")
+        return None
+
+    return fehler
+
+
+def _analyse(client, pfad, sequenzen=SEQUENZEN, resume=False):
+    sa = SequenzAnalyse(client=client, config=SequenzAnalyseConfig(), verbose=False)
+    return sa.analyse(sequenzen, "Interview", checkpoint=pfad, resume=resume)
+
+
+@pytest.fixture
+def abgebrochen(tmp_path):
+    pfad = tmp_path / "interview.jsonl"
+    with pytest.raises(RuntimeError):
+        _analyse(FakeClient(_abbruch_nach_runde(2)), pfad)
+    return pfad
+
+
+def test_fortsetzen_berechnet_nur_fehlende_runden(abgebrochen):
+    with pytest.raises(FileExistsError):
+        _analyse(FakeClient(), abgebrochen)
+
+    client = FakeClient()
+    ergebnis = _analyse(client, abgebrochen, resume=True)
+
+    assert [r["runde"] for r in ergebnis.data["runden"]] == [1, 2, 3, 4, 5]
+    assert ergebnis.data["meta"]["fortgesetzt_ab_runde"] == 3
+    assert len(client.responses.anfragen) == 3 * 3
+    assert len(abgebrochen.read_text(encoding="utf-8").splitlines()) == 1 + 5
+
+
+def test_halb_geschriebene_endzeile_wird_verworfen(abgebrochen):
+    with abgebrochen.open("a", encoding="utf-8") as f:
+        f.write('{"runde": 3, "ergebn')
+
+    ergebnis = _analyse(FakeClient(), abgebrochen, resume=True)
+
+    zeilen = abgebrochen.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(z).get("runde") for z in zeilen] == [None, 1, 2, 3, 4, 5]
+    assert len(ergebnis.data["runden"]) == 5
+
+
+def test_fremder_checkpoint_bleibt_unverändert(abgebrochen):
+    with abgebrochen.open("a", encoding="utf-8") as f:
+        f.write('{"runde": 3, "ergebn')
+    vorher = abgebrochen.read_bytes()
+
+    with pytest.raises(ValueError):
+        _analyse(FakeClient(), abgebrochen, sequenzen=SEQUENZEN[:4], resume=True)
+    assert abgebrochen.read_bytes() == vorher
@@ -0,0 +1,32 @@
+from conftest import FakeClient, schema_name
+
+from sequenzanalyse import SequenzAnalyse, SequenzAnalyseConfig
+
+SEQUENZEN = ["A: Ja.", "B: Wie bitte?", "A:  Ja. ", "B: Ach so."]
+
+
+def _stufe1(client):
+    return sum(1 for a in client.responses.anfragen if schema_name(a) == "Beispielsituationen")
+
+
+def test_gleiche_sequenzen_durchlaufen_schritt_1_und_2_einmal():
+    client = FakeClient()
+    sa = SequenzAnalyse(client=client, config=SequenzAnalyseConfig(deduplicate_sequences=True), verbose=False)
+    runden = sa.analyse(SEQUENZEN, "Interview").data["runden"]
+
+    assert _stufe1(client) == 3
+    assert runden[2]["ergebnisse"][:2] == runden[0]["ergebnisse"][:2]
+    assert runden[2]["responses_meta"][0]["dedupliziert"] == {"von_runde": 1}
+
+    runden = sa.analyse(["B: Ach so."], "Anderes Interview").data["runden"]
+    assert _stufe1(client) == 3
+    assert runden[0]["responses_meta"][1]["dedupliziert"] == {"von_runde": 4, "anderes_protokoll": True}
+
+
+def test_memo_verdrängt_am_längsten_nicht_genutzte_sequenzen():
+    client = FakeClient()
+    config = SequenzAnalyseConfig(deduplicate_sequences=True, dedup_memo_size=1)
+    SequenzAnalyse(client=client, config=config, verbose=False).analyse(SEQUENZEN, "Interview")
+
+    # "A: Ja." ist bei seiner Wiederholung schon von "B: Wie bitte?" verdrängt.
+    assert _stufe1(client) == 4
@@ -0,0 +1,39 @@
+import json
+
+from conftest import FakeClient, schema_name
+
+from sequenzanalyse import SequenzAnalyse, SequenzAnalyseConfig
+
+SEQUENZEN = [f"A: Satz Nummer {i}." for i in range(1, 9)]
+
+
+def _analyse(**einstellungen):
+    client = FakeClient()
+    config = SequenzAnalyseConfig(inner_context_window=2, **einstellungen)
+    ergebnis = SequenzAnalyse(client=client, config=config, verbose=False).analyse(SEQUENZEN, "Interview")
+    schritt3 = [
+        json.dumps(a["input"], ensure_ascii=False)
+        for a in client.responses.anfragen
+        if schema_name(a).startswith("KonfrontationMitKontext")
+    ]
+    return ergebnis.data["runden"], client.responses.anfragen, schritt3
+
+
+def test_fenster_begrenzt_den_inneren_kontext():
+    runden, _, schritt3 = _analyse(inner_context="window")
+
+    assert runden[7]["innerer_kontext"]["wörtlich_ab"] == 6
+    assert "Satz Nummer 5." not in schritt3[7]
+    assert "Satz Nummer 6." in schritt3[7] and "Satz Nummer 7." in schritt3[7]
+    assert runden[7]["innerer_kontext"]["tokens"] < runden[7]["innerer_kontext"]["tokens_voll"]
+
+
+def test_zusammenfassung_wird_rundenweise_fortgeschrieben():
+    runden, anfragen, schritt3 = _analyse(inner_context="summary", inner_context_summary_interval=2)
+
+    zusammenfassungen = [a for a in anfragen if schema_name(a) == "Kontextzusammenfassung"]
+    assert len(zusammenfassungen) == 2
+    assert [r["innerer_kontext"]["zusammengefasst_bis"] for r in runden] == [0, 0, 0, 0, 2, 2, 4, 4]
+    letzte = runden[6]["innerer_kontext"]["zusammenfassung"]
+    assert letzte in schritt3[7]
+    assert "Satz Nummer 4." not in schritt3[7] and "Satz Nummer 5." in schritt3[7]
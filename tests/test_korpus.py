@@ -0,0 +1,66 @@
+import asyncio
+
+import openai
+from conftest import AsyncFakeClient
+
+from sequenzanalyse import AsyncSequenzAnalyse, RateLimiter, SequenzAnalyseConfig, korpus_analyse
+
+try:
+    import httpx
+except ImportError:  # neuere SDK-Versionen bringen ihren eigenen HTTP-Client mit
+    import httpx2 as httpx
+
+PROTOKOLL_A = ["A: Guten Tag.", "B: Ja, hallo.", "A: Wie geht es Ihnen?"]
+PROTOKOLL_B = ["I: Erzählen Sie mal.", "B: Wo soll ich anfangen?"]
+
+
+class _Buchhaltung(RateLimiter):
+    """Ratenlimit, das die netto reservierten Tokens mitzählt."""
+
+    def __init__(self) -> None:
+        super().__init__(tokens_per_minute=10**9)
+        self.netto = 0
+
+    async def erwerben(self, tokens: int = 0) -> None:
+        self.netto += tokens
+        await super().erwerben(tokens)
+
+    def korrigieren(self, tokens: int) -> None:
+        self.netto += tokens
+        super().korrigieren(tokens)
+
+
+def test_korpus_analyse_mit_eigenem_client(tmp_path):
+    client = AsyncFakeClient()
+    ergebnisse = korpus_analyse(
+        [(PROTOKOLL_A, "Interview"), (PROTOKOLL_B, "Narratives Interview")], output_dir=tmp_path, client=client
+    )
+
+    assert [e.fehler for e in ergebnisse] == [None, None]
+    assert all(e.pfad.exists() for e in ergebnisse)
+    assert len(client.responses.anfragen) == 3 * (len(PROTOKOLL_A) + len(PROTOKOLL_B))
+
+
+def test_fehlgeschlagene_versuche_geben_ihre_reservierung_zurück():
+    fehlschläge = []
+
+    def fehler(anfrage):
+        if len(fehlschläge) < 2:
+            fehlschläge.append(anfrage)
+            return openai.APIConnectionError(request=httpx.Request("POST", "https://fake.invalid/v1/responses"))
+        return None
+
+    client = AsyncFakeClient(fehler)
+    limiter = _Buchhaltung()
+    sa = AsyncSequenzAnalyse(
+        client=client,
+        config=SequenzAnalyseConfig(max_retries=3, retry_base_delay=0.0),
+        verbose=False,
+        rate_limiter=limiter,
+    )
+    asyncio.run(sa.analyse(PROTOKOLL_A, "Interview"))
+
+    erfolgreich = len(client.responses.anfragen) - len(fehlschläge)
+    assert erfolgreich == 3 * len(PROTOKOLL_A)
+    # Jede erfolgreiche Antwort verbraucht laut Fake 150 Tokens, Fehlversuche nichts.
+    assert limiter.netto == 150 * erfolgreich
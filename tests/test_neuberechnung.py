@@ -0,0 +1,25 @@
+from sequenzanalyse import SequenzAnalyse, analyse_als_json_speichern
+from sequenzanalyse.benchmark import FakeResponsesClient, synthetisches_protokoll
+
+
+def _analyse(sequenzen, vorher=None):
+    with SequenzAnalyse(client=FakeResponsesClient(latenz=0.0), verbose=False) as sa:
+        return sa.analyse(sequenzen, "Interview", vorher=vorher)
+
+
+def test_vorher_als_json_datei_von_analyse_als_json_speichern(tmp_path):
+    sequenzen = synthetisches_protokoll(8, seed=4)
+    alt = _analyse(sequenzen)
+    pfad = analyse_als_json_speichern(alt.data, "Interview", output_dir=tmp_path)
+
+    geändert = list(sequenzen)
+    geändert[5] = "A: Eine korrigierte sechste Sequenz."
+    neu = _analyse(geändert, vorher=pfad)
+
+    info = neu.data["meta"]["neuberechnung"]
+    stufen = neu.metriken()["stufen"]
+    assert info["ab_runde"] == 6
+    assert stufen["1"]["aufrufe"] == 1
+    assert stufen["3"]["aufrufe"] == 3
+    assert [r["runde"] for r in neu.data["runden"]] == list(range(1, 9))
+    assert info["hypothesen_diff"]["geändert"] == 3
@@ -0,0 +1,65 @@
+import pytest
+from conftest import FakeClient
+
+from sequenzanalyse import Planer, Preis, Prognose, SequenzAnalyse, SequenzAnalyseConfig, trace_speichern
+
+SEQUENZEN = [f"A: Das ist Satz Nummer {i}, mit ein paar Wörtern mehr." for i in range(1, 10)]
+SEQUENZEN[6] = SEQUENZEN[2]
+
+CONFIG = SequenzAnalyseConfig(
+    stage1_samples=2,
+    inner_context="summary",
+    inner_context_window=2,
+    inner_context_summary_interval=2,
+    deduplicate_sequences=True,
+)
+
+
+def _lauf(config=CONFIG):
+    with SequenzAnalyse(client=FakeClient(), config=config, verbose=False) as sa:
+        return sa.analyse(SEQUENZEN, "Interview")
+
+
+def test_aufrufe_entsprechen_dem_tatsächlichen_lauf():
+    plan = Planer(CONFIG).planen(SEQUENZEN, "Interview")
+    stufen = _lauf().metriken()["stufen"]
+
+    assert plan.aufrufe == {stufe: stufen.get(stufe, {}).get("aufrufe", 0) for stufe in plan.aufrufe}
+    assert plan.aufrufe["1"] == 2 * 8
+    assert plan.aufrufe["zusammenfassung"] == 3
+
+
+def test_eingabetokens_von_schritt_1_aus_den_echten_prompts():
+    plan = Planer(CONFIG).planen(SEQUENZEN, "Interview")
+    geschätzt = _lauf().metriken()["stufen"]["1"]["input_tokens_geschätzt"]
+
+    assert plan.input_tokens["1"] == pytest.approx(geschätzt, rel=0.05)
+
+
+def test_kosten_nur_mit_allen_preisen():
+    config = SequenzAnalyseConfig(model="klein")
+    mit = Planer(config, preise={"klein": Preis(input=1.0, output=2.0)}).planen(SEQUENZEN, "Interview")
+    ohne = Planer(config, preise={"anderes": Preis(input=1.0, output=2.0)}).planen(SEQUENZEN, "Interview")
+
+    erwartet = (sum(mit.input_tokens.values()) * 1.0 + sum(mit.output_tokens.values()) * 2.0) / 1_000_000
+    assert mit.kosten == pytest.approx(erwartet, abs=1e-4)
+    assert ohne.kosten is None
+
+
+def test_korpus_dauer_berücksichtigt_tokenlimit():
+    jobs = [(SEQUENZEN, "Interview")] * 3
+    plan = Planer(SequenzAnalyseConfig()).korpus_planen(jobs, max_concurrency=1000, tokens_per_minute=10_000)
+
+    assert plan.protokolle == 3
+    assert plan.dauer["korpus"] >= round(plan.tokens / 10_000 * 60, 1)
+
+
+def test_prognose_aus_traces(tmp_path):
+    trace_speichern(_lauf(SequenzAnalyseConfig()).data, tmp_path / "interview.jsonl")
+    (tmp_path / "manifest.jsonl").write_text('{"pfad": "interview.txt"}\n', encoding="utf-8")
+
+    prognose = Prognose.aus_traces(tmp_path)
+
+    # Der Fake antwortet mit 50 Ausgabetokens, davon 10 Reasoning.
+    assert prognose.ausgabe["3"] == 40
+    assert prognose.reasoning["3"] == 10
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import openai
+from conftest import FakeClient, schema_name
+
+from sequenzanalyse import SequenzAnalyse, SequenzAnalyseConfig, StufenConfig
+
+try:
+    import httpx
+except ImportError:  # neuere SDK-Versionen bringen ihren eigenen HTTP-Client mit
+    import httpx2 as httpx
+
+SEQUENZEN = ["A: Guten Tag.", "B: Ja, hallo.", "A: Wie war die Anreise?"]
+
+
+def _analyse(config, **fake):
+    client = FakeClient(**fake)
+    with SequenzAnalyse(client=client, config=config, verbose=False) as sa:
+        return sa.analyse(SEQUENZEN, "Interview"), client.responses.anfragen
+
+
+def _einmal(fehler):
+    """Beantwortet nur den ersten Aufruf von Schritt 2 mit ``fehler()``."""
+    gesehen = []
+    lock = threading.Lock()
+
+    def hook(anfrage):
+        with lock:
+            if schema_name(anfrage) != "KontextfreieLesarten" or gesehen:
+                return None
+            gesehen.append(anfrage)
+        return fehler()
+
+    return hook
+
+
+def _zeitüberschreitung():
+    return openai.APITimeoutError(request=httpx.Request("POST", "https://fake.invalid/v1/responses"))
+
+
+def test_eskalation_ist_keine_wiederholung():
+    def fehler(anfrage):
+        if schema_name(anfrage).startswith("KonfrontationMitKontext") and anfrage["model"] != "groß":
+            return _zeitüberschreitung()
+        return None
+
+    config = SequenzAnalyseConfig(stage3=StufenConfig(escalation_model="groß"), max_retries=2, retry_base_delay=0.0)
+    ergebnis, anfragen = _analyse(config, fehler=fehler)
+
+    metriken = ergebnis.metriken()
+    assert metriken["gesamt"]["eskalationen"] == len(SEQUENZEN)
+    assert metriken["stufen"]["3"]["modelle"] == {"groß": len(SEQUENZEN)}
+    assert metriken["gesamt"]["retries"] == 0
+
+
+def test_vorübergehender_fehler_zählt_als_wiederholung():
+    fehler = _einmal(lambda: openai.APIConnectionError(request=httpx.Request("POST", "https://fake.invalid/v1/responses")))
+    ergebnis, anfragen = _analyse(SequenzAnalyseConfig(max_retries=2, retry_base_delay=0.0), fehler=fehler)
+
+    assert len(anfragen) == 3 * len(SEQUENZEN) + 1
+    assert ergebnis.metriken()["gesamt"]["retries"] == 1
+    assert ergebnis.metriken()["gesamt"]["eskalationen"] == 0
+
+
+def test_ungültige_ausgabe_wird_mit_dem_validierungsfehler_repariert():
+    anfragen_vorher = []
+
+    def ungültig(anfrage):
+        if schema_name(anfrage) == "KontextfreieLesarten" and not anfragen_vorher:
+            anfragen_vorher.append(anfrage)
+            return True
+        return False
+
+    ergebnis, anfragen = _analyse(SequenzAnalyseConfig(), ungültig=ungültig)
+
+    assert len(anfragen) == 3 * len(SEQUENZEN) + 1
+    assert len(anfragen[2]["input"]) == len(anfragen_vorher[0]["input"]) + 1
+    assert ergebnis.data["runden"][0]["responses_meta"][1]["repariert"]["versuche"] == 1
+    assert ergebnis.metriken()["gesamt"]["reparaturen"] == 1
+    assert ergebnis.metriken()["gesamt"]["retries"] == 0
+
+
+def test_langsamer_aufruf_wird_gehedged():
+    config = SequenzAnalyseConfig(hedge_requests=True, hedge_delay=0.05)
+    ergebnis, anfragen = _analyse(config, fehler=_einmal(lambda: time.sleep(0.5)))
+
+    assert len(anfragen) == 3 * len(SEQUENZEN) + 1
+    assert ergebnis.metriken()["gesamt"]["hedges"] == 1
+    assert ergebnis.data["runden"][0]["responses_meta"][1]["hedge"]["gewinner"] == 2
@@ -0,0 +1,72 @@
+import pytest
+
+import sequenzanalyse.sequenzierung as modul
+from sequenzanalyse import Sequenzierung, korpus_sequenzieren, manifest_jobs, manifest_laden, sequenzen_lesen
+
+TEXT = (
+    "I: Erzählen Sie mal.\n"
+    "B: Also, ich weiß nicht.\n"
+    "\n"
+    "Frau K. (lacht): Ja.\n"
+    "I: Und dann?[SEP]B: Dann\n"
+    "war das so.\n"
+    "\n"
+    "\n"
+    "I: Ok.\n"
+)
+
+REGELN = {
+    "trenner": Sequenzierung(),
+    "regex": Sequenzierung(strategie="regex", muster=r"\?"),
+    "sprecher": Sequenzierung(strategie="sprecher"),
+    "absatz": Sequenzierung(strategie="absatz"),
+}
+
+
+@pytest.fixture
+def transkript(tmp_path):
+    pfad = tmp_path / "interview.txt"
+    pfad.write_text(TEXT, encoding="utf-8")
+    return pfad
+
+
+def test_sprecherwechsel(transkript):
+    assert list(sequenzen_lesen(transkript, REGELN["sprecher"])) == [
+        "I: Erzählen Sie mal.",
+        "B: Also, ich weiß nicht.",
+        "Frau K. (lacht): Ja.",
+        "I: Und dann?[SEP]B: Dann\nwar das so.",
+        "I: Ok.",
+    ]
+
+
+@pytest.mark.parametrize("strategie", sorted(REGELN))
+@pytest.mark.parametrize("blockgröße", [1, 2, 3, 7])
+def test_blockgrenzen_ändern_die_sequenzen_nicht(transkript, monkeypatch, strategie, blockgröße):
+    erwartet = list(sequenzen_lesen(transkript, REGELN[strategie]))
+    monkeypatch.setattr(modul, "_BLOCKGRÖSSE", blockgröße)
+    assert list(sequenzen_lesen(transkript, REGELN[strategie])) == erwartet
+
+
+def test_kurze_sequenzen_werden_angehängt(transkript):
+    regeln = Sequenzierung(strategie="sprecher", min_zeichen=10, kurze="anhängen")
+    assert list(sequenzen_lesen(transkript, regeln)) == [
+        "I: Erzählen Sie mal.",
+        "B: Also, ich weiß nicht.",
+        "Frau K. (lacht): Ja.",
+        "I: Und dann?[SEP]B: Dann\nwar das so.\nI: Ok.",
+    ]
+
+
+def test_manifest_und_jobs(tmp_path, transkript):
+    (tmp_path / "leer.txt").write_text("  \n", encoding="utf-8")
+    manifest = tmp_path / "manifest.jsonl"
+
+    einträge = korpus_sequenzieren(tmp_path, REGELN["sprecher"], manifest=manifest, prozesse=1)
+
+    assert [(e.pfad, e.sequenzen) for e in einträge] == [(str(transkript), 5), (str(tmp_path / "leer.txt"), 0)]
+    assert manifest_laden(manifest) == einträge
+    jobs = list(manifest_jobs(manifest, lambda pfad: pfad.stem))
+    assert len(jobs) == 1
+    assert jobs[0].äußerer_kontext == "interview"
+    assert jobs[0].sequenzen == list(sequenzen_lesen(transkript, REGELN["sprecher"]))
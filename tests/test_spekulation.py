@@ -0,0 +1,118 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+from conftest import AsyncFakeClient, FakeClient
+
+from sequenzanalyse import AsyncSequenzAnalyse, SequenzAnalyse, SequenzAnalyseConfig
+from sequenzanalyse.analyse import _Spekulation
+from sequenzanalyse.async_analyse import _AsyncSpekulation
+
+SEQUENZEN = ["A: Guten Tag.", "B: Ja, hallo.", "A: Wie war die Anreise?", "B: Lang.", "A: Oh.", "B: Hm."]
+
+SPEKULATIV = SequenzAnalyseConfig(speculative_stage3=True, speculative_model="entwurf")
+
+
+def _entwurf_scheitert(anfrage):
+    return RuntimeError("Entwurf fehlgeschlagen") if anfrage["model"] == "entwurf" else None
+
+
+def _spekulativ(client):
+    return SequenzAnalyse(client=client, config=SPEKULATIV, verbose=False).analyse(SEQUENZEN, "Interview")
+
+
+def _spekulation(ergebnis):
+    return [r.get("spekulation") for r in ergebnis.data["runden"]]
+
+
+def test_ungültige_einstellung_legt_keine_dateien_an(tmp_path):
+    config = SequenzAnalyseConfig(speculative_stage3=True, inner_context="summary")
+    with pytest.raises(ValueError):
+        SequenzAnalyse(client=FakeClient(), config=config, verbose=False).analyse(
+            SEQUENZEN, "Interview", checkpoint=tmp_path / "lauf.ckpt", trace=tmp_path / "lauf.jsonl"
+        )
+    with pytest.raises(ValueError):
+        asyncio.run(
+            AsyncSequenzAnalyse(client=AsyncFakeClient(), config=config, verbose=False).analyse(
+                SEQUENZEN, "Interview", checkpoint=tmp_path / "lauf.ckpt", trace=tmp_path / "lauf.jsonl"
+            )
+        )
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_übernommene_entwürfe_ändern_das_ergebnis_nicht():
+    seriell = SequenzAnalyse(client=FakeClient(), verbose=False).analyse(SEQUENZEN, "Interview")
+    spekulativ = _spekulativ(FakeClient())
+
+    # Der Fake antwortet unabhängig vom Modell, Entwürfe gleichen also der endgültigen Hypothese.
+    info = _spekulation(spekulativ)
+    assert all(i["spekuliert"] and i["behalten"] for i in info[1:])
+    assert [r["ergebnisse"] for r in spekulativ.data["runden"]] == [r["ergebnisse"] for r in seriell.data["runden"]]
+
+
+def test_verworfene_entwürfe_werden_erfasst(monkeypatch):
+    monkeypatch.setattr(SequenzAnalyse, "_spekulation_prüfen", lambda self, *args: (False, 0.0))
+    ergebnis = _spekulativ(FakeClient())
+
+    info = _spekulation(ergebnis)
+    assert all(i["spekuliert"] and not i["behalten"] for i in info[1:])
+    # Jede verworfene Runde trägt mindestens den eigenen Entwurf.
+    entwürfe = [m for i in info if i for m in i["metas"] if m["model"] == "entwurf"]
+    assert len(entwürfe) >= len(SEQUENZEN) - 1
+
+
+def test_verwerfen_erfasst_die_entwürfe_offener_vorab_aufrufe():
+    sa = SequenzAnalyse(client=FakeClient(), config=SPEKULATIV, verbose=False)
+    spekulation = _Spekulation(sa, SEQUENZEN, "Interview")
+    vorab = Future()
+    spekulation.vorab[3] = (vorab, "Hypothese", {"model": "entwurf"})
+    with spekulation.bedingung:
+        spekulation._verwerfen()
+
+    assert spekulation.verworfene_metas == [{"model": "entwurf"}]
+    assert spekulation.verworfen == [vorab]
+    spekulation.schließen()
+
+    async def lauf():
+        sa = AsyncSequenzAnalyse(client=AsyncFakeClient(), config=SPEKULATIV, verbose=False)
+        spekulation = _AsyncSpekulation(sa, SEQUENZEN, "Interview")
+        vorab = asyncio.ensure_future(asyncio.sleep(10))
+        spekulation.vorab[3] = (vorab, "Hypothese", {"model": "entwurf"})
+        spekulation._verwerfen()
+        await spekulation.schließen()
+        return spekulation.verworfene_metas, vorab
+
+    metas, vorab = asyncio.run(lauf())
+    assert metas == [{"model": "entwurf"}]
+    assert vorab.cancelled()
+
+
+def test_fehler_der_entwurfskette_landen_im_trace():
+    ergebnis = _spekulativ(FakeClient(_entwurf_scheitert))
+
+    fehler = [f for i in _spekulation(ergebnis) if i for f in i.get("kettenfehler", [])]
+    assert fehler and all("Entwurf fehlgeschlagen" in f for f in fehler)
+    assert len(ergebnis.data["runden"]) == len(SEQUENZEN)
+
+
+def test_async_spekulation_hinterlässt_keine_tasks(monkeypatch):
+    async def lauf(client):
+        ergebnis = await AsyncSequenzAnalyse(client=client, config=SPEKULATIV, verbose=False).analyse(
+            SEQUENZEN, "Interview"
+        )
+        offen = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        return ergebnis, offen
+
+    ergebnis, offen = asyncio.run(lauf(AsyncFakeClient()))
+    assert offen == []
+    assert all(i["behalten"] for i in _spekulation(ergebnis)[1:])
+
+    ergebnis, offen = asyncio.run(lauf(AsyncFakeClient(_entwurf_scheitert)))
+    assert offen == []
+    assert any("kettenfehler" in i for i in _spekulation(ergebnis) if i)
+
+    monkeypatch.setattr(AsyncSequenzAnalyse, "_spekulation_prüfen", lambda self, *args: (False, 0.0))
+    ergebnis, offen = asyncio.run(lauf(AsyncFakeClient()))
+    assert offen == []
+    entwürfe = [m for i in _spekulation(ergebnis) if i for m in i["metas"] if m["model"] == "entwurf"]
+    assert len(entwürfe) >= len(SEQUENZEN) - 1
@@ -0,0 +1,47 @@
+import pytest
+from conftest import FakeClient
+
+from sequenzanalyse import SequenzAnalyse, TraceIndex, analyse_als_json_speichern
+
+SEQUENZEN = ["A: Guten Tag.", "B: Ja, hallo.", "A: Wie war die Anreise?"]
+
+
+@pytest.fixture
+def ordner(tmp_path):
+    ordner = tmp_path / "out"
+    ordner.mkdir()
+    sa = SequenzAnalyse(client=FakeClient(), verbose=False)
+    ergebnis = sa.analyse(SEQUENZEN, "Interview")
+    analyse_als_json_speichern(ergebnis.data, "Interview", output_dir=ordner)
+    sa.analyse(SEQUENZEN[:2], "Beratung", trace=ordner / "beratung.jsonl.gz")
+    # Dateien, die keine Traces sind
+    (ordner / "manifest.jsonl").write_text('{"pfad": "a.txt", "sequenzen": 3}\n', encoding="utf-8")
+    (ordner / "einstellungen.json").write_text('{"model": "gpt-5-nano"}', encoding="utf-8")
+    return ordner
+
+
+def test_import_eines_verzeichnisses(tmp_path, ordner):
+    ix = TraceIndex(tmp_path / "index.sqlite")
+
+    assert ix.importieren(ordner) == 2
+    assert sorted((t["äußerer_kontext"], t["sequenzen"]) for t in ix.traces()) == [("Beratung", 2), ("Interview", 3)]
+    assert ix.abfrage("SELECT count(*) AS n FROM runden") == [{"n": 5}]
+    interview = next(t["trace_id"] for t in ix.traces() if t["äußerer_kontext"] == "Interview")
+    assert [r["runde"] for r in ix.hypothesenverlauf(interview)] == [1, 2, 3]
+
+
+def test_unveränderte_dateien_werden_übersprungen(tmp_path, ordner):
+    ix = TraceIndex(tmp_path / "index.sqlite")
+    ix.importieren(ordner)
+
+    assert ix.importieren(ordner) == 0
+    assert ix.importieren(ordner, neu=True) == 2
+    assert len(ix.traces()) == 2
+    assert ix.abfrage("SELECT count(*) AS n FROM runden") == [{"n": 5}]
+
+
+def test_einzeln_genannte_datei_muss_ein_trace_sein(tmp_path, ordner):
+    ix = TraceIndex(tmp_path / "index.sqlite")
+    with pytest.raises(ValueError):
+        ix.importieren(ordner / "manifest.jsonl")
+    assert ix.traces() == []
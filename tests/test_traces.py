@@ -0,0 +1,68 @@
+import gzip
+import json
+
+import pytest
+from conftest import FakeClient
+
+from sequenzanalyse import (
+    SequenzAnalyse,
+    SequenzAnalyseConfig,
+    TraceLeser,
+    trace_expandieren,
+    trace_kompaktieren,
+    trace_laden,
+    trace_speichern,
+)
+
+SEQUENZEN = ["A: Guten Tag.", "B: Ja, hallo.", "A: Wie war die Anreise?", "B: Lang.", "A: Oh."]
+
+
+def _analyse(trace=None):
+    sa = SequenzAnalyse(client=FakeClient(), config=SequenzAnalyseConfig(), verbose=False)
+    return sa.analyse(SEQUENZEN, "Interview", trace=trace)
+
+
+@pytest.mark.parametrize("name", ["lauf.jsonl", "lauf.jsonl.gz"])
+def test_trace_wird_rundenweise_geschrieben_und_vollständig_gelesen(tmp_path, name):
+    pfad = tmp_path / name
+    ergebnis = _analyse(trace=pfad)
+
+    with pfad.open("rb") as f:
+        assert (f.read(2) == b"\x1f\x8b") == name.endswith(".gz")
+    geladen = trace_laden(pfad)
+    assert geladen == json.loads(json.dumps(ergebnis.data, ensure_ascii=False, default=str))
+
+
+def test_leser_liest_einzelne_runden(tmp_path):
+    pfad = tmp_path / "lauf.jsonl.gz"
+    ergebnis = _analyse(trace=pfad)
+
+    leser = TraceLeser(pfad)
+    assert leser.kopf["sequenzen"] == SEQUENZEN
+    assert len(leser) == len(SEQUENZEN)
+    assert leser.runde(4)["ergebnisse"] == ergebnis.data["runden"][3]["ergebnisse"]
+    assert [r["runde"] for r in leser] == [1, 2, 3, 4, 5]
+
+
+def test_abgebrochener_trace_behält_die_fertigen_runden(tmp_path):
+    pfad = tmp_path / "lauf.jsonl.gz"
+    client = FakeClient(lambda anfrage: RuntimeError("Abbruch") if "Lang." in json.dumps(anfrage["input"]) else None)
+    with pytest.raises(RuntimeError):
+        SequenzAnalyse(client=client, verbose=False).analyse(SEQUENZEN, "Interview", trace=pfad)
+
+    with gzip.open(pfad, "rt", encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 1 + 3
+    assert len(TraceLeser(pfad)) == 3
+
+
+def test_kompaktes_layout_verliert_nichts(tmp_path):
+    daten = json.loads(json.dumps(_analyse().data, ensure_ascii=False, default=str))
+    voll, kompakt = tmp_path / "voll.jsonl", tmp_path / "kompakt.jsonl"
+    trace_speichern(daten, voll)
+    trace_speichern(daten, kompakt, kompakt=True)
+
+    assert TraceLeser(kompakt).kompakt
+    assert kompakt.stat().st_size < voll.stat().st_size
+    assert trace_laden(kompakt) == daten
+    assert TraceLeser(kompakt).runde(5) == daten["runden"][4]
+    assert trace_expandieren(trace_kompaktieren(daten)) == daten
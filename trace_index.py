@@ -0,0 +1,255 @@
+"""SQLite-Index über gespeicherte Traces für korpusweite Abfragen."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .traces import TraceLeser
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS traces (
+    trace_id INTEGER PRIMARY KEY,
+    pfad TEXT UNIQUE NOT NULL,
+    äußerer_kontext TEXT,
+    model TEXT,
+    sequenzen INTEGER,
+    größe INTEGER,
+    geändert REAL
+);
+CREATE TABLE IF NOT EXISTS runden (
+    trace_id INTEGER NOT NULL,
+    runde INTEGER NOT NULL,
+    neue_sequenz TEXT,
+    passung TEXT,
+    begründung TEXT,
+    erkenntnisgewinn TEXT,
+    zwischenfazit TEXT,
+    hypothese_art TEXT,
+    fallstrukturhypothese TEXT,
+    PRIMARY KEY (trace_id, runde)
+);
+CREATE TABLE IF NOT EXISTS lesarten (
+    trace_id INTEGER NOT NULL,
+    runde INTEGER NOT NULL,
+    art TEXT NOT NULL,
+    titel TEXT,
+    beschreibung TEXT
+);
+CREATE TABLE IF NOT EXISTS lesarten_vs_kontext (
+    trace_id INTEGER NOT NULL,
+    runde INTEGER NOT NULL,
+    titel TEXT,
+    passung TEXT,
+    begründung TEXT,
+    erkenntnisgewinn TEXT
+);
+CREATE TABLE IF NOT EXISTS prognosen (
+    trace_id INTEGER NOT NULL,
+    runde INTEGER NOT NULL,
+    lesart_titel TEXT,
+    nächste_sequenz TEXT,
+    begründung TEXT
+);
+CREATE TABLE IF NOT EXISTS prognose_abgleich (
+    trace_id INTEGER NOT NULL,
+    runde INTEGER NOT NULL,
+    erwartete_sequenz TEXT,
+    tatsächliche_sequenz TEXT,
+    entsprechung TEXT,
+    erkenntnisgewinn TEXT
+);
+CREATE INDEX IF NOT EXISTS runden_passung ON runden (passung);
+CREATE INDEX IF NOT EXISTS lesarten_trace ON lesarten (trace_id, runde);
+CREATE INDEX IF NOT EXISTS lesarten_vs_kontext_passung ON lesarten_vs_kontext (passung);
+CREATE INDEX IF NOT EXISTS prognosen_trace ON prognosen (trace_id, runde);
+CREATE INDEX IF NOT EXISTS prognose_abgleich_entsprechung ON prognose_abgleich (entsprechung);
+"""
+
+_TABELLEN = ("runden", "lesarten", "lesarten_vs_kontext", "prognosen", "prognose_abgleich")
+
+
+def _trace_lesen(path: Path) -> Tuple[Dict[str, Any], Iterable[Dict[str, Any]]]:
+    """Liefert Kopf und Runden eines JSON- oder JSONL-Traces."""
+    if path.suffix == ".json":
+        with path.open(encoding="utf-8") as f:
+            analyse = json.load(f)
+        if not isinstance(analyse, dict) or "runden" not in analyse:
+            raise ValueError(f"{path} ist kein Sequenzanalyse-Trace.")
+        return analyse, analyse["runden"]
+    leser = TraceLeser(path)
+    return leser.kopf, leser
+
+
+def _trace_dateien(pfade: Iterable[Union[Path, str]]) -> Iterator[Tuple[Path, bool]]:
+    """Liefert die zu importierenden Dateien und ob sie aus einer Verzeichnissuche stammen."""
+    for pfad in map(Path, pfade):
+        if pfad.is_dir():
+            for muster in ("*.json", "*.jsonl", "*.jsonl.gz"):
+                yield from ((datei, True) for datei in sorted(pfad.glob(muster)))
+        else:
+            yield pfad, False
+
+
+class TraceIndex:
+    """Flacht Traces in SQLite-Tabellen ab und beantwortet Abfragen darüber.
+
+    Tabellen: ``traces``, ``runden`` (Passung der Sequenz, Zwischenfazit,
+    Fallstrukturhypothese), ``lesarten`` (kontextfrei aus Schritt 2,
+    kontextinduziert aus Schritt 3), ``lesarten_vs_kontext``, ``prognosen``
+    und ``prognose_abgleich`` (erwartete vs. tatsächliche Fortführung). Alle
+    Zeilen tragen ``trace_id`` und ``runde``; für eigene Abfragen steht
+    ``abfrage`` mit beliebigem SQL bereit.
+    """
+
+    def __init__(self, path: Union[Path, str] = ".sequenzanalyse-index.sqlite") -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def importieren(self, pfade: Iterable[Union[Path, str]], neu: bool = False) -> int:
+        """Importiert Trace-Dateien oder alle Traces in Verzeichnissen.
+
+        Unterstützt die Dateien von ``analyse_als_json_speichern`` sowie
+        ``TraceSchreiber`` (auch kompakt/komprimiert). In Verzeichnissen werden
+        alle ``*.json``, ``*.jsonl`` und ``*.jsonl.gz`` gelesen und Dateien,
+        die keine Traces sind (Manifeste, Checkpoints), übersprungen; einzeln
+        genannte Dateien müssen Traces sein. Unveränderte Dateien werden
+        übersprungen, sofern nicht ``neu=True``. Liefert die Zahl der
+        importierten Traces.
+        """
+        if isinstance(pfade, (str, Path)):
+            pfade = [pfade]
+        anzahl = 0
+        for pfad, aus_verzeichnis in _trace_dateien(pfade):
+            stat = pfad.stat()
+            with self._lock, self._conn:
+                alt = self._conn.execute(
+                    "SELECT trace_id, größe, geändert FROM traces WHERE pfad = ?", (str(pfad.resolve()),)
+                ).fetchone()
+                if alt is not None and not neu and (alt["größe"], alt["geändert"]) == (stat.st_size, stat.st_mtime):
+                    continue
+                try:
+                    kopf, runden = _trace_lesen(pfad)
+                except ValueError:
+                    if aus_verzeichnis:
+                        continue
+                    raise
+                if alt is not None:
+                    self._löschen(alt["trace_id"])
+                trace_id = self._conn.execute(
+                    "INSERT INTO traces (pfad, äußerer_kontext, model, sequenzen, größe, geändert) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        str(pfad.resolve()),
+                        kopf.get("äußerer_kontext"),
+                        kopf.get("meta", {}).get("config", {}).get("model"),
+                        len(kopf.get("sequenzen", [])),
+                        stat.st_size,
+                        stat.st_mtime,
+                    ),
+                ).lastrowid
+                for runde in runden:
+                    self._runde_einfügen(trace_id, runde)
+            anzahl += 1
+        return anzahl
+
+    def _löschen(self, trace_id: int) -> None:
+        for tabelle in _TABELLEN:
+            self._conn.execute(f"DELETE FROM {tabelle} WHERE trace_id = ?", (trace_id,))
+        self._conn.execute("DELETE FROM traces WHERE trace_id = ?", (trace_id,))
+
+    def _runde_einfügen(self, trace_id: int, runde: Dict[str, Any]) -> None:
+        nummer = runde["runde"]
+        ergebnisse = runde.get("ergebnisse", [])
+        lesarten2 = ergebnisse[1] if len(ergebnisse) > 1 else {}
+        schritt3 = ergebnisse[2] if len(ergebnisse) > 2 else {}
+
+        hypothese_art, hypothese = None, None
+        for art in ("erste", "neue", "finale"):
+            if f"{art}_fallstrukturhypothese" in schritt3:
+                hypothese_art, hypothese = art, schritt3[f"{art}_fallstrukturhypothese"]
+        svk = schritt3.get("sequenz_vs_kontext", {})
+        self._conn.execute(
+            "INSERT INTO runden VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                trace_id, nummer, runde.get("neue_sequenz"), svk.get("passung"), svk.get("begründung"),
+                svk.get("erkenntnisgewinn"), schritt3.get("zwischenfazit"), hypothese_art, hypothese,
+            ),
+        )
+        self._conn.executemany(
+            "INSERT INTO lesarten VALUES (?, ?, ?, ?, ?)",
+            [(trace_id, nummer, "kontextfrei", l.get("titel"), l.get("beschreibung")) for l in lesarten2.get("lesarten", [])]
+            + [
+                (trace_id, nummer, "kontextinduziert", l.get("titel"), l.get("beschreibung"))
+                for l in schritt3.get("kontextinduzierte_lesarten", {}).get("lesarten", [])
+            ],
+        )
+        self._conn.executemany(
+            "INSERT INTO lesarten_vs_kontext VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (trace_id, nummer, l.get("titel"), l.get("passung"), l.get("begründung"), l.get("erkenntnisgewinn"))
+                for l in schritt3.get("kontextfreie_lesarten_vs_kontext", [])
+            ],
+        )
+        prognose = schritt3.get("prognose_der_nächsten_sequenzeinheit")
+        if prognose:
+            self._conn.execute(
+                "INSERT INTO prognosen VALUES (?, ?, ?, ?, ?)",
+                (trace_id, nummer, prognose.get("lesart_titel"), prognose.get("nächste_sequenz"), prognose.get("begründung")),
+            )
+        self._conn.executemany(
+            "INSERT INTO prognose_abgleich VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    trace_id, nummer, a.get("erwartete_sequenz"), a.get("tatsächliche_sequenz"),
+                    a.get("entsprechung"), a.get("erkenntnisgewinn"),
+                )
+                for a in schritt3.get("sequenz_vs_erwartete_fortführung", [])
+            ],
+        )
+
+    def abfrage(self, sql: str, parameter: Union[Tuple[Any, ...], Dict[str, Any]] = ()) -> List[Dict[str, Any]]:
+        """Führt eine beliebige SQL-Abfrage aus und liefert die Zeilen als Dicts."""
+        with self._lock:
+            return [dict(zeile) for zeile in self._conn.execute(sql, parameter)]
+
+    def _gefiltert(self, tabelle: str, filter: Dict[str, Any]) -> List[Dict[str, Any]]:
+        bedingungen = [f"t.{spalte} = ?" for spalte, wert in filter.items() if wert is not None]
+        where = f"WHERE {' AND '.join(bedingungen)}" if bedingungen else ""
+        return self.abfrage(
+            f"SELECT traces.pfad, t.* FROM {tabelle} AS t JOIN traces USING (trace_id) {where} "
+            "ORDER BY t.trace_id, t.runde",
+            tuple(wert for wert in filter.values() if wert is not None),
+        )
+
+    def runden(self, passung: Optional[str] = None, trace_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Runden, z. B. alle mit ``passung="überraschend"``."""
+        return self._gefiltert("runden", {"passung": passung, "trace_id": trace_id})
+
+    def lesarten_vs_kontext(self, passung: Optional[str] = None, trace_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Abgleich kontextfreier Lesarten, z. B. ``passung="schlecht/gar nicht"``."""
+        return self._gefiltert("lesarten_vs_kontext", {"passung": passung, "trace_id": trace_id})
+
+    def prognose_abgleich(self, entsprechung: Optional[str] = None, trace_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Erwartete vs. tatsächliche Fortführungen, gefiltert nach ``entsprechung``."""
+        return self._gefiltert("prognose_abgleich", {"entsprechung": entsprechung, "trace_id": trace_id})
+
+    def hypothesenverlauf(self, trace_id: int) -> List[Dict[str, Any]]:
+        """Fallstrukturhypothese je Runde eines Traces."""
+        return self.abfrage(
+            "SELECT runde, hypothese_art, fallstrukturhypothese FROM runden WHERE trace_id = ? ORDER BY runde",
+            (trace_id,),
+        )
+
+    def traces(self) -> List[Dict[str, Any]]:
+        """Alle importierten Traces."""
+        return self.abfrage("SELECT * FROM traces ORDER BY trace_id")
+
+    def schließen(self) -> None:
+        self._conn.close()
@@ -0,0 +1,291 @@
+"""Zeilenweises Schreiben und bedarfsweises Lesen von Analyse-Traces.
+
+Ein Trace im JSONL-Format besteht aus einer Kopfzeile (``meta``,
+``sequenzen``, ``äußerer_kontext``) und einer Zeile pro Runde. Endet der
+Dateiname auf ``.gz``, wird gzip-komprimiert geschrieben; beim Lesen wird die
+Kompression am Dateianfang erkannt.
+
+Im kompakten Layout entfallen ``bisheriges_protokoll`` und ``neue_sequenz``
+(beides folgt aus ``sequenzen`` und der Rundennummer), und von den
+Antwort-Metadaten wird nur gespeichert, was vom ersten Aufruf abweicht. Das
+hält den Trace linear in der Protokolllänge.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Union
+
+_FORMAT = "sequenzanalyse-trace"
+_VERSION = 1
+
+
+# Felder, die sich bei jedem Aufruf ändern und daher nicht in die Basis gehören.
+_AUFRUFFELDER = ("id", "created_at", "usage", "cache", "metrik")
+
+
+class _MetaDelta:
+    """Speichert Antwort-Metadaten als Abweichung von einer gemeinsamen Basis.
+
+    Die Basis wird aus dem ersten Aufruf gebildet. Felder der Basis, die einem
+    späteren Aufruf fehlen, werden unter ``_ohne`` vermerkt.
+    """
+
+    def __init__(self, basis: Optional[Dict[str, Any]] = None) -> None:
+        self.basis = basis
+
+    def kompaktieren(self, meta: Dict[str, Any]) -> Dict[str, Any]:
+        if self.basis is None:
+            self.basis = {k: v for k, v in meta.items() if k not in _AUFRUFFELDER}
+        delta = {k: v for k, v in meta.items() if k not in self.basis or self.basis[k] != v}
+        ohne = [k for k in self.basis if k not in meta]
+        if ohne:
+            delta["_ohne"] = ohne
+        return delta
+
+    def expandieren(self, delta: Dict[str, Any]) -> Dict[str, Any]:
+        ohne = delta.get("_ohne", ())
+        meta = {k: v for k, v in (self.basis or {}).items() if k not in ohne}
+        meta.update((k, v) for k, v in delta.items() if k != "_ohne")
+        return meta
+
+
+def _runde_kompaktieren(runde: Dict[str, Any], metas: _MetaDelta) -> Dict[str, Any]:
+    ohne_basis = metas.basis is None
+    kompakt = {k: v for k, v in runde.items() if k not in ("bisheriges_protokoll", "neue_sequenz")}
+    if "responses_meta" in runde:
+        kompakt["responses_meta"] = [metas.kompaktieren(m) for m in runde["responses_meta"]]
+    if "meta" in runde.get("innerer_kontext", {}):
+        kompakt["innerer_kontext"] = {**runde["innerer_kontext"], "meta": metas.kompaktieren(runde["innerer_kontext"]["meta"])}
+    if ohne_basis and metas.basis is not None:
+        kompakt["responses_basis"] = metas.basis
+    return kompakt
+
+
+def _runde_expandieren(runde: Dict[str, Any], sequenzen: List[str], metas: _MetaDelta) -> Dict[str, Any]:
+    if "responses_basis" in runde:
+        metas.basis = runde["responses_basis"]
+    nummer = runde["runde"]
+    voll: Dict[str, Any] = {
+        "runde": nummer,
+        "bisheriges_protokoll": " ".join(sequenzen[: nummer - 1]),
+        "neue_sequenz": sequenzen[nummer - 1],
+    }
+    voll.update((k, v) for k, v in runde.items() if k not in ("runde", "responses_basis"))
+    if "responses_meta" in runde:
+        voll["responses_meta"] = [metas.expandieren(m) for m in runde["responses_meta"]]
+    if "meta" in runde.get("innerer_kontext", {}):
+        voll["innerer_kontext"] = {**runde["innerer_kontext"], "meta": metas.expandieren(runde["innerer_kontext"]["meta"])}
+    return voll
+
+
+def trace_kompaktieren(analyse: Dict[str, Any]) -> Dict[str, Any]:
+    """Überführt einen Trace in das kompakte Layout (``layout="kompakt"``)."""
+    if analyse.get("layout") == "kompakt":
+        return analyse
+    metas = _MetaDelta()
+    kopf = {k: v for k, v in analyse.items() if k != "runden"}
+    return {"layout": "kompakt", **kopf, "runden": [_runde_kompaktieren(r, metas) for r in analyse["runden"]]}
+
+
+def trace_expandieren(analyse: Dict[str, Any]) -> Dict[str, Any]:
+    """Stellt aus einem kompakten Trace das Layout von ``SequenzAnalyseErgebnis.data`` wieder her."""
+    if analyse.get("layout") != "kompakt":
+        return analyse
+    metas = _MetaDelta()
+    kopf = {k: v for k, v in analyse.items() if k not in ("layout", "runden")}
+    return {**kopf, "runden": [_runde_expandieren(r, analyse["sequenzen"], metas) for r in analyse["runden"]]}
+
+
+def _ist_gzip(path: Path) -> bool:
+    with path.open("rb") as f:
+        return f.read(2) == b"\x1f\x8b"
+
+
+class TraceSchreiber:
+    """Schreibt einen Trace Runde für Runde, statt ihn am Ende komplett zu serialisieren.
+
+    Jede Zeile wird nach dem Schreiben geleert, so dass der Speicherbedarf
+    unabhängig von der Protokolllänge bleibt. Anders als ``RundenCheckpoint``
+    wird nicht nach jeder Runde ``fsync`` aufgerufen. Mit ``kompakt=True``
+    werden die Runden im kompakten Layout geschrieben.
+    """
+
+    def __init__(
+        self,
+        path: Union[Path, str],
+        remove_responses_meta: bool = False,
+        komprimieren: Optional[bool] = None,
+        kompakt: bool = False,
+        encoding: str = "utf-8",
+    ) -> None:
+        self.path = Path(path)
+        self.remove_responses_meta = remove_responses_meta
+        self.komprimieren = self.path.suffix == ".gz" if komprimieren is None else komprimieren
+        self.kompakt = kompakt
+        self.encoding = encoding
+        self._datei: Optional[IO[str]] = None
+        self._metas = _MetaDelta()
+
+    def beginnen(self, kopf: Dict[str, Any]) -> None:
+        """Legt die Datei an und schreibt die Kopfzeile."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.komprimieren:
+            self._datei = gzip.open(self.path, "wt", encoding=self.encoding)
+        else:
+            self._datei = self.path.open("w", encoding=self.encoding)
+        layout = {"layout": "kompakt"} if self.kompakt else {}
+        self._schreiben({"format": _FORMAT, "version": _VERSION, **layout, **kopf})
+
+    def runde_schreiben(self, runde: Dict[str, Any]) -> None:
+        """Hängt eine abgeschlossene Runde an."""
+        if self.remove_responses_meta:
+            runde = {k: v for k, v in runde.items() if k != "responses_meta"}
+        if self.kompakt:
+            runde = _runde_kompaktieren(runde, self._metas)
+        self._schreiben(runde)
+
+    def schließen(self) -> None:
+        if self._datei is not None:
+            self._datei.close()
+            self._datei = None
+
+    def _schreiben(self, eintrag: Dict[str, Any]) -> None:
+        if self._datei is None:
+            raise RuntimeError("TraceSchreiber.beginnen() wurde nicht aufgerufen.")
+        self._datei.write(json.dumps(eintrag, ensure_ascii=False, default=str) + "\n")
+        self._datei.flush()
+
+    def __enter__(self) -> "TraceSchreiber":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.schließen()
+
+
+class TraceLeser:
+    """Liest einen JSONL-Trace, ohne ihn vollständig zu parsen.
+
+    ``kopf`` liest nur die erste Zeile, Iteration liefert die Runden einzeln.
+    Für ``runde(n)`` wird einmalig ein Index der Zeilenanfänge aufgebaut; dabei
+    werden die Zeilen nur gelesen, nicht als JSON geparst. Bei komprimierten
+    Dateien muss dafür bis zur gesuchten Stelle entpackt werden. Kompakte
+    Traces werden beim Lesen ins volle Layout expandiert.
+    """
+
+    def __init__(self, path: Union[Path, str], encoding: str = "utf-8") -> None:
+        self.path = Path(path)
+        self.encoding = encoding
+        self._gzip = _ist_gzip(self.path)
+        self._kopf: Optional[Dict[str, Any]] = None
+        self._index: Optional[List[int]] = None
+        self._basis: Optional[Dict[str, Any]] = None
+
+    def _öffnen(self) -> IO[bytes]:
+        return gzip.open(self.path, "rb") if self._gzip else self.path.open("rb")
+
+    @property
+    def kopf(self) -> Dict[str, Any]:
+        """Kopfzeile mit ``meta``, ``sequenzen`` und ``äußerer_kontext``."""
+        if self._kopf is None:
+            with self._öffnen() as f:
+                kopf = json.loads(f.readline().decode(self.encoding))
+            if kopf.get("format") != _FORMAT:
+                raise ValueError(f"{self.path} ist kein Sequenzanalyse-Trace.")
+            self._kopf = kopf
+        return self._kopf
+
+    @property
+    def kompakt(self) -> bool:
+        return self.kopf.get("layout") == "kompakt"
+
+    def _roh(self) -> Iterator[Dict[str, Any]]:
+        with self._öffnen() as f:
+            f.readline()
+            for zeile in f:
+                if zeile.strip():
+                    yield json.loads(zeile.decode(self.encoding))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if not self.kompakt:
+            yield from self._roh()
+            return
+        metas = _MetaDelta()
+        for runde in self._roh():
+            yield _runde_expandieren(runde, self.kopf["sequenzen"], metas)
+
+    def _zeilenanfänge(self) -> List[int]:
+        if self._index is None:
+            index = []
+            with self._öffnen() as f:
+                position = len(f.readline())
+                for zeile in f:
+                    if zeile.strip():
+                        index.append(position)
+                    position += len(zeile)
+            self._index = index
+        return self._index
+
+    def __len__(self) -> int:
+        return len(self._zeilenanfänge())
+
+    def runde(self, nummer: int) -> Dict[str, Any]:
+        """Lädt die Runde ``nummer`` (1-basiert, wie ``runde`` im Trace)."""
+        index = self._zeilenanfänge()
+        if not 1 <= nummer <= len(index):
+            raise IndexError(f"Runde {nummer} liegt außerhalb von 1..{len(index)}.")
+        with self._öffnen() as f:
+            f.seek(index[nummer - 1])
+            runde = json.loads(f.readline().decode(self.encoding))
+        if not self.kompakt:
+            return runde
+        return _runde_expandieren(runde, self.kopf["sequenzen"], _MetaDelta(self._responses_basis()))
+
+    def _responses_basis(self) -> Optional[Dict[str, Any]]:
+        if self._basis is None:
+            self._basis = next((r["responses_basis"] for r in self._roh() if "responses_basis" in r), {})
+        return self._basis
+
+    def laden(self, kompakt: bool = False) -> Dict[str, Any]:
+        """Lädt den ganzen Trace im Layout von ``SequenzAnalyseErgebnis.data``.
+
+        Mit ``kompakt=True`` bleibt ein kompakter Trace kompakt.
+        """
+        kopf = {k: v for k, v in self.kopf.items() if k not in ("format", "version", "layout")}
+        if kompakt and self.kompakt:
+            return {"layout": "kompakt", **kopf, "runden": list(self._roh())}
+        return {**kopf, "runden": list(self)}
+
+
+def trace_speichern(
+    analyse: Dict[str, Any],
+    path: Union[Path, str],
+    remove_responses_meta: bool = False,
+    kompakt: bool = False,
+    encoding: str = "utf-8",
+) -> Path:
+    """Schreibt einen vorhandenen Trace zeilenweise (bei ``.gz`` komprimiert)."""
+    analyse = trace_expandieren(analyse)
+    with TraceSchreiber(
+        path, remove_responses_meta=remove_responses_meta, kompakt=kompakt, encoding=encoding
+    ) as schreiber:
+        schreiber.beginnen({k: v for k, v in analyse.items() if k != "runden"})
+        for runde in analyse["runden"]:
+            schreiber.runde_schreiben(runde)
+    return schreiber.path
+
+
+def trace_laden(path: Union[Path, str], encoding: str = "utf-8") -> Dict[str, Any]:
+    """Lädt einen Trace vollständig.
+
+    Dateien mit der Endung ``.json`` gelten als mit ``analyse_als_json_speichern``
+    gespeichertes JSON (etwa aus ``korpus_analyse``), alle anderen als mit
+    ``TraceSchreiber`` geschriebenes JSONL.
+    """
+    path = Path(path)
+    if path.suffix == ".json":
+        with path.open(encoding=encoding) as f:
+            return json.load(f)
+    return TraceLeser(path, encoding=encoding).laden()
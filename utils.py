@@ -40,20 +40,30 @@ def slugify_short(text: str, max_len: int = 40) -> str:
     return slug or "kontext"
 
 
+def tokens_schätzen(text: str) -> int:
+    """Schätzt die Tokenzahl eines Textes grob (ca. vier Zeichen pro Token)."""
+    return (len(text) + 3) // 4
+
+
 def remove_responses_meta(analyse):
     """Entfernt responses_meta aus den Analyse-Runden."""
     d = dict(analyse)
-    for r in d['runden']:
-        if hasattr(r, "responses_meta"):    
-            r.pop("responses_meta")
+    d['runden'] = [
+        {k: v for k, v in r.items() if k != "responses_meta"}
+        for r in d['runden']
+    ]
     return d
 
 
+# Der gleichnamige Parameter von analyse_als_json_speichern verdeckt die Funktion.
+_remove_responses_meta = remove_responses_meta
+
+
 def analyse_als_json_speichern(
     analyse: Dict[str, Any],
     äußerer_kontext: str,
     output_dir: Path | str = ".",
-    remove_responses_meta: Bool = True,
+    remove_responses_meta: bool = True,
     max_len: int = 40,
     timestamp: Optional[str] = None,
     encoding: str = "utf-8",
@@ -67,7 +77,7 @@ def analyse_als_json_speichern(
     path = output_dir / file_name
 
     if remove_responses_meta:
-        analyse = remove_responses_meta(analyse)
+        analyse = _remove_responses_meta(analyse)
 
     with path.open("w", encoding=encoding) as f:
         json.dump(analyse, f, ensure_ascii=False, indent=4)
@@ -79,9 +89,13 @@ def txt_sequenzierung(
         txt_file_path: Union[str, Path], 
         sep: str = "[SEP]"
 ) -> List[str]:
-    """Liest eine Textdatei und teilt sie anhand des Trennzeichens in Sequenzen."""
+    """Liest eine Textdatei und teilt sie anhand des Trennzeichens in Sequenzen.
+
+    Leere und nur aus Leerraum bestehende Abschnitte werden verworfen. Für
+    große Dateien und weitere Strategien siehe ``sequenzen_lesen``.
+    """
     path = Path(txt_file_path)
     txt_as_str = path.read_text(encoding="utf-8")
-    sequenzen = txt_as_str.split(sep)
+    sequenzen = [s for s in txt_as_str.split(sep) if s.strip()]
 
     return sequenzen